@@ -43,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'proleague.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,7 +57,8 @@ ROOT_URLCONF = 'liu_river_final_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, timing renders for proleague.profiling
+        'BACKEND': 'proleague.profiling.ProfiledDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -80,9 +82,72 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # completed seasons, moved out of the live tables by archive_season
+    # --database archive; create its tables with migrate --database archive
+    'archive': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'archive.sqlite3',
+    },
 }
 
+DATABASE_ROUTERS = ['proleague.routers.ArchiveRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+# proleague keys its cached pages, rows and permission sets on version
+# tokens that a change bumps. The tokens must be shared by every worker,
+# or a revoked permission stays in effect on the workers that didn't see
+# the change: the file cache below is shared by the workers of one host,
+# with several hosts point 'versions' at memcached or redis. The values
+# themselves may stay in a per-process cache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'proleague',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'versions',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
+}
+PROLEAGUE_VERSION_CACHE = 'versions'
+
+# Seconds a rendered list row stays cached; rows are also invalidated on change
+PROLEAGUE_ROW_CACHE_TIMEOUT = 60 * 60
+
+# Seconds a rendered list or detail page stays cached for a permission set
+PROLEAGUE_PAGE_CACHE_TIMEOUT = 5 * 60
+
+# Seconds the facet counts of a filtered match or player list stay cached;
+# they are also invalidated when the models they count change
+PROLEAGUE_FACET_CACHE_TIMEOUT = 60 * 60
+
+# Seconds a user and their permission set stay cached; both are also
+# invalidated when the user, their groups or the groups' permissions change
+PROLEAGUE_PERMISSION_CACHE_TIMEOUT = 60 * 60
+
+# ModelBackend stays listed so that sessions logged in through it keep
+# working; it reads the permission set CachedModelBackend has loaded
+AUTHENTICATION_BACKENDS = [
+    'proleague.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Per-view request timings for the profile dashboard and metrics endpoint
+PROLEAGUE_PROFILING = True
+PROLEAGUE_PROFILING_WINDOW = 10 * 60
+PROLEAGUE_PROFILING_DUPLICATE_THRESHOLD = 5
+PROLEAGUE_METRICS_TOKEN = os.environ.get('PROLEAGUE_METRICS_TOKEN')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -136,4 +201,7 @@ LOGIN_URL = reverse_lazy('login_urlpattern')
 
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
+# read sessions from the cache, writing through to the database
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
@@ -1,12 +1,102 @@
-from django.contrib import admin
+import io
+
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .forms import ImportLeagueForm
+from .importers import IMPORTERS, READERS, import_rows
+from .models import (
+    Period, Year, Tournament, Match, MatchReport, MatchGame, PlayerGameStat, Player, Position, Team, Game, School,
+)
+
+
+class TournamentAdmin(admin.ModelAdmin):
+    change_list_template = 'admin/proleague/tournament/change_list.html'
+    # rejected rows listed on the upload page
+    max_import_errors = 100
+
+    def get_urls(self):
+        return [
+            path(
+                'import/',
+                self.admin_site.admin_view(self.import_view),
+                name='proleague_tournament_import',
+            ),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        form = ImportLeagueForm(request.POST or None, request.FILES or None)
+        report = None
+        if form.is_valid():
+            kind = form.cleaned_data['kind']
+            opts = IMPORTERS[kind].model._meta
+            if not request.user.has_perm('{}.add_{}'.format(opts.app_label, opts.model_name)):
+                raise PermissionDenied
+            upload = form.cleaned_data['file']
+            stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+            report = import_rows(
+                kind,
+                READERS[form.file_format(upload)](stream),
+                batch_size=form.cleaned_data['batch_size'],
+            )
+            if not report.errors:
+                self.message_user(
+                    request, '{} {} imported.'.format(report.created, opts.verbose_name_plural)
+                )
+                return redirect('admin:proleague_{}_changelist'.format(opts.model_name))
+            self.message_user(request, '{} {} imported, {} rows rejected.'.format(
+                report.created, opts.verbose_name_plural, len(report.errors)
+            ), messages.WARNING)
+        context = dict(
+            self.admin_site.each_context(request),
+            opts=self.model._meta,
+            title='Import league data',
+            form=form,
+            report=report,
+            errors=report.errors[:self.max_import_errors] if report else [],
+        )
+        return TemplateResponse(request, 'admin/proleague/import_league.html', context)
+
+
+class MatchReportInline(admin.StackedInline):
+    model = MatchReport
+
+
+class MatchGameInline(admin.TabularInline):
+    model = MatchGame
+    extra = 1
+    show_change_link = True
+
+
+class MatchAdmin(admin.ModelAdmin):
+    inlines = [MatchReportInline, MatchGameInline]
+
+
+class PlayerGameStatInline(admin.TabularInline):
+    model = PlayerGameStat
+    extra = 1
+    autocomplete_fields = ['player']
+
+
+class MatchGameAdmin(admin.ModelAdmin):
+    inlines = [PlayerGameStatInline]
+    list_select_related = ['match__tournament', 'match__team_a', 'match__team_b']
+    raw_id_fields = ['match']
+
+
+class PlayerAdmin(admin.ModelAdmin):
+    search_fields = ['player_name', 'gamer_tag']
 
-from .models import Period, Year, Tournament, Match, Player, Position, Team, Game, School
 
 admin.site.register(Period)
 admin.site.register(Year)
-admin.site.register(Tournament)
-admin.site.register(Match)
-admin.site.register(Player)
+admin.site.register(Tournament, TournamentAdmin)
+admin.site.register(Match, MatchAdmin)
+admin.site.register(MatchGame, MatchGameAdmin)
+admin.site.register(Player, PlayerAdmin)
 admin.site.register(Position)
 admin.site.register(Team)
 admin.site.register(Game)
@@ -0,0 +1,306 @@
+from functools import wraps
+
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.gzip import gzip_page
+
+from .models import Game, Tournament, Team, Match, School, Player
+from .pagination import CursorPaginator
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class ApiError(Exception):
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+class Include:
+    """A related resource that can be embedded with ``include=``.
+
+    ``attname`` is the foreign key column linking the two: on the listed
+    model for a forward relation, or on ``kind``'s model for a reverse
+    one, which embeds a list of ids instead of a single id.
+    """
+
+    def __init__(self, kind, attname, reverse=False):
+        self.kind = kind
+        self.attname = attname
+        self.reverse = reverse
+
+
+class Resource:
+    """The fields of one model exposed by the API.
+
+    ``fields`` maps each output name to a values() path, which may reach
+    through foreign keys; only the requested paths are selected. The
+    ``optional`` fields are left out unless asked for by name.
+    """
+
+    def __init__(self, model, fields, includes=None, optional=()):
+        self.model = model
+        self.fields = fields
+        self.includes = includes or {}
+        self.optional = optional
+
+    @property
+    def permission(self):
+        return '{}.view_{}'.format(self.model._meta.app_label, self.model._meta.model_name)
+
+    def queryset(self, names, extra=()):
+        paths = {self.fields[name] for name in names} | {self.fields['id']} | set(extra)
+        return self.model.objects.order_by().values(*paths)
+
+    def serialize(self, row, names):
+        return {name: row[self.fields[name]] for name in names}
+
+
+RESOURCES = {
+    'game': Resource(
+        Game,
+        {
+            'id': 'game_id',
+            'game_name': 'game_name',
+            'genre': 'genre',
+            'website': 'website',
+            'developer': 'developer',
+            'developer_website': 'developer_website',
+            'updated_at': 'updated_at',
+        },
+        {'tournaments': Include('tournament', 'game_id', reverse=True)},
+    ),
+    'tournament': Resource(
+        Tournament,
+        {
+            'id': 'tournament_id',
+            'tournament_name': 'tournament_name',
+            'start_date': 'start_date',
+            'end_date': 'end_date',
+            'year': 'year__year',
+            'period': 'period__period_name',
+            'game': 'game_id',
+            'updated_at': 'updated_at',
+        },
+        {
+            'game': Include('game', 'game_id'),
+            'teams': Include('team', 'tournament_id', reverse=True),
+            'matches': Include('match', 'tournament_id', reverse=True),
+        },
+    ),
+    'team': Resource(
+        Team,
+        {
+            'id': 'team_id',
+            'team_name': 'team_name',
+            'acronym': 'acronym',
+            'tournament': 'tournament_id',
+            'position': 'position__position_name',
+            'updated_at': 'updated_at',
+        },
+        {
+            'tournament': Include('tournament', 'tournament_id'),
+            'players': Include('player', 'team_id', reverse=True),
+        },
+    ),
+    'match': Resource(
+        Match,
+        {
+            'id': 'match_id',
+            'match_type': 'match_type',
+            'match_time': 'match_time',
+            'duration': 'duration',
+            'tournament': 'tournament_id',
+            'team_a': 'team_a_id',
+            'team_b': 'team_b_id',
+            'score_a': 'score_a',
+            'score_b': 'score_b',
+            'match_detail': 'report__detail',
+            'video_link': 'video_link',
+            'updated_at': 'updated_at',
+        },
+        {
+            'tournament': Include('tournament', 'tournament_id'),
+            'team_a': Include('team', 'team_a_id'),
+            'team_b': Include('team', 'team_b_id'),
+        },
+        # the report is a join and long text, kept out of plain match lists
+        optional=('match_detail',),
+    ),
+    'school': Resource(
+        School,
+        {
+            'id': 'school_id',
+            'school_name': 'school_name',
+            'city': 'city',
+            'state': 'state',
+            'updated_at': 'updated_at',
+        },
+        {'players': Include('player', 'school_id', reverse=True)},
+    ),
+    'player': Resource(
+        Player,
+        {
+            'id': 'player_id',
+            'player_name': 'player_name',
+            'gamer_tag': 'gamer_tag',
+            'email': 'email',
+            'phone_number': 'phone_number',
+            'school': 'school_id',
+            'team': 'team_id',
+            'updated_at': 'updated_at',
+        },
+        {
+            'school': Include('school', 'school_id'),
+            'team': Include('team', 'team_id'),
+        },
+    ),
+}
+
+
+def compress(view):
+    """Compress the response with brotli when installed and accepted, else gzip."""
+    gzipped = gzip_page(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if brotli is None or 'br' not in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+            return gzipped(request, *args, **kwargs)
+        response = view(request, *args, **kwargs)
+        # left alone, as gzip_page would
+        if response.has_header('Content-Encoding') or len(response.content) < 200:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        response.content = brotli.compress(response.content)
+        response['Content-Length'] = str(len(response.content))
+        response['Content-Encoding'] = 'br'
+        return response
+    return wrapper
+
+
+@method_decorator(compress, name='dispatch')
+class ApiView(View):
+    max_page_size = 100
+    page_size = 25
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            self.resource = RESOURCES.get(kwargs['kind'])
+            if self.resource is None:
+                raise ApiError('Unknown resource {!r}.'.format(kwargs['kind']), status=404)
+            if not request.user.is_authenticated:
+                raise ApiError('Authentication required.', status=401)
+            if not request.user.has_perm(self.resource.permission):
+                raise ApiError('Permission denied.', status=403)
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({'errors': [{'detail': error.detail}]}, status=error.status)
+
+    def field_names(self, kind):
+        resource = RESOURCES[kind]
+        param = 'fields' if kind == self.kwargs['kind'] else 'fields[{}]'.format(kind)
+        requested = [name for name in self.request.GET.get(param, '').split(',') if name]
+        unknown = set(requested) - set(resource.fields)
+        if unknown:
+            raise ApiError('Unknown {} fields: {}.'.format(kind, ', '.join(sorted(unknown))))
+        if not requested:
+            return [name for name in resource.fields if name not in resource.optional]
+        return ['id'] + [name for name in requested if name != 'id']
+
+    def get_includes(self):
+        names = [name for name in self.request.GET.get('include', '').split(',') if name]
+        unknown = set(names) - set(self.resource.includes)
+        if unknown:
+            raise ApiError('Cannot include {}.'.format(', '.join(sorted(unknown))))
+        includes = {name: self.resource.includes[name] for name in names}
+        for include in includes.values():
+            if not self.request.user.has_perm(RESOURCES[include.kind].permission):
+                raise ApiError('Permission denied to include {}.'.format(include.kind), status=403)
+        return includes
+
+    def get_queryset(self, names, includes):
+        return self.resource.queryset(names, extra=[
+            include.attname for include in includes.values() if not include.reverse
+        ])
+
+    def build(self, rows, names, includes):
+        """Serialize ``rows`` and fetch their includes with one query per include."""
+        data = [self.resource.serialize(row, names) for row in rows]
+        included = {}
+        for name, include in includes.items():
+            target = RESOURCES[include.kind]
+            target_names = self.field_names(include.kind)
+            objects = included.setdefault(include.kind, {})
+            if include.reverse:
+                ids = [item['id'] for item in data]
+                related = target.queryset(target_names, extra=[include.attname]).filter(
+                    **{include.attname + '__in': ids}
+                ).order_by(target.fields['id'])
+                grouped = {pk: [] for pk in ids}
+                for row in related:
+                    obj = target.serialize(row, target_names)
+                    objects[obj['id']] = obj
+                    grouped[row[include.attname]].append(obj['id'])
+                for item in data:
+                    item[name] = grouped[item['id']]
+            else:
+                ids = {row[include.attname] for row in rows} - {None}
+                for row in target.queryset(target_names).filter(pk__in=ids):
+                    obj = target.serialize(row, target_names)
+                    objects[obj['id']] = obj
+                for item, row in zip(data, rows):
+                    item[name] = row[include.attname]
+        return data, {kind: list(objects.values()) for kind, objects in included.items()}
+
+
+class ApiList(ApiView):
+    cursor_kwarg = 'cursor'
+
+    def get_page_size(self):
+        try:
+            page_size = int(self.request.GET.get('page_size', self.page_size))
+        except ValueError:
+            raise ApiError('page_size must be a number.')
+        return max(1, min(page_size, self.max_page_size))
+
+    def link(self, cursor):
+        if cursor is None:
+            return None
+        params = self.request.GET.copy()
+        params[self.cursor_kwarg] = cursor
+        return '{}?{}'.format(self.request.path, params.urlencode())
+
+    def get(self, request, kind):
+        names = self.field_names(kind)
+        includes = self.get_includes()
+        paginator = CursorPaginator(
+            self.get_queryset(names, includes), self.get_page_size(), ordering=['pk']
+        )
+        page = paginator.page(request.GET.get(self.cursor_kwarg))
+        data, included = self.build(page.object_list, names, includes)
+        return JsonResponse({
+            'data': data,
+            'included': included,
+            'links': {
+                'next': self.link(page.next_cursor),
+                'prev': self.link(page.previous_cursor),
+            },
+        })
+
+
+class ApiDetail(ApiView):
+
+    def get(self, request, kind, pk):
+        names = self.field_names(kind)
+        includes = self.get_includes()
+        rows = list(self.get_queryset(names, includes).filter(pk=pk))
+        if not rows:
+            raise ApiError('Not found.', status=404)
+        data, included = self.build(rows, names, includes)
+        return JsonResponse({'data': data[0], 'included': included})
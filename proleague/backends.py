@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from . import cache as versions
+
+
+PERMISSION_CACHE_TIMEOUT = getattr(settings, 'PROLEAGUE_PERMISSION_CACHE_TIMEOUT', 60 * 60)
+
+
+def _key(kind, user_id):
+    # a user's own version changes with their row, groups and permissions;
+    # the group version with any group's permissions
+    current = versions.get_versions({('user', user_id), ('group', versions.ANY)})
+    return 'proleague:{}:{}:{}:{}'.format(
+        kind, user_id, current['user', user_id], current['group', versions.ANY]
+    )
+
+
+def invalidate_user(user_id):
+    versions.bump_version('user', user_id)
+
+
+def invalidate_all_users():
+    versions.bump_model_version('group')
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend that keeps users and their permission sets in the cache.
+
+    Every view checks permissions and base.html checks several more, so
+    without this each request loads the user and then queries the user and
+    group permission tables. Entries are keyed on version tokens that the
+    signals bump when a user, their groups or a group's permissions
+    change.
+    """
+
+    def get_user(self, user_id):
+        key = _key('user', user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, PERMISSION_CACHE_TIMEOUT)
+        return user
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, '_perm_cache'):
+            key = _key('permissions', user_obj.pk)
+            permissions = cache.get(key)
+            if permissions is None:
+                permissions = super().get_all_permissions(user_obj)
+                cache.set(key, permissions, PERMISSION_CACHE_TIMEOUT)
+            user_obj._perm_cache = permissions
+        return user_obj._perm_cache
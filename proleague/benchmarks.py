@@ -0,0 +1,168 @@
+import gc
+import json
+import math
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .forms import TournamentForm, GameForm, TeamForm, MatchForm, SchoolForm, PlayerForm
+from .models import Tournament, Game, Team, Match, School, Player
+
+
+# url name prefix -> (model, form, search parameter)
+KINDS = {
+    'tournament': (Tournament, TournamentForm, None),
+    'game': (Game, GameForm, None),
+    'team': (Team, TeamForm, 'team_search'),
+    'match': (Match, MatchForm, 'match_search'),
+    'school': (School, SchoolForm, None),
+    'player': (Player, PlayerForm, 'player_search'),
+}
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def _url(kind, action, *args):
+    return reverse('proleague_{}_{}_urlpattern'.format(kind, action), args=args)
+
+
+def form_data(form, suffix=''):
+    """Return POST data resubmitting ``form``'s initial values.
+
+    ``suffix`` is appended to every free-text value, which is enough to
+    keep a copy clear of the unique constraints.
+    """
+    data = {}
+    for name, field in form.fields.items():
+        value = form[name].value()
+        if value is None or value is False:
+            continue
+        if suffix and isinstance(value, str) and not hasattr(field, 'choices'):
+            value = (value + suffix)[-field.max_length:] if field.max_length else value + suffix
+        data[name] = value
+    return data
+
+
+def scenarios():
+    """Return label -> callable(iteration) giving (method, url, data)."""
+    found = {}
+    for kind, (model, form_class, search_kwarg) in KINDS.items():
+        # the newest row, so that scales stack up behind it
+        sample = model.objects.order_by('-pk').first()
+        if sample is None:
+            raise BenchmarkError('There are no {} rows to benchmark.'.format(kind))
+        found['{}_list'.format(kind)] = lambda n, kind=kind: ('get', _url(kind, 'list'), None)
+        found['{}_detail'.format(kind)] = lambda n, kind=kind, pk=sample.pk: (
+            'get', _url(kind, 'detail', pk), None
+        )
+        found['{}_create_form'.format(kind)] = lambda n, kind=kind: ('get', _url(kind, 'create'), None)
+        found['{}_create'.format(kind)] = lambda n, kind=kind, form_class=form_class, sample=sample: (
+            'post', _url(kind, 'create'), form_data(form_class(instance=sample), ' bench {}'.format(n))
+        )
+        found['{}_update_form'.format(kind)] = lambda n, kind=kind, pk=sample.pk: (
+            'get', _url(kind, 'update', pk), None
+        )
+        found['{}_update'.format(kind)] = lambda n, kind=kind, form_class=form_class, sample=sample: (
+            'post', _url(kind, 'update', sample.pk), form_data(form_class(instance=sample))
+        )
+        if search_kwarg:
+            keyword = str(sample).split()[0]
+            found['{}_search'.format(kind)] = lambda n, kind=kind, kwarg=search_kwarg, keyword=keyword: (
+                'get', _url(kind, 'search'), {kwarg: keyword}
+            )
+    keyword = str(Team.objects.order_by('-pk').first()).split()[0]
+    found['global_search'] = lambda n: ('get', reverse('proleague_search_urlpattern'), {'q': keyword})
+    return found
+
+
+def percentile(values, q):
+    """The q-quantile of ``values`` by linear interpolation."""
+    values = sorted(values)
+    rank = (len(values) - 1) * q
+    lower = math.floor(rank)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+
+def run(user, repeat=10, only=None):
+    """Request every scenario ``repeat`` times with an empty cache.
+
+    Returns label -> {'p50_ms', 'p95_ms', 'queries'}, where queries is the
+    most any one request ran.
+    """
+    client = Client()
+    client.force_login(user)
+    results = {}
+    for label, request in scenarios().items():
+        if only and label not in only:
+            continue
+        timings, queries = [], 0
+        for n in range(repeat):
+            method, url, data = request(n)
+            # measure the pages as rendered, not as served from the page cache
+            cache.clear()
+            client.force_login(user)
+            # keep collections of earlier garbage out of the timings
+            gc.collect()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = getattr(client, method)(url, data)
+                timings.append((time.perf_counter() - started) * 1000)
+            expected = 302 if method == 'post' else 200
+            if response.status_code != expected:
+                errors = response.context and response.context.get('form') and response.context['form'].errors
+                raise BenchmarkError('{} answered {} {}'.format(label, response.status_code, errors or ''))
+            queries = max(queries, len(captured))
+        results[label] = {
+            'p50_ms': round(percentile(timings, 0.5), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'queries': queries,
+        }
+    return results
+
+
+def compare(results, baseline, tolerance=1.0, min_ms=10):
+    """Return {'queries': [...], 'latency': [...]} messages for the scenarios that regressed.
+
+    A query count over the baseline's is the same on any machine. Latency
+    counts once p50 exceeds the baseline's by both ``tolerance`` (a
+    fraction) and ``min_ms``, but a baseline from another machine, or a
+    busy one, can fail it at random. p95 is only reported: with a handful
+    of requests it is the slowest one.
+    """
+    regressions = {'queries': [], 'latency': []}
+    for scale, scenarios_run in sorted(results.items()):
+        for label, result in sorted(scenarios_run.items()):
+            expected = baseline.get(scale, {}).get(label)
+            if expected is None:
+                continue
+            if result['queries'] > expected['queries']:
+                regressions['queries'].append('scale {} {}: {} queries, baseline {}'.format(
+                    scale, label, result['queries'], expected['queries']
+                ))
+            limit = max(expected['p50_ms'] * (1 + tolerance), expected['p50_ms'] + min_ms)
+            if result['p50_ms'] > limit:
+                regressions['latency'].append('scale {} {}: p50 {:.1f} ms, baseline {:.1f} ms'.format(
+                    scale, label, result['p50_ms'], expected['p50_ms']
+                ))
+    return regressions
+
+
+def load_baseline(path):
+    try:
+        with open(path) as baseline:
+            return json.load(baseline)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, results):
+    with open(path, 'w') as baseline:
+        json.dump(results, baseline, indent=2, sort_keys=True)
+        baseline.write('\n')
@@ -0,0 +1,136 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.utils.connection import ConnectionProxy
+
+
+ROW_CACHE_TIMEOUT = getattr(settings, 'PROLEAGUE_ROW_CACHE_TIMEOUT', 60 * 60)
+PAGE_CACHE_TIMEOUT = getattr(settings, 'PROLEAGUE_PAGE_CACHE_TIMEOUT', 5 * 60)
+
+# Version tokens are what a change in one worker tells the others through,
+# so they live in a cache every worker shares. What they key (pages,
+# rows, permission sets) may stay in the per-process default cache: a
+# worker never reads it again once the token has moved on.
+VERSION_CACHE = getattr(settings, 'PROLEAGUE_VERSION_CACHE', 'default')
+version_cache = ConnectionProxy(caches, VERSION_CACHE)
+
+# model_name -> (foreign key attname, related model_name) pairs whose
+# __str__ is part of that model's rendered row
+ROW_DEPENDENCIES = {
+    'match': (
+        ('tournament_id', 'tournament'),
+        ('team_a_id', 'team'),
+        ('team_b_id', 'team'),
+    ),
+}
+
+HITS_KEY = 'proleague:row_cache:hits'
+MISSES_KEY = 'proleague:row_cache:misses'
+
+
+# stands for "any object" of a model in version keys
+ANY = '*'
+
+
+def _version_key(model_name, pk):
+    return 'proleague:version:{}:{}'.format(model_name, pk)
+
+
+def bump_version(model_name, pk):
+    """Invalidate every cached fragment or page that shows this object."""
+    version_cache.set_many({
+        _version_key(model_name, pk): uuid.uuid4().hex,
+        _version_key(model_name, ANY): uuid.uuid4().hex,
+    }, None)
+
+
+def bump_model_version(model_name):
+    version_cache.set(_version_key(model_name, ANY), uuid.uuid4().hex, None)
+
+
+def get_versions(objects):
+    """Map (model_name, pk) to the current version token of each pair.
+
+    Versions are random tokens rather than counters, so an evicted version
+    is replaced by a fresh token and can never revive a stale fragment.
+    """
+    keys = {_version_key(model_name, pk): (model_name, pk) for model_name, pk in objects}
+    versions = version_cache.get_many(list(keys))
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        version_cache.set_many(missing, None)
+        versions.update(missing)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def _row_dependencies(obj):
+    model_name = obj._meta.model_name
+    yield model_name, obj.pk
+    for attname, related in ROW_DEPENDENCIES.get(model_name, ()):
+        yield related, getattr(obj, attname)
+
+
+def page_key(path, permissions, model_names):
+    """Key a rendered page on its URL, a permission set and its models.
+
+    The key changes whenever any object of ``model_names`` is saved or
+    deleted, so a stale page is never served.
+    """
+    versions = get_versions({(model_name, ANY) for model_name in model_names})
+    digest = hashlib.md5('|'.join(
+        [path, ','.join(sorted(permissions))]
+        + ['{}.{}'.format(name, versions[name, ANY]) for name in sorted(model_names)]
+    ).encode()).hexdigest()
+    return 'proleague:page:{}'.format(digest)
+
+
+def get_page(key):
+    return cache.get(key)
+
+
+def set_page(key, page, timeout=PAGE_CACHE_TIMEOUT):
+    cache.set(key, page, timeout)
+
+
+def row_keys(fragment_name, objects):
+    dependencies = [list(_row_dependencies(obj)) for obj in objects]
+    versions = get_versions({pair for pairs in dependencies for pair in pairs})
+    keys = []
+    for obj, pairs in zip(objects, dependencies):
+        digest = hashlib.md5(
+            ':'.join('{}.{}.{}'.format(name, pk, versions[name, pk]) for name, pk in pairs).encode()
+        ).hexdigest()
+        keys.append('proleague:row:{}:{}:{}:{}'.format(
+            fragment_name, obj._meta.model_name, obj.pk, digest
+        ))
+    return keys
+
+
+def get_rows(keys):
+    return cache.get_many(keys)
+
+
+def set_rows(fragments, hits):
+    if fragments:
+        cache.set_many(fragments, ROW_CACHE_TIMEOUT)
+    _count(HITS_KEY, hits)
+    _count(MISSES_KEY, len(fragments))
+
+
+def _count(key, amount):
+    if amount:
+        if not cache.add(key, amount, None):
+            try:
+                cache.incr(key, amount)
+            except ValueError:
+                cache.set(key, amount, None)
+
+
+def row_cache_stats():
+    stats = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {
+        'hits': stats.get(HITS_KEY, 0),
+        'misses': stats.get(MISSES_KEY, 0),
+    }
@@ -0,0 +1,22 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+from .cache import VERSION_CACHE
+
+
+@register(Tags.caches)
+def check_version_cache(app_configs, **kwargs):
+    if isinstance(caches[VERSION_CACHE], LocMemCache):
+        return [Warning(
+            'The {!r} cache that proleague keeps its version tokens in is local to each process.'.format(
+                VERSION_CACHE
+            ),
+            hint=(
+                'Changes, revoked permissions included, only reach the other workers once their '
+                'cached entries expire. Set PROLEAGUE_VERSION_CACHE to a cache every worker shares, '
+                'such as the file, database, memcached or redis backends.'
+            ),
+            id='proleague.W001',
+        )]
+    return []
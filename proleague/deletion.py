@@ -0,0 +1,220 @@
+from collections import Counter
+from itertools import islice
+
+from django.apps import apps
+from django.core import serializers
+from django.db import connections, transaction
+from django.db.models import CASCADE, PROTECT, Exists, OuterRef, Q
+
+from . import cache, search
+
+
+SAMPLE_SIZE = 10
+BATCH_SIZE = 500
+
+
+class Blocker:
+    """The rows of one protected relation that stop a delete."""
+
+    def __init__(self, name, count, sample):
+        self.name = name
+        self.count = count
+        self.sample = sample
+
+    def __repr__(self):
+        return '<Blocker {}: {}>'.format(self.name, self.count)
+
+    @property
+    def remaining(self):
+        return self.count - len(self.sample)
+
+
+def dependents(model, follow=(CASCADE,), path=None, seen=()):
+    """Yield (model, lookup, on_delete) for each relation pointing at ``model``.
+
+    Relations whose on_delete is in ``follow`` are followed, so that rows
+    that would go along with a delete are checked too; ``follow=None``
+    follows every relation. ``lookup`` reaches from the dependent model
+    to the pk of ``model``.
+    """
+    for rel in model._meta.get_fields(include_hidden=True):
+        # reverse foreign keys, including those with related_name='+'
+        if not (rel.auto_created and not rel.concrete and (rel.one_to_many or rel.one_to_one)):
+            continue
+        lookup = rel.field.name if path is None else '{}__{}'.format(rel.field.name, path)
+        yield rel.related_model, lookup, rel.on_delete
+        if (follow is None or rel.on_delete in follow) and rel.related_model not in seen:
+            yield from dependents(rel.related_model, follow, lookup, seen + (model,))
+
+
+def preflight(obj, sample_size=SAMPLE_SIZE):
+    """Return the Blockers that would make deleting ``obj`` fail, if any.
+
+    One query asks EXISTS of every protected relation at once; only the
+    relations that do block are counted and sampled.
+    """
+    model = type(obj)
+    protected = [
+        (related, lookup) for related, lookup, on_delete in dependents(model) if on_delete is PROTECT
+    ]
+    if not protected:
+        return []
+    flags = model._base_manager.filter(pk=obj.pk).annotate(**{
+        'blocked_{}'.format(index): Exists(related._base_manager.filter(**{lookup: OuterRef('pk')}))
+        for index, (related, lookup) in enumerate(protected)
+    }).values_list(*['blocked_{}'.format(index) for index in range(len(protected))]).first() or ()
+    # name the field too when one model blocks through several
+    relations = Counter(related for related, lookup in protected)
+    blockers = []
+    for blocked, (related, lookup) in zip(flags, protected):
+        if not blocked:
+            continue
+        name = related._meta.verbose_name_plural
+        if relations[related] > 1:
+            name = '{} ({})'.format(name, lookup.replace('__', ' of ').replace('_', ' '))
+        rows = related._default_manager.filter(**{lookup: obj.pk})
+        if hasattr(rows, 'for_display'):
+            rows = rows.for_display()
+        blockers.append(Blocker(name, rows.count(), list(rows[:sample_size])))
+    return blockers
+
+
+def _parents_first(models):
+    order = []
+    while len(order) < len(models):
+        for model in models:
+            parents = {
+                field.related_model for field in model._meta.concrete_fields
+                if field.is_relation and field.related_model is not model
+            }
+            if model not in order and not (parents & set(models)) - set(order):
+                order.append(model)
+                break
+        else:
+            raise ValueError('The relations of {} form a cycle.'.format(', '.join(
+                model._meta.label for model in models if model not in order
+            )))
+    return order
+
+
+def cascade(queryset):
+    """Map ``queryset``'s model and every model depending on it to the rows involved.
+
+    Every relation counts, protected or not. Models come parents first,
+    so deleting them in reverse order never strands a row.
+    """
+    roots = queryset.values('pk')
+    found = {queryset.model: Q(pk__in=roots)}
+    for related, lookup, on_delete in dependents(queryset.model, follow=None):
+        condition = Q(**{'{}__in'.format(lookup): roots})
+        found[related] = found[related] | condition if related in found else condition
+    return {
+        model: model._base_manager.using(queryset.db).filter(found[model])
+        for model in _parents_first(list(found))
+    }
+
+
+def referenced(rows):
+    """Map each model that ``rows`` (from cascade()) point at, but that isn't among them, to the rows pointed at."""
+    using = next(iter(rows.values())).db
+    found = {}
+    pending = list(rows.items())
+    while pending:
+        model, dependent = pending.pop()
+        for field in model._meta.concrete_fields:
+            parent = field.related_model
+            if not field.is_relation or parent is model or parent in rows:
+                continue
+            condition = Q(pk__in=dependent.values(field.attname))
+            found[parent] = found[parent] | condition if parent in found else condition
+            pending.append((parent, parent._base_manager.using(using).filter(condition)))
+    return {
+        model: model._base_manager.using(using).filter(found[model])
+        for model in _parents_first(list(found))
+    }
+
+
+def _delete(rows):
+    """Delete the rows from cascade() with one DELETE statement per model, children first.
+
+    QuerySet.delete() would collect the rows again and send pre_delete and
+    post_delete per row. cascade() has already found every dependent row,
+    so the statements skip both; the callers refresh the search documents
+    and cached pages those signals keep current.
+    """
+    for model, dependent in reversed(list(rows.items())):
+        search.remove_documents(model, dependent.values('pk'))
+        connection = connections[dependent.db]
+        sql, params = dependent.values('pk').query.get_compiler(connection=connection).as_sql()
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM {} WHERE {} IN ({})'.format(
+                connection.ops.quote_name(model._meta.db_table),
+                connection.ops.quote_name(model._meta.pk.column),
+                sql,
+            ), params)
+
+
+def _bump(counts):
+    for label, count in counts.items():
+        if count:
+            cache.bump_model_version(apps.get_model(label)._meta.model_name)
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+def archive(queryset, stream):
+    """Write ``queryset`` and everything depending on it to ``stream``, then delete it all.
+
+    The archive uses the jsonl serialization format, so loaddata can
+    restore it. Each model is written with one query and deleted with
+    one statement, without the per-row signals of QuerySet.delete();
+    search documents and cached pages are refreshed per model instead.
+    Returns the number of rows archived per model label.
+    """
+    archived = {}
+    with transaction.atomic(using=queryset.db):
+        rows = cascade(queryset)
+        for model, dependent in rows.items():
+            archived[model._meta.label] = dependent.count()
+            serializers.serialize('jsonl', dependent.order_by('pk').iterator(), stream=stream)
+        _delete(rows)
+    _bump(archived)
+    return archived
+
+
+def move(queryset, using, batch_size=BATCH_SIZE):
+    """Move ``queryset`` and everything depending on it to the database ``using``.
+
+    The rows are inserted there in batches, keeping their pks, and then
+    deleted like archive() does. The rows they point at but that stay
+    behind, such as games and schools, are copied along or refreshed so
+    the moved rows keep valid foreign keys. Returns the number of rows
+    moved per model label.
+    """
+    moved = {}
+    # the target commits first, so a failure leaves rows in both databases
+    # rather than in neither
+    with transaction.atomic(using=queryset.db), transaction.atomic(using=using):
+        rows = cascade(queryset)
+        for model, parents in referenced(rows).items():
+            target = model._base_manager.using(using)
+            fields = [field.attname for field in model._meta.concrete_fields if not field.primary_key]
+            objects = list(parents)
+            existing = set(target.filter(pk__in=[obj.pk for obj in objects]).values_list('pk', flat=True))
+            target.bulk_create([obj for obj in objects if obj.pk not in existing], batch_size=batch_size)
+            target.bulk_update([obj for obj in objects if obj.pk in existing], fields, batch_size=batch_size)
+        for model, dependent in rows.items():
+            moved[model._meta.label] = 0
+            target = model._base_manager.using(using)
+            for batch in _batches(dependent.order_by('pk').iterator(), batch_size):
+                target.bulk_create(batch)
+                moved[model._meta.label] += len(batch)
+        _delete(rows)
+    _bump(moved)
+    return moved
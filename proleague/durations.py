@@ -0,0 +1,55 @@
+import datetime
+import re
+
+from django.utils.dateparse import parse_duration as parse_standard_duration
+
+
+UNITS = {
+    'd': 'days', 'day': 'days', 'days': 'days',
+    'h': 'hours', 'hr': 'hours', 'hrs': 'hours', 'hour': 'hours', 'hours': 'hours',
+    'm': 'minutes', 'min': 'minutes', 'mins': 'minutes', 'minute': 'minutes', 'minutes': 'minutes',
+    's': 'seconds', 'sec': 'seconds', 'secs': 'seconds', 'second': 'seconds', 'seconds': 'seconds',
+}
+
+UNIT_RE = re.compile(r'(\d+(?:\.\d+)?)\s*([a-z]+)[\s,]*', re.IGNORECASE)
+
+
+def parse_duration(value):
+    """Parse a match duration the way people type them, or return None.
+
+    Accepts "35:12" (minutes and seconds, as match durations were always
+    entered), "1:02:03", units such as "1h 2m" or "45 min", a bare number
+    of minutes, and anything Django's parse_duration reads, such as ISO
+    8601. Negative durations are rejected.
+    """
+    if isinstance(value, datetime.timedelta):
+        return value
+    value = str(value).strip()
+    if not value:
+        return None
+    if re.fullmatch(r'\d+(\.\d+)?', value):
+        return datetime.timedelta(minutes=float(value))
+    parts = UNIT_RE.findall(value)
+    if parts and ''.join(UNIT_RE.sub('', value).split()) == '':
+        if any(unit.lower() not in UNITS for number, unit in parts):
+            return None
+        duration = datetime.timedelta()
+        for number, unit in parts:
+            duration += datetime.timedelta(**{UNITS[unit.lower()]: float(number)})
+        return duration
+    duration = parse_standard_duration(value)
+    if duration is None or duration < datetime.timedelta():
+        return None
+    return duration
+
+
+def format_duration(value):
+    """Format a duration as "35:12", or "1:02:03" once it reaches an hour."""
+    if value is None:
+        return ''
+    seconds = int(value.total_seconds())
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if hours:
+        return '{}:{:02}:{:02}'.format(hours, minutes, seconds)
+    return '{:02}:{:02}'.format(minutes, seconds)
@@ -0,0 +1,137 @@
+import csv
+import json
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Team, Match, Player
+
+
+# model_name -> (model, path to its tournament, (column, values_list path) pairs);
+# the columns name related objects the way import_league expects them
+EXPORTS = {
+    'team': (
+        Team,
+        'tournament',
+        (
+            ('id', 'team_id'),
+            ('team_name', 'team_name'),
+            ('acronym', 'acronym'),
+            ('year', 'tournament__year__year'),
+            ('period', 'tournament__period__period_name'),
+            ('tournament', 'tournament__tournament_name'),
+            ('game', 'tournament__game__game_name'),
+            ('position', 'position__position_name'),
+        ),
+    ),
+    'player': (
+        Player,
+        'team__tournament',
+        (
+            ('id', 'player_id'),
+            ('player_name', 'player_name'),
+            ('gamer_tag', 'gamer_tag'),
+            ('email', 'email'),
+            ('phone_number', 'phone_number'),
+            ('school', 'school__school_name'),
+            ('team', 'team__acronym'),
+        ),
+    ),
+    'match': (
+        Match,
+        'tournament',
+        (
+            ('id', 'match_id'),
+            ('match_type', 'match_type'),
+            ('match_time', 'match_time'),
+            ('duration', 'duration'),
+            ('score_a', 'score_a'),
+            ('score_b', 'score_b'),
+            ('team_a', 'team_a__acronym'),
+            ('team_b', 'team_b__acronym'),
+            ('year', 'tournament__year__year'),
+            ('period', 'tournament__period__period_name'),
+            ('tournament', 'tournament__tournament_name'),
+            ('game', 'tournament__game__game_name'),
+            ('match_detail', 'report__detail'),
+            ('video_link', 'video_link'),
+        ),
+    ),
+}
+
+# filter name -> lookup below the exported model's tournament
+FILTERS = {
+    'year': 'year__year',
+    'period': 'period__period_name',
+    'game': 'game__game_name',
+    'tournament': 'pk',
+}
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'columnar': ('application/x-ndjson', 'columns.jsonl'),
+}
+
+
+def columns(kind):
+    return [column for column, path in EXPORTS[kind][2]]
+
+
+def export_rows(kind, filters=None, chunk_size=2000):
+    """Yield a tuple per exported row, reading ``chunk_size`` rows at a time.
+
+    ``filters`` maps names from FILTERS to the value to match; blank
+    values are ignored.
+    """
+    model, tournament, fields = EXPORTS[kind]
+    queryset = model.objects.all()
+    for name, value in (filters or {}).items():
+        if value not in (None, ''):
+            queryset = queryset.filter(**{'{}__{}'.format(tournament, FILTERS[name]): value})
+    return queryset.order_by('pk').values_list(
+        *[path for column, path in fields]
+    ).iterator(chunk_size=chunk_size)
+
+
+class Echo:
+    """A file-like object whose write() hands back what it's given."""
+
+    def write(self, value):
+        return value
+
+
+def write_csv(kind, rows, chunk_size=2000):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns(kind))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_jsonl(kind, rows, chunk_size=2000):
+    names = columns(kind)
+    for row in rows:
+        yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def write_columnar(kind, rows, chunk_size=2000):
+    """Write a schema line, then each ``chunk_size`` rows as one line of columns."""
+    names = columns(kind)
+    yield json.dumps({'columns': names}) + '\n'
+    group = list(islice(rows, chunk_size))
+    while group:
+        yield json.dumps(dict(zip(names, map(list, zip(*group)))), cls=DjangoJSONEncoder) + '\n'
+        group = list(islice(rows, chunk_size))
+
+
+WRITERS = {
+    'csv': write_csv,
+    'jsonl': write_jsonl,
+    'columnar': write_columnar,
+}
+
+
+def export(kind, file_format, filters=None, chunk_size=2000):
+    """Yield the export of ``kind`` as strings, without holding more than a chunk."""
+    rows = export_rows(kind, filters, chunk_size=chunk_size)
+    return WRITERS[file_format](kind, rows, chunk_size=chunk_size)
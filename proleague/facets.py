@@ -0,0 +1,192 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from . import cache as versions
+from .models import School, Tournament
+
+
+FACET_CACHE_TIMEOUT = getattr(settings, 'PROLEAGUE_FACET_CACHE_TIMEOUT', 60 * 60)
+
+
+class Facet:
+    """One dimension a list can be narrowed by, such as the game of its tournament.
+
+    ``field`` and ``title`` are lookups on the model of the facet's Source;
+    ``order`` orders the values, which are limited to ``limit`` (the most
+    frequent first) when that is given.
+    """
+
+    def __init__(self, name, label, field, title, order=None, limit=None, to_python=int):
+        self.name = name
+        self.label = label
+        self.field = field
+        self.title = title
+        self.order = order or title
+        self.limit = limit
+        self.to_python = to_python
+
+    def selected(self, query):
+        values = []
+        for value in query.getlist(self.name):
+            try:
+                values.append(self.to_python(value))
+            except ValueError:
+                pass
+        return values
+
+
+class Source:
+    """Facets that read one model, reached from the list's model through ``relation``.
+
+    All of a source's selections become one ``relation IN (subquery)``
+    filter, so the list is narrowed through the index on its foreign key
+    rather than by joining every row.
+    """
+
+    def __init__(self, relation, model, facets):
+        self.relation = relation
+        self.model = model
+        self.facets = facets
+
+    def filter(self, queryset, selection):
+        narrowed = {
+            '{}__in'.format(facet.field): selection[facet.name]
+            for facet in self.facets
+            if selection[facet.name]
+        }
+        if not narrowed:
+            return queryset
+        return queryset.filter(**{
+            '{}__in'.format(self.relation): self.model._base_manager.filter(**narrowed).values('pk')
+        })
+
+    def path(self, lookup):
+        return self.relation if lookup == 'pk' else '{}__{}'.format(self.relation, lookup)
+
+    def paths(self):
+        paths = []
+        for facet in self.facets:
+            for lookup in (facet.field, facet.title, facet.order):
+                if self.path(lookup) not in paths:
+                    paths.append(self.path(lookup))
+        return paths
+
+
+class FacetSet:
+    """The facets of a list, with counts for the values of each.
+
+    Each source is counted with one grouped query over the list narrowed
+    by the other sources, and each of its facets sums those groups over
+    the ones its sibling facets select, so a selected value still shows
+    the counts of its alternatives. Counts are cached per filter
+    combination until any object of ``cache_models`` changes.
+    """
+
+    def __init__(self, sources, cache_models):
+        self.sources = sources
+        self.cache_models = cache_models
+
+    def __iter__(self):
+        for source in self.sources:
+            for facet in source.facets:
+                yield source, facet
+
+    def selection(self, query):
+        return {facet.name: facet.selected(query) for source, facet in self}
+
+    def filter(self, queryset, selection, exclude=None):
+        """Narrow ``queryset`` by the selections of every source but ``exclude``."""
+        for source in self.sources:
+            if source is not exclude:
+                queryset = source.filter(queryset, selection)
+        return queryset
+
+    def _key(self, queryset, selection):
+        current = versions.get_versions({(model_name, versions.ANY) for model_name in self.cache_models})
+        digest = hashlib.md5('|'.join(
+            [str(queryset.order_by().query), repr(sorted(selection.items()))]
+            + ['{}.{}'.format(name, current[name, versions.ANY]) for name in sorted(self.cache_models)]
+        ).encode()).hexdigest()
+        return 'proleague:facets:{}:{}'.format(queryset.model._meta.model_name, digest)
+
+    def _groups(self, queryset, selection, source, summary):
+        if summary is not None:
+            return self.filter(summary, selection, exclude=source).values(*source.paths(), 'count')
+        return self.filter(queryset, selection, exclude=source).order_by().values(*source.paths()).annotate(
+            count=Count('pk')
+        )
+
+    def _values(self, groups, selection, source, facet):
+        value, title, order = source.path(facet.field), source.path(facet.title), source.path(facet.order)
+        siblings = [
+            (source.path(other.field), set(selection[other.name]))
+            for other in source.facets
+            if other is not facet and selection[other.name]
+        ]
+        totals = {}
+        for group in groups:
+            if group[value] is None or any(group[path] not in selected for path, selected in siblings):
+                continue
+            item = totals.setdefault(group[value], {'value': group[value], 'title': group[title], 'count': 0})
+            item['count'] += group['count']
+            item['order'] = group[order]
+        values = [
+            {'value': item['value'], 'title': item['title'], 'count': item['count']}
+            for item in sorted(totals.values(), key=lambda item: (item['order'], item['value']))
+            if item['count']
+        ]
+        if facet.limit is not None and len(values) > facet.limit:
+            # the most frequent values, and the selected ones whatever their count
+            shown = set(selection[facet.name]) | {
+                item['value'] for item in sorted(values, key=lambda item: -item['count'])[:facet.limit]
+            }
+            values = [item for item in values if item['value'] in shown]
+        return values
+
+    def counts(self, queryset, selection, summary=None):
+        """Return {facet name: [{'value', 'title', 'count'}]} for ``queryset`` before faceting.
+
+        ``summary``, if given, stands in for ``queryset``: a queryset with
+        the same relations as the sources, one row per value of theirs,
+        and the number of rows of ``queryset`` for it in a ``count``
+        column, so the list itself isn't grouped.
+        """
+        key = self._key(queryset if summary is None else summary, selection)
+        counts = cache.get(key)
+        if counts is None:
+            counts = {}
+            for source in self.sources:
+                groups = list(self._groups(queryset, selection, source, summary))
+                for facet in source.facets:
+                    counts[facet.name] = self._values(groups, selection, source, facet)
+            cache.set(key, counts, FACET_CACHE_TIMEOUT)
+        return counts
+
+
+def tournament_facets(relation):
+    return Source(relation, Tournament, [
+        Facet('year', 'Year', 'year', 'year__year'),
+        Facet('period', 'Period', 'period', 'period__period_name', order='period__period_sequence'),
+        Facet('game', 'Game', 'game', 'game__game_name'),
+        Facet('tournament', 'Tournament', 'pk', 'tournament_name', limit=20),
+    ])
+
+
+MATCH_FACETS = FacetSet(
+    [tournament_facets('tournament')],
+    cache_models=('match', 'tournament', 'year', 'period', 'game'),
+)
+
+PLAYER_FACETS = FacetSet(
+    [
+        tournament_facets('team__tournament'),
+        Source('school', School, [
+            Facet('school', 'School', 'pk', 'school_name', limit=20),
+            Facet('state', 'State', 'state', 'state', to_python=str),
+        ]),
+    ],
+    cache_models=('player', 'team', 'tournament', 'year', 'period', 'game', 'school'),
+)
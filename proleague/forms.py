@@ -1,6 +1,12 @@
+import datetime
+import os
+
 from django import forms
+from django.core.exceptions import ValidationError
 
-from .models import Tournament, Match, Player, Team, Game, School
+from .durations import format_duration, parse_duration
+from .importers import IMPORTERS, READERS
+from .models import Tournament, Match, MatchReport, Player, Team, Game, School, Schedule
 
 
 class TournamentForm(forms.ModelForm):
@@ -45,17 +51,75 @@ class TeamForm(forms.ModelForm):
         return self.cleaned_data['acronym'].strip()
 
 
+class LenientDurationField(forms.DurationField):
+    """A duration typed as "35:12", "1h 2m", plain minutes or any Django format."""
+
+    def prepare_value(self, value):
+        if isinstance(value, datetime.timedelta):
+            return format_duration(value)
+        return value
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        duration = parse_duration(value)
+        if duration is None:
+            raise ValidationError(self.error_messages['invalid'], code='invalid')
+        return duration
+
+
 class MatchForm(forms.ModelForm):
+    duration = LenientDurationField(required=False, help_text='For example 35:12 or 1h 2m.')
+    # stored in the match's MatchReport
+    match_detail = forms.CharField(widget=forms.Textarea, required=False)
+
     class Meta:
         model = Match
         fields = '__all__'
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk is not None:
+            self.initial.setdefault('match_detail', MatchReport.objects.filter(
+                match=self.instance
+            ).values_list('detail', flat=True).first() or '')
+
     def clean_match_type(self):
         return self.cleaned_data['match_type'].strip()
 
     def clean_video_link(self):
         return self.cleaned_data['video_link'].strip()
 
+    def save(self, commit=True):
+        match = super().save(commit=commit)
+        if commit:
+            self.save_report()
+        return match
+
+    def save_report(self):
+        detail = self.cleaned_data['match_detail']
+        if detail.strip():
+            MatchReport.objects.update_or_create(match=self.instance, defaults={'detail': detail})
+        else:
+            MatchReport.objects.filter(match=self.instance).delete()
+
+
+class MatchFilterForm(forms.Form):
+    min_duration = LenientDurationField(required=False, label='Lasting at least')
+    max_duration = LenientDurationField(required=False, label='Lasting at most')
+
+    def is_filtering(self):
+        return self.is_valid() and any(value is not None for value in self.cleaned_data.values())
+
+    def filter(self, queryset):
+        if not self.is_valid():
+            return queryset
+        if self.cleaned_data['min_duration'] is not None:
+            queryset = queryset.filter(duration__gte=self.cleaned_data['min_duration'])
+        if self.cleaned_data['max_duration'] is not None:
+            queryset = queryset.filter(duration__lte=self.cleaned_data['max_duration'])
+        return queryset
+
 
 class SchoolForm(forms.ModelForm):
     class Meta:
@@ -88,3 +152,30 @@ class PlayerForm(forms.ModelForm):
 
     def clean_phone_number(self):
         return self.cleaned_data['phone_number'].strip()
+
+
+class ScheduleForm(forms.ModelForm):
+    class Meta:
+        model = Schedule
+        fields = ['format', 'rounds', 'match_length', 'parallel']
+        help_texts = {
+            'rounds': 'Swiss only; leave blank for enough rounds to find a single leader.',
+            'match_length': 'As HH:MM:SS.',
+            'parallel': 'How many matches can run at once; leave blank for no limit.',
+        }
+
+
+class ImportLeagueForm(forms.Form):
+    kind = forms.ChoiceField(choices=[(kind, kind.capitalize()) for kind in IMPORTERS])
+    file = forms.FileField(help_text='A CSV file with a header row, or a JSONL file.')
+    batch_size = forms.IntegerField(min_value=1, initial=1000)
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if self.file_format(upload) not in READERS:
+            raise forms.ValidationError('Upload a .csv or .jsonl file.')
+        return upload
+
+    @staticmethod
+    def file_format(upload):
+        return os.path.splitext(upload.name)[1].lstrip('.').lower()
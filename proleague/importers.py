@@ -0,0 +1,325 @@
+import csv
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import cache, search, standings, stats
+from .durations import parse_duration
+from .models import Period, Year, Position, Game, Tournament, Team, Match, MatchReport, School, Player
+
+
+# stands for a natural key shared by several rows in lookup maps
+AMBIGUOUS = object()
+
+
+def read_csv(stream):
+    """Yield ``(line number, row)`` for each record of a CSV file with a header."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_jsonl(stream):
+    """Yield ``(line number, object)`` for each non-blank line of a JSONL file.
+
+    Lines that aren't valid JSON are yielded as None and reported by the
+    importer like any other bad row.
+    """
+    for line_number, line in enumerate(stream, start=1):
+        if line.strip():
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, None
+
+
+READERS = {
+    'csv': read_csv,
+    'jsonl': read_jsonl,
+}
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def lookup_map(queryset, *fields):
+    """Map the text of ``fields`` to the pk of each row in ``queryset``.
+
+    Keys shared by several rows map to AMBIGUOUS.
+    """
+    lookup = {}
+    for row in queryset.values_list('pk', *fields).iterator():
+        key = tuple(_text(value) for value in row[1:])
+        lookup[key] = AMBIGUOUS if key in lookup else row[0]
+    return lookup
+
+
+def unique_keys(model):
+    """Return the attnames of each single- and multi-column unique key of ``model``."""
+    opts = model._meta
+    keys = [(field.attname,) for field in opts.concrete_fields if field.unique and not field.primary_key]
+    keys.extend(
+        tuple(opts.get_field(name).attname for name in constraint.fields)
+        for constraint in opts.total_unique_constraints
+    )
+    return keys
+
+
+class Importer:
+    """Turn rows of one kind into unsaved model instances.
+
+    Foreign keys are resolved through lookup maps loaded once per import,
+    and unique keys are checked against an in-memory set of the existing
+    ones, so building a row never touches the database.
+    """
+    model = None
+    # columns copied as they are onto model fields
+    columns = ()
+
+    def __init__(self):
+        self.keys = unique_keys(self.model)
+        self.seen = [
+            set(tuple(_text(value) for value in row) for row in
+                self.model._base_manager.values_list(*key).iterator())
+            for key in self.keys
+        ]
+
+    def resolve(self, lookup, column, *values, required=True):
+        values = tuple(_text(value) for value in values)
+        if not any(values):
+            if required:
+                raise ValidationError({column: 'This field is required.'})
+            return None
+        pk = lookup.get(values)
+        if pk is None:
+            raise ValidationError({column: 'No match for {}.'.format(' / '.join(values))})
+        if pk is AMBIGUOUS:
+            raise ValidationError({column: '{} matches several rows.'.format(' / '.join(values))})
+        return pk
+
+    def related(self, obj, row):
+        """Set the foreign keys of ``obj`` from ``row``; a model without any has none to set."""
+
+    def created(self, objects):
+        """Called with each batch of objects once it is committed."""
+
+    def finish(self):
+        """Called once all rows are imported."""
+
+    def build(self, row):
+        if not isinstance(row, dict):
+            raise ValidationError('Each row must be an object of column values.')
+        values = {column: _text(row.get(column)) for column in self.columns}
+        obj = self.model(**{
+            column: None if value == '' and self.model._meta.get_field(column).null else value
+            for column, value in values.items()
+        })
+        self.related(obj, row)
+        obj.clean_fields(exclude=[
+            field.name for field in self.model._meta.concrete_fields if field.is_relation
+        ])
+        for field in self.model._meta.concrete_fields:
+            value = getattr(obj, field.attname)
+            if settings.USE_TZ and field.get_internal_type() == 'DateTimeField' and \
+                    value is not None and timezone.is_naive(value):
+                setattr(obj, field.attname, timezone.make_aware(value))
+        keys = [tuple(_text(getattr(obj, attname)) for attname in key) for key in self.keys]
+        for key, seen in zip(keys, self.seen):
+            if key in seen:
+                raise ValidationError('{} {} already exists.'.format(
+                    self.model._meta.verbose_name.capitalize(), ' / '.join(key),
+                ))
+        for key, seen in zip(keys, self.seen):
+            seen.add(key)
+        return obj
+
+
+class StandingsMixin:
+    """Recompute the standings of the tournaments that imported rows joined."""
+
+    def __init__(self):
+        super().__init__()
+        self.tournament_ids = set()
+
+    def created(self, objects):
+        self.tournament_ids.update(obj.tournament_id for obj in objects)
+
+    def finish(self):
+        standings.update(self.tournament_ids)
+
+
+class TournamentImporter(Importer):
+    model = Tournament
+    columns = ('tournament_name', 'start_date', 'end_date')
+
+    def __init__(self):
+        super().__init__()
+        self.years = lookup_map(Year.objects.all(), 'year')
+        self.periods = lookup_map(Period.objects.all(), 'period_name')
+        self.games = lookup_map(Game.objects.all(), 'game_name')
+
+    def related(self, obj, row):
+        obj.year_id = self.resolve(self.years, 'year', row.get('year'))
+        obj.period_id = self.resolve(self.periods, 'period', row.get('period'))
+        obj.game_id = self.resolve(self.games, 'game', row.get('game'))
+
+
+class TeamImporter(StandingsMixin, Importer):
+    model = Team
+    columns = ('team_name', 'acronym')
+
+    def __init__(self):
+        super().__init__()
+        self.tournaments = lookup_map(
+            Tournament.objects.all(), 'year__year', 'period__period_name', 'tournament_name'
+        )
+        self.positions = lookup_map(Position.objects.all(), 'position_name')
+
+    def related(self, obj, row):
+        obj.tournament_id = self.resolve(
+            self.tournaments, 'tournament', row.get('year'), row.get('period'), row.get('tournament')
+        )
+        obj.position_id = self.resolve(
+            self.positions, 'position', row.get('position'), required=False
+        )
+
+
+class PlayerImporter(Importer):
+    model = Player
+    columns = ('player_name', 'email', 'gamer_tag', 'phone_number')
+
+    def __init__(self):
+        super().__init__()
+        self.schools = lookup_map(School.objects.all(), 'school_name')
+        self.teams = lookup_map(Team.objects.all(), 'acronym')
+
+    def related(self, obj, row):
+        obj.school_id = self.resolve(self.schools, 'school', row.get('school'))
+        obj.team_id = self.resolve(self.teams, 'team', row.get('team'))
+
+
+class MatchImporter(StandingsMixin, Importer):
+    model = Match
+    columns = (
+        'match_type', 'match_time', 'duration', 'score_a', 'score_b', 'video_link',
+    )
+
+    def __init__(self):
+        super().__init__()
+        self.teams = lookup_map(Team.objects.all(), 'acronym')
+        self.team_tournaments = dict(Team.objects.values_list('pk', 'tournament_id').iterator())
+        self.team_ids = set()
+
+    def created(self, objects):
+        super().created(objects)
+        for obj in objects:
+            self.team_ids.update((obj.team_a_id, obj.team_b_id))
+        # bulk_create leaves the pks unset on SQLite, so find the new
+        # matches by their unique key to attach the reports
+        details = {
+            (obj.match_type, obj.team_a_id, obj.team_b_id): obj.detail for obj in objects if obj.detail
+        }
+        if details:
+            keys = Match.objects.filter(
+                team_a_id__in={team_a_id for match_type, team_a_id, team_b_id in details},
+                match_type__in={match_type for match_type, team_a_id, team_b_id in details},
+            ).values_list('match_type', 'team_a_id', 'team_b_id', 'pk')
+            MatchReport.objects.bulk_create([
+                MatchReport(match_id=pk, detail=details[(match_type, team_a_id, team_b_id)])
+                for match_type, team_a_id, team_b_id, pk in keys
+                if (match_type, team_a_id, team_b_id) in details
+            ])
+
+    def finish(self):
+        super().finish()
+        stats.update_teams(self.team_ids)
+
+    def related(self, obj, row):
+        # stored as the match's report once the match exists
+        obj.detail = _text(row.get('match_detail'))
+        obj.team_a_id = self.resolve(self.teams, 'team_a', row.get('team_a'))
+        obj.team_b_id = self.resolve(self.teams, 'team_b', row.get('team_b'))
+        # bulk_create skips Match.save() and Match.clean()
+        obj.tournament_id = self.team_tournaments[obj.team_a_id]
+        if self.team_tournaments[obj.team_b_id] != obj.tournament_id:
+            raise ValidationError({'team_b': 'Both teams must play in the same tournament.'})
+        if (obj.score_a is None) != (obj.score_b is None):
+            raise ValidationError('Enter both scores, or neither for an unplayed match.')
+        if obj.duration is not None:
+            duration = parse_duration(obj.duration)
+            if duration is None:
+                raise ValidationError({'duration': 'Cannot read {!r} as a duration.'.format(obj.duration)})
+            obj.duration = duration
+
+
+IMPORTERS = {
+    'tournament': TournamentImporter,
+    'team': TeamImporter,
+    'player': PlayerImporter,
+    'match': MatchImporter,
+}
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        # (line number, message) pairs of the rejected rows
+        self.errors = []
+
+    def reject(self, line_number, error):
+        if hasattr(error, 'error_dict'):
+            messages = [
+                '{}: {}'.format(field, message)
+                for field, errors in error.message_dict.items()
+                for message in errors
+            ]
+        else:
+            messages = error.messages
+        self.errors.append((line_number, '; '.join(messages)))
+
+
+def import_rows(kind, rows, batch_size=1000):
+    """Validate and insert ``(line number, row)`` pairs of one kind.
+
+    Rows are validated and written ``batch_size`` at a time, each batch in
+    its own transaction; invalid rows are skipped and listed in the
+    returned report. Search documents, standings and cached pages are
+    refreshed as the signals would have done for single saves.
+    """
+    importer = IMPORTERS[kind]()
+    model = importer.model
+    report = ImportReport()
+    rows = iter(rows)
+    batch = list(islice(rows, batch_size))
+    while batch:
+        objects = {}
+        for line_number, row in batch:
+            try:
+                objects[line_number] = importer.build(row)
+            except ValidationError as error:
+                report.reject(line_number, error)
+        if objects:
+            try:
+                with transaction.atomic():
+                    last_pk = model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+                    model.objects.bulk_create(objects.values())
+                    # SQLite doesn't return the new pks, and reindexing a
+                    # concurrently added row is harmless
+                    search.update_documents(model, model.objects.filter(
+                        pk__gt=last_pk
+                    ).values_list('pk', flat=True))
+            except IntegrityError as error:
+                for line_number in objects:
+                    report.errors.append((line_number, 'Batch rolled back: {}'.format(error)))
+            else:
+                report.created += len(objects)
+                importer.created(objects.values())
+        batch = list(islice(rows, batch_size))
+    importer.finish()
+    cache.bump_model_version(kind)
+    return report
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from proleague.deletion import archive, cascade, move
+from proleague.models import Tournament
+
+
+class Command(BaseCommand):
+    help = (
+        'Archive the tournaments of a season, with their teams, players, matches and everything else '
+        'depending on them, either to a jsonl file that loaddata can restore or into the archive '
+        'database, where their detail pages stay readable; then delete them from the live tables. '
+        'After restoring a file, run rebuild_search_index and rebuild_stats.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('year', type=int)
+        parser.add_argument('--period', help='Only tournaments of this period, by name.')
+        parser.add_argument('--game', help='Only tournaments of this game, by name.')
+        parser.add_argument('--output', help='The archive file.')
+        parser.add_argument('--database', help='Move the season into this database instead of a file.')
+        parser.add_argument('--dry-run', action='store_true', help='Count what would be archived and stop.')
+
+    def handle(self, *args, **options):
+        tournaments = Tournament.objects.filter(year__year=options['year'])
+        if options['period']:
+            tournaments = tournaments.filter(period__period_name=options['period'])
+        if options['game']:
+            tournaments = tournaments.filter(game__game_name=options['game'])
+        if not tournaments.exists():
+            raise CommandError('No tournaments match.')
+        if options['dry_run']:
+            for model, rows in cascade(tournaments).items():
+                self.stdout.write('{}: {}'.format(model._meta.label, rows.count()))
+            return
+        if bool(options['output']) == bool(options['database']):
+            raise CommandError('Give either --output or --database.')
+        if options['database']:
+            if options['database'] not in connections.databases or options['database'] == tournaments.db:
+                raise CommandError('{} is not an archive database.'.format(options['database']))
+            archived = move(tournaments, options['database'])
+            destination = 'the {} database'.format(options['database'])
+        else:
+            with open(options['output'], 'x') as stream:
+                archived = archive(tournaments, stream)
+            destination = options['output']
+        for label, count in archived.items():
+            self.stdout.write('{}: {}'.format(label, count))
+        self.stdout.write(self.style.SUCCESS('Archived to {}.'.format(destination)))
@@ -0,0 +1,118 @@
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+
+from proleague import benchmarks
+from proleague.synthetic import generate_league
+
+
+BASELINE = os.path.join(os.path.dirname(benchmarks.__file__), 'benchmark_baseline.json')
+# enough rows per season that a view scanning whole tables shows up in the timings
+TEAMS_PER_TOURNAMENT = 32
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate league data at several scales in a throwaway test database, time every '
+        'list, detail, search, create and update view, and fail on more queries than the baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales', default='1,4',
+            help=(
+                'Comma separated scales (seasons of data) to measure, smallest first. Results are '
+                'kept as scale:teams, or scale:teams:matches when --matches is given.'
+            ),
+        )
+        parser.add_argument(
+            '--teams', type=int, default=TEAMS_PER_TOURNAMENT,
+            help='Teams per tournament (default {}).'.format(TEAMS_PER_TOURNAMENT),
+        )
+        parser.add_argument(
+            '--matches', type=int,
+            help='Matches per tournament, repeating the round robin as needed (default one round robin).',
+        )
+        parser.add_argument('--repeat', type=int, default=10, help='Requests per view and scale.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--only', action='append', metavar='LABEL', help='Measure only this view (may be repeated).')
+        parser.add_argument('--baseline', default=BASELINE)
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='Store these results as the baseline for their scales, teams and matches.',
+        )
+        parser.add_argument(
+            '--check-latency', action='store_true',
+            help='Fail on latency regressions too, rather than only report them; '
+                 'only meaningful against a baseline from the same, idle machine.',
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=1.0,
+            help='Fraction by which median latency may exceed the baseline.',
+        )
+        parser.add_argument('--min-ms', type=float, default=10, help='Latency increase always tolerated.')
+
+    def handle(self, *args, **options):
+        try:
+            scales = sorted({int(scale) for scale in options['scales'].split(',')})
+        except ValueError:
+            raise CommandError('--scales takes comma separated integers.')
+        if not scales or scales[0] < 1:
+            raise CommandError('Scales must be at least 1.')
+        if options['teams'] < 2:
+            raise CommandError('--teams must be at least 2.')
+        if options['matches'] is not None and options['matches'] < 0:
+            raise CommandError('--matches cannot be negative.')
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            results = self.measure(scales, options)
+        except benchmarks.BenchmarkError as error:
+            raise CommandError(str(error))
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+        baseline = benchmarks.load_baseline(options['baseline'])
+        if options['update_baseline']:
+            baseline.update(results)
+            benchmarks.save_baseline(options['baseline'], baseline)
+            self.stdout.write(self.style.SUCCESS('Baseline written to {}.'.format(options['baseline'])))
+            return
+        for key in sorted(set(results) - set(baseline)):
+            self.stdout.write(self.style.WARNING('No baseline for scale {}; not compared.'.format(key)))
+        regressions = benchmarks.compare(results, baseline, options['tolerance'], options['min_ms'])
+        failures = regressions['queries']
+        if options['check_latency']:
+            failures = failures + regressions['latency']
+        else:
+            for regression in regressions['latency']:
+                self.stdout.write(self.style.WARNING(regression))
+        if failures:
+            for regression in failures:
+                self.stdout.write(self.style.ERROR(regression))
+            raise CommandError('{} regressions against the baseline.'.format(len(failures)))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def measure(self, scales, options):
+        user = User.objects.create_superuser('benchmark', 'benchmark@example.org', 'benchmark')
+        results, generated = {}, 0
+        for scale in scales:
+            # each scale adds seasons on top of the previous one
+            generate_league(
+                scale - generated, seed=options['seed'] + generated,
+                teams=options['teams'], matches=options['matches'],
+            )
+            generated = scale
+            # a baseline only holds for the same shape of league
+            key = ':'.join(str(part) for part in (scale, options['teams'], options['matches']) if part is not None)
+            results[key] = benchmarks.run(user, options['repeat'], options['only'])
+            self.stdout.write('scale {}'.format(key))
+            for label, result in results[key].items():
+                self.stdout.write('    {:<24} p50 {:>8.1f} ms  p95 {:>8.1f} ms  {:>4} queries'.format(
+                    label, result['p50_ms'], result['p95_ms'], result['queries']
+                ))
+        return results
@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from proleague.facets import MATCH_FACETS
+from proleague.models import (
+    Tournament, Game, Team, Match, MatchGame, PlayerGameStat, School, Player, Standing, HeadToHead,
+)
+
+
+def view_queries():
+    # label -> queryset issued by the list/detail views, with a placeholder
+    # pk for the detail pages; paginated lists are sliced to one page
+    return {
+        'tournament_list': Tournament.objects.all()[:25],
+        'game_list': Game.objects.all()[:25],
+        'team_list': Team.objects.all()[:25],
+        'match_list': Match.objects.for_display()[:25],
+        'match_list.faceted': MATCH_FACETS.filter(
+            Match.objects.for_display(), {'year': [1], 'period': [], 'game': [1], 'tournament': []}
+        )[:25],
+        'school_list': School.objects.all()[:25],
+        'player_list': Player.objects.all()[:25],
+        'tournament_detail.teams': Team.objects.filter(tournament_id=1).select_related('position'),
+        'tournament_detail.standings': Standing.objects.filter(tournament_id=1).select_related('team'),
+        'game_detail.tournaments': Tournament.objects.filter(game_id=1).select_related('year', 'period')[:25],
+        'team_detail.players': Player.objects.filter(team_id=1),
+        'team_detail.matches': Team(pk=1).matches()[:25],
+        'team_detail.head_to_head': HeadToHead.objects.filter(team_id=1).select_related('opponent'),
+        'school_detail.players': Player.objects.filter(school_id=1)[:25],
+        'match_detail.games': MatchGame.objects.filter(match_id=1),
+        'match_detail.player_stats': PlayerGameStat.objects.filter(game_id__in=[1, 2]).select_related('player'),
+        'player_detail.game_stats': PlayerGameStat.objects.filter(player_id=1),
+    }
+
+
+def plan_problems(detail):
+    """Return why an EXPLAIN QUERY PLAN step is unacceptable, or None."""
+    if 'USE TEMP B-TREE' in detail:
+        return 'sorts in a temp B-tree'
+    words = detail.split()
+    if words[:1] == ['SCAN'] and 'INDEX' not in words and 'PRIMARY' not in words:
+        return 'scans the whole table'
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Run EXPLAIN QUERY PLAN for the queries behind the list and detail views '
+        'and fail if any scans a whole table or sorts in a temp B-tree.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--skip', action='append', default=[], metavar='LABEL',
+            help='Accept the plan of the named query (may be repeated).',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('EXPLAIN QUERY PLAN is only available on SQLite.')
+        failures = []
+        for label, queryset in view_queries().items():
+            sql, params = queryset.query.get_compiler(connection=connection).as_sql()
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                details = [row[-1] for row in cursor.fetchall()]
+            problems = [
+                '{} ({})'.format(detail, problem)
+                for detail, problem in ((detail, plan_problems(detail)) for detail in details)
+                if problem
+            ]
+            if problems and label not in options['skip']:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR('{}:'.format(label)))
+                for problem in problems:
+                    self.stdout.write('    ' + problem)
+            elif options['verbosity'] > 1:
+                self.stdout.write('{}: {}'.format(label, '; '.join(details)))
+        if failures:
+            raise CommandError('{} queries have unindexed plans: {}'.format(
+                len(failures), ', '.join(failures)
+            ))
+        self.stdout.write(self.style.SUCCESS('All query plans use indexes.'))
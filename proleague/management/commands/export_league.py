@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from proleague import exports
+
+
+class Command(BaseCommand):
+    help = 'Stream teams, players or matches to a CSV, JSONL or columnar JSONL file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(exports.EXPORTS))
+        parser.add_argument('--format', choices=sorted(exports.FORMATS), default='csv')
+        parser.add_argument('--output', '-o', help='File to write (default: standard output).')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--year', help='Only export this year, e.g. 2022.')
+        parser.add_argument('--period', help='Only export this period, by name.')
+        parser.add_argument('--game', help='Only export this game, by name.')
+        parser.add_argument('--tournament', type=int, help='Only export this tournament, by id.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive.')
+        try:
+            content = exports.export(
+                options['kind'],
+                options['format'],
+                {name: options[name] for name in exports.FILTERS},
+                chunk_size=options['chunk_size'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as stream:
+                stream.writelines(content)
+        else:
+            for chunk in content:
+                self.stdout.write(chunk, ending='')
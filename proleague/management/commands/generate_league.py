@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from proleague.synthetic import PLAYERS_PER_TEAM, TEAMS_PER_TOURNAMENT, GAMES, generate_league
+
+
+class Command(BaseCommand):
+    help = 'Fabricate seasons of realistic league data, for development and benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=int, default=1,
+            help='Seasons to add; each has {} tournaments of --teams teams of {} players.'.format(
+                2 * len(GAMES), PLAYERS_PER_TEAM
+            ),
+        )
+        parser.add_argument(
+            '--teams', type=int, default=TEAMS_PER_TOURNAMENT,
+            help='Teams per tournament (default {}).'.format(TEAMS_PER_TOURNAMENT),
+        )
+        parser.add_argument(
+            '--matches', type=int,
+            help='Matches per tournament, repeating the round robin as needed (default one round robin).',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Seed for the random names and results.')
+        parser.add_argument('--first-year', type=int, help='Year of the first season added.')
+
+    def handle(self, *args, **options):
+        if options['scale'] < 1:
+            raise CommandError('--scale must be at least 1.')
+        if options['teams'] < 2:
+            raise CommandError('--teams must be at least 2.')
+        if options['matches'] is not None and options['matches'] < 0:
+            raise CommandError('--matches cannot be negative.')
+        created = generate_league(
+            options['scale'], seed=options['seed'], first_year=options['first_year'],
+            teams=options['teams'], matches=options['matches'],
+        )
+        for model_name, count in created.items():
+            self.stdout.write('{}: {}'.format(model_name, count))
+        self.stdout.write(self.style.SUCCESS('Generated {} season(s).'.format(options['scale'])))
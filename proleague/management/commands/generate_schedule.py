@@ -0,0 +1,36 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from proleague.models import Match, Schedule, Tournament
+from proleague.scheduling import SchedulingError, generate
+
+
+class Command(BaseCommand):
+    help = 'Seed a tournament\'s teams and create the first matches of its schedule.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tournament_id', type=int)
+        parser.add_argument('format', choices=[value for value, label in Schedule.FORMAT_CHOICES])
+        parser.add_argument('--match-length', type=int, default=60, help='Minutes per match.')
+        parser.add_argument('--parallel', type=int, help='How many matches can run at once.')
+        parser.add_argument('--rounds', type=int, help='Number of Swiss rounds.')
+
+    def handle(self, *args, **options):
+        try:
+            tournament = Tournament.objects.get(pk=options['tournament_id'])
+        except Tournament.DoesNotExist:
+            raise CommandError('No tournament {}.'.format(options['tournament_id']))
+        try:
+            schedule = generate(
+                tournament,
+                options['format'],
+                match_length=datetime.timedelta(minutes=options['match_length']),
+                parallel=options['parallel'],
+                rounds=options['rounds'],
+            )
+        except SchedulingError as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS('{} matches scheduled for {}.'.format(
+            Match.objects.filter(tournament=tournament).exclude(bracket='').count(), schedule.tournament
+        )))
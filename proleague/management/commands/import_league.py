@@ -0,0 +1,48 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from proleague import importers
+
+
+class Command(BaseCommand):
+    help = (
+        'Import tournaments, teams, players or matches from a CSV or JSONL file, '
+        'reporting the rows that could not be imported.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(importers.IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format', choices=sorted(importers.READERS),
+            help='File format (default: from the file extension).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows validated and written per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        if file_format not in importers.READERS:
+            raise CommandError('Cannot tell the format of {}; pass --format.'.format(options['path']))
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        try:
+            stream = open(options['path'], encoding='utf-8-sig', newline='')
+        except OSError as error:
+            raise CommandError(error)
+        with stream:
+            report = importers.import_rows(
+                options['kind'],
+                importers.READERS[file_format](stream),
+                batch_size=options['batch_size'],
+            )
+        for line_number, message in report.errors:
+            self.stderr.write('line {}: {}'.format(line_number, message))
+        summary = '{} created, {} rejected.'.format(report.created, len(report.errors))
+        if report.errors:
+            self.stdout.write(self.style.WARNING(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from proleague import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search documents for matches, teams and players.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*',
+            help='Model names to rebuild (default: all of {}).'.format(', '.join(search.DOCUMENTS)),
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        unknown = set(options['models']) - set(search.DOCUMENTS)
+        if unknown:
+            raise CommandError('Unknown search models: {}'.format(', '.join(sorted(unknown))))
+        search.rebuild(options['models'] or None, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
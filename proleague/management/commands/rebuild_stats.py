@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from proleague import standings, stats
+from proleague.models import Tournament
+
+
+class Command(BaseCommand):
+    help = 'Recompute the team stats, head-to-head records and tournament standings.'
+
+    def handle(self, *args, **options):
+        stats.rebuild()
+        standings.update(Tournament.objects.values_list('pk', flat=True))
+        self.stdout.write(self.style.SUCCESS('Stats and standings rebuilt.'))
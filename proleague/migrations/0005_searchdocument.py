@@ -0,0 +1,115 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:21
+
+from django.db import migrations, models
+
+
+# frozen copies of what proleague.search used when this migration was written
+FTS_TABLE = 'proleague_searchdocument_fts'
+
+
+def fts5_available(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    table = 'proleague_searchdocument'
+    if connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX proleague_searchdocument_body_gin ON {table} "
+            "USING gin (to_tsvector('simple', body))".format(table=table)
+        )
+    elif connection.vendor == 'sqlite' and fts5_available(connection):
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE {fts} USING fts5("
+            "kind, body, content='{table}', content_rowid='document_id')".format(
+                fts=FTS_TABLE, table=table
+            )
+        )
+        schema_editor.execute(
+            "CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+            "INSERT INTO {fts}(rowid, kind, body) VALUES (new.document_id, new.kind, new.body); "
+            "END".format(fts=FTS_TABLE, table=table)
+        )
+        schema_editor.execute(
+            "CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+            "INSERT INTO {fts}({fts}, rowid, kind, body) "
+            "VALUES ('delete', old.document_id, old.kind, old.body); "
+            "END".format(fts=FTS_TABLE, table=table)
+        )
+        schema_editor.execute(
+            "CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN "
+            "INSERT INTO {fts}({fts}, rowid, kind, body) "
+            "VALUES ('delete', old.document_id, old.kind, old.body); "
+            "INSERT INTO {fts}(rowid, kind, body) VALUES (new.document_id, new.kind, new.body); "
+            "END".format(fts=FTS_TABLE, table=table)
+        )
+    backfill_search_documents(apps)
+
+
+def backfill_search_documents(apps):
+    SearchDocument = apps.get_model('proleague', 'SearchDocument')
+    Match = apps.get_model('proleague', 'Match')
+    Team = apps.get_model('proleague', 'Team')
+    Player = apps.get_model('proleague', 'Player')
+    documents = []
+    for match in Match.objects.select_related('team_a__tournament', 'team_b'):
+        documents.append(SearchDocument(
+            kind='match',
+            object_id=match.pk,
+            body=' '.join([
+                match.match_type,
+                match.team_a.team_name, match.team_a.acronym,
+                match.team_b.team_name, match.team_b.acronym,
+                match.team_a.tournament.tournament_name,
+            ]),
+        ))
+    for team in Team.objects.all():
+        documents.append(SearchDocument(
+            kind='team',
+            object_id=team.pk,
+            body=' '.join([team.team_name, team.acronym]),
+        ))
+    for player in Player.objects.all():
+        documents.append(SearchDocument(
+            kind='player',
+            object_id=player.pk,
+            body=' '.join([player.player_name, player.gamer_tag]),
+        ))
+    SearchDocument.objects.bulk_create(documents, batch_size=1000)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS proleague_searchdocument_body_gin')
+    elif connection.vendor == 'sqlite':
+        for suffix in ('_ai', '_ad', '_au'):
+            schema_editor.execute('DROP TRIGGER IF EXISTS {}{}'.format(FTS_TABLE, suffix))
+        schema_editor.execute('DROP TABLE IF EXISTS {}'.format(FTS_TABLE))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proleague', '0004_alter_match_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('document_id', models.AutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=45)),
+                ('object_id', models.IntegerField()),
+                ('body', models.TextField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
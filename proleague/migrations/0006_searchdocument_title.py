@@ -0,0 +1,121 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:43
+
+from django.db import migrations, models
+
+
+# frozen copies of the FTS5 table and triggers of 0005_searchdocument
+FTS_TABLE = 'proleague_searchdocument_fts'
+TRIGGERS = [
+    "CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+    "INSERT INTO {fts}(rowid, kind, body) VALUES (new.document_id, new.kind, new.body); "
+    "END",
+    "CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+    "INSERT INTO {fts}({fts}, rowid, kind, body) "
+    "VALUES ('delete', old.document_id, old.kind, old.body); "
+    "END",
+    "CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN "
+    "INSERT INTO {fts}({fts}, rowid, kind, body) "
+    "VALUES ('delete', old.document_id, old.kind, old.body); "
+    "INSERT INTO {fts}(rowid, kind, body) VALUES (new.document_id, new.kind, new.body); "
+    "END",
+]
+
+
+def match_title(match):
+    return '{} - [{}] {} VS. {}'.format(
+        match.team_a.tournament.tournament_name, match.match_type,
+        match.team_a.acronym, match.team_b.acronym,
+    )
+
+
+def reinstall_search_triggers(apps, schema_editor):
+    # SQLite rebuilds the document table to add a column, which drops its triggers
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite' or FTS_TABLE not in connection.introspection.table_names():
+        return
+    for suffix in ('_ai', '_ad', '_au'):
+        schema_editor.execute('DROP TRIGGER IF EXISTS {}{}'.format(FTS_TABLE, suffix))
+    for sql in TRIGGERS:
+        schema_editor.execute(sql.format(fts=FTS_TABLE, table='proleague_searchdocument'))
+    schema_editor.execute("INSERT INTO {fts}({fts}) VALUES ('rebuild')".format(fts=FTS_TABLE))
+
+
+def reindex_search_documents(apps, schema_editor):
+    reinstall_search_triggers(apps, schema_editor)
+    SearchDocument = apps.get_model('proleague', 'SearchDocument')
+    Game = apps.get_model('proleague', 'Game')
+    Tournament = apps.get_model('proleague', 'Tournament')
+    Team = apps.get_model('proleague', 'Team')
+    Match = apps.get_model('proleague', 'Match')
+    School = apps.get_model('proleague', 'School')
+    Player = apps.get_model('proleague', 'Player')
+    documents = []
+    for game in Game.objects.all():
+        documents.append(SearchDocument(
+            kind='game',
+            object_id=game.pk,
+            title=game.game_name,
+            body=' '.join([game.game_name, game.genre, game.developer]),
+        ))
+    for tournament in Tournament.objects.select_related('year', 'period', 'game'):
+        documents.append(SearchDocument(
+            kind='tournament',
+            object_id=tournament.pk,
+            title=tournament.tournament_name,
+            body=' '.join([
+                tournament.tournament_name, str(tournament.year.year),
+                tournament.period.period_name, tournament.game.game_name,
+            ]),
+        ))
+    for team in Team.objects.all():
+        documents.append(SearchDocument(
+            kind='team',
+            object_id=team.pk,
+            title='{} ({})'.format(team.team_name, team.acronym),
+            body=' '.join([team.team_name, team.acronym]),
+        ))
+    for match in Match.objects.select_related('team_a__tournament', 'team_b'):
+        documents.append(SearchDocument(
+            kind='match',
+            object_id=match.pk,
+            title=match_title(match)[:512],
+            body=' '.join([
+                match.match_type,
+                match.team_a.team_name, match.team_a.acronym,
+                match.team_b.team_name, match.team_b.acronym,
+                match.team_a.tournament.tournament_name,
+            ]),
+        ))
+    for school in School.objects.all():
+        documents.append(SearchDocument(
+            kind='school',
+            object_id=school.pk,
+            title=school.school_name,
+            body=' '.join([school.school_name, school.city, school.state]),
+        ))
+    for player in Player.objects.all():
+        documents.append(SearchDocument(
+            kind='player',
+            object_id=player.pk,
+            title='{} ({})'.format(player.player_name, player.gamer_tag),
+            body=' '.join([player.player_name, player.gamer_tag]),
+        ))
+    SearchDocument.objects.all().delete()
+    SearchDocument.objects.bulk_create(documents, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proleague', '0005_searchdocument'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, reinstall_search_triggers),
+        migrations.AddField(
+            model_name='searchdocument',
+            name='title',
+            field=models.CharField(default='', max_length=512),
+        ),
+        migrations.RunPython(reindex_search_documents, migrations.RunPython.noop),
+    ]
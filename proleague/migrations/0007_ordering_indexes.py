@@ -0,0 +1,77 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proleague', '0006_searchdocument_title'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='match',
+            name='team_a',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='match_a', to='proleague.team'),
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='team_b',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='match_b', to='proleague.team'),
+        ),
+        migrations.AlterField(
+            model_name='player',
+            name='school',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='players', to='proleague.school'),
+        ),
+        migrations.AlterField(
+            model_name='player',
+            name='team',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='players', to='proleague.team'),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='tournament',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='teams', to='proleague.tournament'),
+        ),
+        migrations.AlterField(
+            model_name='tournament',
+            name='game',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='tournaments', to='proleague.game'),
+        ),
+        migrations.AlterField(
+            model_name='tournament',
+            name='year',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='tournaments', to='proleague.year'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['team_a', 'match_time'], name='match_team_a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['team_b', 'match_time'], name='match_team_b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['team', 'player_name', 'gamer_tag'], name='player_team_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['school', 'player_name', 'gamer_tag'], name='player_school_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(fields=['tournament', 'team_name'], name='team_tournament_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['year', 'period', 'start_date', 'end_date'], name='tournament_ordering_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['game', 'start_date', 'end_date'], name='tournament_game_idx'),
+        ),
+    ]
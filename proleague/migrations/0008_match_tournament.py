@@ -0,0 +1,58 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:27
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_match_tournament(apps, schema_editor):
+    Match = apps.get_model('proleague', 'Match')
+    Team = apps.get_model('proleague', 'Team')
+    Match.objects.update(tournament_id=Subquery(
+        Team.objects.filter(pk=OuterRef('team_a_id')).values('tournament_id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proleague', '0007_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='match',
+            options={'ordering': ['tournament_id', 'match_time']},
+        ),
+        migrations.RemoveIndex(
+            model_name='match',
+            name='match_team_a_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='match',
+            name='match_team_b_idx',
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='tournament',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='matches', to='proleague.tournament'),
+        ),
+        migrations.RunPython(backfill_match_tournament, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='match',
+            name='tournament',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='matches', to='proleague.tournament'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['tournament', 'match_time'], name='match_tournament_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['team_a', 'tournament', 'match_time'], name='match_team_a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['team_b', 'tournament', 'match_time'], name='match_team_b_idx'),
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:38
+
+import re
+from collections import defaultdict
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+WINNER = re.compile(r';\s*(\S+)\s+Won\s*$', re.MULTILINE)
+
+
+def backfill_scores(apps, schema_editor):
+    # match_detail lists one game per line, each ending with "; <acronym> Won"
+    Match = apps.get_model('proleague', 'Match')
+    Team = apps.get_model('proleague', 'Team')
+    acronyms = dict(Team.objects.values_list('pk', 'acronym'))
+    played = []
+    for match in Match.objects.only('match_detail', 'team_a_id', 'team_b_id').iterator():
+        winners = WINNER.findall(match.match_detail)
+        if winners:
+            match.score_a = winners.count(acronyms[match.team_a_id])
+            match.score_b = winners.count(acronyms[match.team_b_id])
+            played.append(match)
+    Match.objects.bulk_update(played, ['score_a', 'score_b'], batch_size=500)
+
+
+def backfill_standings(apps, schema_editor):
+    # a frozen copy of proleague.standings.compute with the default points
+    Match = apps.get_model('proleague', 'Match')
+    Team = apps.get_model('proleague', 'Team')
+    Standing = apps.get_model('proleague', 'Standing')
+    standings = {
+        team_id: Standing(team_id=team_id, tournament_id=tournament_id)
+        for team_id, tournament_id in Team.objects.order_by('team_name', 'pk').values_list('pk', 'tournament_id')
+    }
+    results = Match.objects.filter(score_a__isnull=False, score_b__isnull=False).values_list(
+        'team_a_id', 'team_b_id', 'score_a', 'score_b'
+    )
+    for team_a_id, team_b_id, score_a, score_b in results:
+        for team_id, scored, conceded in ((team_a_id, score_a, score_b), (team_b_id, score_b, score_a)):
+            standing = standings[team_id]
+            standing.played += 1
+            standing.wins += scored > conceded
+            standing.draws += scored == conceded
+            standing.losses += scored < conceded
+            standing.score_for += scored
+            standing.score_against += conceded
+    tables = defaultdict(list)
+    for standing in standings.values():
+        standing.points = standing.wins * 3 + standing.draws
+        tables[standing.tournament_id].append(standing)
+    for table in tables.values():
+        def tiebreakers(standing):
+            return standing.points, standing.score_for - standing.score_against, standing.score_for
+        table.sort(key=tiebreakers, reverse=True)
+        for position, standing in enumerate(table, start=1):
+            if position > 1 and tiebreakers(table[position - 2]) == tiebreakers(standing):
+                standing.rank = table[position - 2].rank
+            else:
+                standing.rank = position
+    Standing.objects.bulk_create(standings.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proleague', '0009_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='score_a',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='score_b',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='Standing',
+            fields=[
+                ('standing_id', models.AutoField(primary_key=True, serialize=False)),
+                ('rank', models.PositiveIntegerField()),
+                ('played', models.PositiveIntegerField(default=0)),
+                ('wins', models.PositiveIntegerField(default=0)),
+                ('draws', models.PositiveIntegerField(default=0)),
+                ('losses', models.PositiveIntegerField(default=0)),
+                ('score_for', models.PositiveIntegerField(default=0)),
+                ('score_against', models.PositiveIntegerField(default=0)),
+                ('points', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('team', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='standing', to='proleague.team')),
+                ('tournament', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='proleague.tournament')),
+            ],
+            options={
+                'ordering': ['tournament_id', 'rank'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='standing',
+            index=models.Index(fields=['tournament', 'rank'], name='standing_tournament_idx'),
+        ),
+        migrations.RunPython(backfill_scores, migrations.RunPython.noop),
+        migrations.RunPython(backfill_standings, migrations.RunPython.noop),
+    ]
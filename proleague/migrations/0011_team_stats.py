@@ -0,0 +1,94 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:40
+
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def backfill_stats(apps, schema_editor):
+    # a frozen copy of proleague.stats.rebuild
+    TeamStats = apps.get_model('proleague', 'TeamStats')
+    HeadToHead = apps.get_model('proleague', 'HeadToHead')
+    now = schema_editor.connection.ops.adapt_datetimefield_value(timezone.now())
+    played = 'r.scored IS NOT NULL AND r.conceded IS NOT NULL'
+    record = (
+        "COALESCE(SUM(CASE WHEN {played} THEN 1 ELSE 0 END), 0), "
+        "COALESCE(SUM(CASE WHEN {played} AND r.scored > r.conceded THEN 1 ELSE 0 END), 0), "
+        "COALESCE(SUM(CASE WHEN {played} AND r.scored = r.conceded THEN 1 ELSE 0 END), 0), "
+        "COALESCE(SUM(CASE WHEN {played} AND r.scored < r.conceded THEN 1 ELSE 0 END), 0), "
+        "COALESCE(SUM(CASE WHEN {played} THEN r.scored ELSE 0 END), 0), "
+        "COALESCE(SUM(CASE WHEN {played} THEN r.conceded ELSE 0 END), 0)"
+    ).format(played=played)
+    sides = (
+        "SELECT team_a_id AS team_id, team_b_id AS opponent_id, score_a AS scored, "
+        "score_b AS conceded, match_time FROM proleague_match "
+        "UNION ALL "
+        "SELECT team_b_id, team_a_id, score_b, score_a, match_time FROM proleague_match"
+    )
+    schema_editor.execute(
+        "INSERT INTO {stats} (team_id, matches, played, wins, draws, losses, "
+        "score_for, score_against, last_match_time, updated_at) "
+        "SELECT t.team_id, COUNT(r.team_id), {record}, MAX(r.match_time), %s "
+        "FROM proleague_team t LEFT JOIN ({sides}) r ON r.team_id = t.team_id "
+        "GROUP BY t.team_id".format(stats=TeamStats._meta.db_table, record=record, sides=sides),
+        [now],
+    )
+    schema_editor.execute(
+        "INSERT INTO {head_to_head} (team_id, opponent_id, played, wins, draws, losses, "
+        "score_for, score_against, updated_at) "
+        "SELECT r.team_id, r.opponent_id, {record}, %s "
+        "FROM ({sides}) r WHERE {played} "
+        "GROUP BY r.team_id, r.opponent_id".format(
+            head_to_head=HeadToHead._meta.db_table, record=record, sides=sides, played=played,
+        ),
+        [now],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proleague', '0010_standings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamStats',
+            fields=[
+                ('stats_id', models.AutoField(primary_key=True, serialize=False)),
+                ('matches', models.PositiveIntegerField(default=0)),
+                ('played', models.PositiveIntegerField(default=0)),
+                ('wins', models.PositiveIntegerField(default=0)),
+                ('draws', models.PositiveIntegerField(default=0)),
+                ('losses', models.PositiveIntegerField(default=0)),
+                ('score_for', models.PositiveIntegerField(default=0)),
+                ('score_against', models.PositiveIntegerField(default=0)),
+                ('last_match_time', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('team', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='proleague.team')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HeadToHead',
+            fields=[
+                ('head_to_head_id', models.AutoField(primary_key=True, serialize=False)),
+                ('played', models.PositiveIntegerField(default=0)),
+                ('wins', models.PositiveIntegerField(default=0)),
+                ('draws', models.PositiveIntegerField(default=0)),
+                ('losses', models.PositiveIntegerField(default=0)),
+                ('score_for', models.PositiveIntegerField(default=0)),
+                ('score_against', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('opponent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='proleague.team')),
+                ('team', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='head_to_head', to='proleague.team')),
+            ],
+            options={
+                'ordering': ['team_id', 'opponent_id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='headtohead',
+            constraint=models.UniqueConstraint(fields=('team', 'opponent'), name='unique_head_to_head'),
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
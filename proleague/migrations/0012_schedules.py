@@ -0,0 +1,58 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:44
+
+import datetime
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proleague', '0011_team_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Schedule',
+            fields=[
+                ('schedule_id', models.AutoField(primary_key=True, serialize=False)),
+                ('format', models.CharField(choices=[('round_robin', 'Round-robin'), ('swiss', 'Swiss'), ('single_elimination', 'Single elimination'), ('double_elimination', 'Double elimination')], max_length=20)),
+                ('rounds', models.PositiveIntegerField(blank=True, null=True)),
+                ('match_length', models.DurationField(default=datetime.timedelta(seconds=3600))),
+                ('parallel', models.PositiveIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tournament', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='schedule', to='proleague.tournament')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='bracket',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='bracket_slot',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='round_number',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='Seed',
+            fields=[
+                ('seed_id', models.AutoField(primary_key=True, serialize=False)),
+                ('seed', models.PositiveIntegerField()),
+                ('schedule', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='seeds', to='proleague.schedule')),
+                ('team', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='seed', to='proleague.team')),
+            ],
+            options={
+                'ordering': ['schedule_id', 'seed'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='seed',
+            constraint=models.UniqueConstraint(fields=('schedule', 'seed'), name='unique_seed'),
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:48
+
+import datetime
+import re
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.utils.dateparse import parse_duration
+
+
+UNITS = {
+    'd': 'days', 'day': 'days', 'days': 'days',
+    'h': 'hours', 'hr': 'hours', 'hrs': 'hours', 'hour': 'hours', 'hours': 'hours',
+    'm': 'minutes', 'min': 'minutes', 'mins': 'minutes', 'minute': 'minutes', 'minutes': 'minutes',
+    's': 'seconds', 'sec': 'seconds', 'secs': 'seconds', 'second': 'seconds', 'seconds': 'seconds',
+}
+UNIT_RE = re.compile(r'(\d+(?:\.\d+)?)\s*([a-z]+)[\s,]*', re.IGNORECASE)
+
+
+def parse(value):
+    # a frozen copy of proleague.durations.parse_duration
+    value = value.strip()
+    if not value:
+        return None
+    if re.fullmatch(r'\d+(\.\d+)?', value):
+        return datetime.timedelta(minutes=float(value))
+    parts = UNIT_RE.findall(value)
+    if parts and ''.join(UNIT_RE.sub('', value).split()) == '':
+        if any(unit.lower() not in UNITS for number, unit in parts):
+            return None
+        duration = datetime.timedelta()
+        for number, unit in parts:
+            duration += datetime.timedelta(**{UNITS[unit.lower()]: float(number)})
+        return duration
+    duration = parse_duration(value)
+    if duration is None or duration < datetime.timedelta():
+        return None
+    return duration
+
+
+def parse_durations(apps, schema_editor):
+    # unreadable durations become blank rather than failing the migration
+    Match = apps.get_model('proleague', 'Match')
+    matches = []
+    for match in Match.objects.only('duration').iterator():
+        match.duration_parsed = parse(match.duration)
+        matches.append(match)
+    Match.objects.bulk_update(matches, ['duration_parsed'], batch_size=500)
+
+
+def format_durations(apps, schema_editor):
+    Match = apps.get_model('proleague', 'Match')
+    matches = []
+    for match in Match.objects.only('duration_parsed').iterator():
+        seconds = int(match.duration_parsed.total_seconds()) if match.duration_parsed else 0
+        match.duration = '{:02}:{:02}'.format(*divmod(seconds, 60))
+        matches.append(match)
+    Match.objects.bulk_update(matches, ['duration'], batch_size=500)
+
+
+def backfill_average_durations(apps, schema_editor):
+    Match = apps.get_model('proleague', 'Match')
+    TeamStats = apps.get_model('proleague', 'TeamStats')
+    durations = defaultdict(list)
+    for team_a_id, team_b_id, duration in Match.objects.filter(duration__isnull=False).values_list(
+        'team_a_id', 'team_b_id', 'duration'
+    ):
+        durations[team_a_id].append(duration)
+        durations[team_b_id].append(duration)
+    stats = list(TeamStats.objects.filter(team_id__in=durations))
+    for row in stats:
+        row.average_duration = sum(durations[row.team_id], datetime.timedelta()) / len(durations[row.team_id])
+    TeamStats.objects.bulk_update(stats, ['average_duration'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proleague', '0012_schedules'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='duration_parsed',
+            field=models.DurationField(blank=True, null=True),
+        ),
+        migrations.RunPython(parse_durations, format_durations),
+        # blank, so that re-adding it on the way back fills existing rows with ''
+        migrations.AlterField(
+            model_name='match',
+            name='duration',
+            field=models.CharField(blank=True, max_length=45),
+        ),
+        migrations.RemoveField(
+            model_name='match',
+            name='duration',
+        ),
+        migrations.RenameField(
+            model_name='match',
+            old_name='duration_parsed',
+            new_name='duration',
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['duration'], name='match_duration_idx'),
+        ),
+        migrations.AddField(
+            model_name='teamstats',
+            name='average_duration',
+            field=models.DurationField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_average_durations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,139 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:52
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# "Game 2: [Route 66] DLT 1:2 IGMA; IGMA Won", where the map and the
+# score are both optional
+GAME = re.compile(
+    r'^\s*Game\s*(?P<number>\d*)\s*:\s*(?:\[(?P<map>[^\]]*)\])?\s*'
+    r'(?:(?P<left>\S+)\s+(?P<left_score>\d+)\s*:\s*(?P<right_score>\d+)\s+(?P<right>[^\s;]+))?',
+    re.IGNORECASE,
+)
+
+
+def split_match_detail(apps, schema_editor):
+    # the text moves to MatchReport as it is; games it lists in the usual
+    # format also become MatchGame rows
+    Match = apps.get_model('proleague', 'Match')
+    MatchReport = apps.get_model('proleague', 'MatchReport')
+    MatchGame = apps.get_model('proleague', 'MatchGame')
+    Team = apps.get_model('proleague', 'Team')
+    acronyms = dict(Team.objects.values_list('pk', 'acronym'))
+    reports, games = [], []
+    for match in Match.objects.only('match_detail', 'team_a_id', 'team_b_id').iterator():
+        if not match.match_detail.strip():
+            continue
+        reports.append(MatchReport(match_id=match.pk, detail=match.match_detail))
+        numbers = set()
+        for line in match.match_detail.splitlines():
+            found = GAME.match(line)
+            if found is None:
+                continue
+            number = int(found['number'] or len(numbers) + 1)
+            if number in numbers:
+                continue
+            numbers.add(number)
+            game = MatchGame(match_id=match.pk, game_number=number, map_name=(found['map'] or '').strip()[:100])
+            if found['left'] is not None:
+                sides = {
+                    found['left']: int(found['left_score']),
+                    found['right']: int(found['right_score']),
+                }
+                game.score_a = sides.get(acronyms[match.team_a_id])
+                game.score_b = sides.get(acronyms[match.team_b_id])
+                if game.score_a is None or game.score_b is None:
+                    game.score_a = game.score_b = None
+            games.append(game)
+    MatchReport.objects.bulk_create(reports, batch_size=500)
+    MatchGame.objects.bulk_create(games, batch_size=500)
+
+
+def join_match_detail(apps, schema_editor):
+    Match = apps.get_model('proleague', 'Match')
+    MatchReport = apps.get_model('proleague', 'MatchReport')
+    details = dict(MatchReport.objects.values_list('match_id', 'detail'))
+    matches = list(Match.objects.filter(pk__in=details).only('pk'))
+    for match in matches:
+        match.match_detail = details[match.pk]
+    Match.objects.bulk_update(matches, ['match_detail'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proleague', '0013_match_duration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchGame',
+            fields=[
+                ('match_game_id', models.AutoField(primary_key=True, serialize=False)),
+                ('game_number', models.PositiveIntegerField()),
+                ('map_name', models.CharField(blank=True, max_length=100)),
+                ('score_a', models.PositiveIntegerField(blank=True, null=True)),
+                ('score_b', models.PositiveIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['match_id', 'game_number'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PlayerGameStat',
+            fields=[
+                ('player_game_stat_id', models.AutoField(primary_key=True, serialize=False)),
+                ('kills', models.PositiveIntegerField(default=0)),
+                ('deaths', models.PositiveIntegerField(default=0)),
+                ('assists', models.PositiveIntegerField(default=0)),
+                ('extra', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('game', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='player_stats', to='proleague.matchgame')),
+                ('player', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='game_stats', to='proleague.player')),
+            ],
+            options={
+                'ordering': ['game_id', 'player_id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MatchReport',
+            fields=[
+                ('report_id', models.AutoField(primary_key=True, serialize=False)),
+                ('detail', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('match', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='report', to='proleague.match')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='matchgame',
+            name='match',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='games', to='proleague.match'),
+        ),
+        migrations.AddIndex(
+            model_name='playergamestat',
+            index=models.Index(fields=['player', 'game'], name='player_game_stat_player_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='playergamestat',
+            constraint=models.UniqueConstraint(fields=('game', 'player'), name='unique_player_game_stat'),
+        ),
+        migrations.AddConstraint(
+            model_name='matchgame',
+            constraint=models.UniqueConstraint(fields=('match', 'game_number'), name='unique_match_game'),
+        ),
+        migrations.RunPython(split_match_detail, join_match_detail),
+        # blank, so that re-adding it on the way back fills existing rows with ''
+        migrations.AlterField(
+            model_name='match',
+            name='match_detail',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RemoveField(
+            model_name='match',
+            name='match_detail',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:14
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proleague', '0014_match_reports'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='match',
+            options={'ordering': ['tournament_id', 'match_time'], 'verbose_name_plural': 'matches'},
+        ),
+    ]
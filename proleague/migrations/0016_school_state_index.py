@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proleague', '0015_match_verbose_name_plural'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='school',
+            index=models.Index(fields=['state', 'school_name'], name='school_state_idx'),
+        ),
+    ]
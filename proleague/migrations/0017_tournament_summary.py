@@ -0,0 +1,36 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_summaries(apps, schema_editor):
+    Match = apps.get_model('proleague', 'Match')
+    Tournament = apps.get_model('proleague', 'Tournament')
+    TournamentSummary = apps.get_model('proleague', 'TournamentSummary')
+    matches = dict(
+        Match.objects.order_by().values_list('tournament_id').annotate(count=models.Count('pk'))
+    )
+    TournamentSummary.objects.bulk_create([
+        TournamentSummary(tournament_id=tournament_id, matches=matches.get(tournament_id, 0))
+        for tournament_id in Tournament.objects.values_list('pk', flat=True)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proleague', '0016_school_state_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TournamentSummary',
+            fields=[
+                ('summary_id', models.AutoField(primary_key=True, serialize=False)),
+                ('matches', models.PositiveIntegerField(default=0)),
+                ('tournament', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='proleague.tournament')),
+            ],
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:46
+
+from django.db import migrations, models
+
+
+def backfill_durations(apps, schema_editor):
+    Match = apps.get_model('proleague', 'Match')
+    TournamentSummary = apps.get_model('proleague', 'TournamentSummary')
+    totals = {
+        row['tournament_id']: row
+        for row in Match.objects.order_by().values('tournament_id').annotate(
+            timed_matches=models.Count('duration'), total_duration=models.Sum('duration'),
+        )
+    }
+    summaries = list(TournamentSummary.objects.filter(tournament_id__in=list(totals)))
+    for summary in summaries:
+        summary.timed_matches = totals[summary.tournament_id]['timed_matches']
+        summary.total_duration = totals[summary.tournament_id]['total_duration']
+    TournamentSummary.objects.bulk_update(summaries, ['timed_matches', 'total_duration'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proleague', '0017_tournament_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournamentsummary',
+            name='timed_matches',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tournamentsummary',
+            name='total_duration',
+            field=models.DurationField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_durations, migrations.RunPython.noop),
+    ]
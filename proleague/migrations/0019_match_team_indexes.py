@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proleague', '0018_tournament_summary_durations'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='match',
+            name='match_team_a_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='match',
+            name='match_team_b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['team_a', 'match_time'], name='match_team_a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['team_b', 'match_time'], name='match_team_b_idx'),
+        ),
+    ]
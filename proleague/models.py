@@ -1,12 +1,17 @@
+import datetime
+
+from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import UniqueConstraint
+from django.db.models import F, Q, UniqueConstraint
 from django.urls import reverse
+from django.utils import timezone
 
 
 class Period(models.Model):
     period_id = models.AutoField(primary_key=True)
     period_sequence = models.IntegerField(unique=True)
     period_name = models.CharField(max_length=45, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'{self.period_name}'
@@ -18,6 +23,7 @@ class Period(models.Model):
 class Year(models.Model):
     year_id = models.AutoField(primary_key=True)
     year = models.IntegerField(unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'{self.year}'
@@ -30,6 +36,7 @@ class Position(models.Model):
     position_id = models.AutoField(primary_key=True)
     position_sequence = models.IntegerField(unique=True)
     position_name = models.CharField(max_length=45, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'{self.position_name}'
@@ -45,6 +52,7 @@ class Game(models.Model):
     developer = models.CharField(max_length=100, default='')
     developer_website = models.CharField(max_length=255, default='')
     genre = models.CharField(max_length=45)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'{self.game_name}'
@@ -79,9 +87,10 @@ class Tournament(models.Model):
     tournament_name = models.CharField(max_length=255)
     start_date = models.DateField()
     end_date = models.DateField()
-    year = models.ForeignKey(Year, related_name='tournaments', on_delete=models.PROTECT)
+    year = models.ForeignKey(Year, related_name='tournaments', on_delete=models.PROTECT, db_index=False)
     period = models.ForeignKey(Period, related_name='tournaments', on_delete=models.PROTECT)
-    game = models.ForeignKey(Game, related_name='tournaments', on_delete=models.PROTECT)
+    game = models.ForeignKey(Game, related_name='tournaments', on_delete=models.PROTECT, db_index=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'{self.tournament_name}'
@@ -109,20 +118,60 @@ class Tournament(models.Model):
         constraints = [
             UniqueConstraint(fields=['year', 'period', 'tournament_name'], name='unique_tournament')
         ]
+        indexes = [
+            models.Index(fields=['year', 'period', 'start_date', 'end_date'], name='tournament_ordering_idx'),
+            models.Index(fields=['game', 'start_date', 'end_date'], name='tournament_game_idx'),
+        ]
 
 
 class Team(models.Model):
     team_id = models.AutoField(primary_key=True)
     team_name = models.CharField(max_length=45)
     acronym = models.CharField(max_length=45, unique=True)
-    tournament = models.ForeignKey(Tournament, related_name='teams', on_delete=models.PROTECT)
+    tournament = models.ForeignKey(Tournament, related_name='teams', on_delete=models.PROTECT, db_index=False)
     position = models.ForeignKey(
         Position, related_name='teams', on_delete=models.PROTECT, null=True, blank=True
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'{self.team_name} ({self.acronym})'
 
+    def matches(self):
+        return Match.objects.db_manager(self._state.db).for_display().for_team(self)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        team = super().from_db(db, field_names, values)
+        # the tournament as stored, so clean() can tell a move without a query
+        team._loaded_tournament_id = team.__dict__.get('tournament_id')
+        return team
+
+    def clean(self):
+        if self.pk is None:
+            return
+        if not hasattr(self, '_loaded_tournament_id'):
+            self._loaded_tournament_id = Team._base_manager.using(self._state.db).filter(
+                pk=self.pk
+            ).values_list('tournament_id', flat=True).first()
+        if self.tournament_id == self._loaded_tournament_id:
+            return
+        # a match's teams play in one tournament, so a team that has
+        # played can't move on its own
+        if Match._base_manager.using(self._state.db).filter(Q(team_a=self.pk) | Q(team_b=self.pk)).exists():
+            raise ValidationError({
+                'tournament': 'A team with matches cannot move to another tournament.'
+            })
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_tournament_id = self.tournament_id
+        # keep the tournament denormalized onto the matches this team is
+        # team_a of; clean() keeps a team with matches from moving
+        Match.objects.filter(team_a=self).exclude(
+            tournament_id=self.tournament_id
+        ).update(tournament_id=self.tournament_id, updated_at=timezone.now())
+
     def get_absolute_url(self):
         return reverse(
             'proleague_team_detail_urlpattern',
@@ -146,20 +195,76 @@ class Team(models.Model):
         constraints = [
             UniqueConstraint(fields=['team_name', 'tournament'], name='unique_team')
         ]
+        indexes = [
+            models.Index(fields=['tournament', 'team_name'], name='team_tournament_idx'),
+        ]
+
+
+class MatchQuerySet(models.QuerySet):
+    def for_display(self):
+        # Match.__str__ walks tournament, team_a and team_b
+        return self.select_related(
+            'tournament', 'team_a', 'team_b'
+        )
+
+    def for_team(self, team):
+        """Return the team's matches on either side, by match time.
+
+        Each match is annotated with the other team as ``opponent_id``.
+        The two sides are read through their own indexes and merged with a
+        UNION, which keeps match-time order without a sort; like any UNION
+        the result can be sliced, counted and ordered but not filtered.
+        """
+        sides = self.order_by()
+        return sides.filter(team_a=team.pk).annotate(opponent_id=F('team_b')).union(
+            sides.filter(team_b=team.pk).annotate(opponent_id=F('team_a'))
+        ).order_by('match_time', 'match_id')
 
 
 class Match(models.Model):
     match_id = models.AutoField(primary_key=True)
     match_type = models.CharField(max_length=100)
     match_time = models.DateTimeField()
-    duration = models.CharField(max_length=45)
-    team_a = models.ForeignKey(Team, related_name='match_a', on_delete=models.PROTECT)
-    team_b = models.ForeignKey(Team, related_name='match_b', on_delete=models.PROTECT)
-    match_detail = models.TextField()
+    # blank until the match is played
+    duration = models.DurationField(null=True, blank=True)
+    team_a = models.ForeignKey(Team, related_name='match_a', on_delete=models.PROTECT, db_index=False)
+    team_b = models.ForeignKey(Team, related_name='match_b', on_delete=models.PROTECT, db_index=False)
+    # denormalized from team_a so match lists need no join; set by save()
+    tournament = models.ForeignKey(
+        Tournament, related_name='matches', on_delete=models.PROTECT, db_index=False, editable=False
+    )
+    # games (or points) won by each team; both blank until the match is played
+    score_a = models.PositiveIntegerField(null=True, blank=True)
+    score_b = models.PositiveIntegerField(null=True, blank=True)
+    # where a generated schedule placed this match; blank for matches entered by hand
+    bracket = models.CharField(max_length=20, blank=True, default='', editable=False)
+    round_number = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    bracket_slot = models.PositiveIntegerField(null=True, blank=True, editable=False)
     video_link = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = MatchQuerySet.as_manager()
 
     def __str__(self):
-        return f'{self.team_a.tournament} - [{self.match_type}] {self.team_a.acronym} VS. {self.team_b.acronym}'
+        return f'{self.tournament} - [{self.match_type}] {self.team_a.acronym} VS. {self.team_b.acronym}'
+
+    @property
+    def opponent(self):
+        # only for matches from MatchQuerySet.for_team
+        return self.team_b if self.opponent_id == self.team_b_id else self.team_a
+
+    def clean(self):
+        if self.team_a_id is not None and self.team_b_id is not None:
+            if self.team_a.tournament_id != self.team_b.tournament_id:
+                raise ValidationError({
+                    'team_b': 'Both teams must play in the same tournament.'
+                })
+        if (self.score_a is None) != (self.score_b is None):
+            raise ValidationError('Enter both scores, or neither for an unplayed match.')
+
+    def save(self, *args, **kwargs):
+        self.tournament_id = self.team_a.tournament_id
+        super().save(*args, **kwargs)
 
     def get_absolute_url(self):
         return reverse(
@@ -180,10 +285,79 @@ class Match(models.Model):
         )
 
     class Meta:
-        ordering = ['team_a__tournament', 'match_time']
+        verbose_name_plural = 'matches'
+        ordering = ['tournament_id', 'match_time']
         constraints = [
             UniqueConstraint(fields=['match_type', 'team_a', 'team_b'], name='unique_match')
         ]
+        indexes = [
+            models.Index(fields=['tournament', 'match_time'], name='match_tournament_idx'),
+            models.Index(fields=['team_a', 'match_time'], name='match_team_a_idx'),
+            models.Index(fields=['team_b', 'match_time'], name='match_team_b_idx'),
+            models.Index(fields=['duration'], name='match_duration_idx'),
+        ]
+
+
+class MatchReport(models.Model):
+    """The written account of a match, kept apart so match queries never load it."""
+    report_id = models.AutoField(primary_key=True)
+    match = models.OneToOneField(Match, related_name='report', on_delete=models.CASCADE)
+    detail = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.match} report'
+
+
+class MatchGame(models.Model):
+    """One game (map) of a match."""
+    match_game_id = models.AutoField(primary_key=True)
+    match = models.ForeignKey(Match, related_name='games', on_delete=models.CASCADE, db_index=False)
+    game_number = models.PositiveIntegerField()
+    map_name = models.CharField(max_length=100, blank=True)
+    # rounds, kills or points of each team, depending on the game
+    score_a = models.PositiveIntegerField(null=True, blank=True)
+    score_b = models.PositiveIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.match} - Game {self.game_number}'
+
+    @property
+    def winner_id(self):
+        if self.score_a is None or self.score_b is None or self.score_a == self.score_b:
+            return None
+        return self.match.team_a_id if self.score_a > self.score_b else self.match.team_b_id
+
+    class Meta:
+        ordering = ['match_id', 'game_number']
+        constraints = [
+            UniqueConstraint(fields=['match', 'game_number'], name='unique_match_game')
+        ]
+
+
+class PlayerGameStat(models.Model):
+    """A player's line in one game; ``extra`` holds numbers particular to the game title."""
+    player_game_stat_id = models.AutoField(primary_key=True)
+    game = models.ForeignKey(MatchGame, related_name='player_stats', on_delete=models.CASCADE, db_index=False)
+    player = models.ForeignKey('Player', related_name='game_stats', on_delete=models.CASCADE, db_index=False)
+    kills = models.PositiveIntegerField(default=0)
+    deaths = models.PositiveIntegerField(default=0)
+    assists = models.PositiveIntegerField(default=0)
+    extra = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.player} in {self.game}'
+
+    class Meta:
+        ordering = ['game_id', 'player_id']
+        constraints = [
+            UniqueConstraint(fields=['game', 'player'], name='unique_player_game_stat')
+        ]
+        indexes = [
+            models.Index(fields=['player', 'game'], name='player_game_stat_player_idx'),
+        ]
 
 
 class School(models.Model):
@@ -191,6 +365,7 @@ class School(models.Model):
     school_name = models.CharField(max_length=255)
     city = models.CharField(max_length=45)
     state = models.CharField(max_length=45)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'{self.school_name}'
@@ -218,6 +393,9 @@ class School(models.Model):
         constraints = [
             UniqueConstraint(fields=['school_name', 'city', 'state'], name='unique_school')
         ]
+        indexes = [
+            models.Index(fields=['state', 'school_name'], name='school_state_idx'),
+        ]
 
 
 class Player(models.Model):
@@ -226,8 +404,9 @@ class Player(models.Model):
     email = models.CharField(max_length=255)
     gamer_tag = models.CharField(max_length=100)
     phone_number = models.CharField(max_length=45)
-    school = models.ForeignKey(School, related_name='players', on_delete=models.PROTECT)
-    team = models.ForeignKey(Team, related_name='players', on_delete=models.PROTECT)
+    school = models.ForeignKey(School, related_name='players', on_delete=models.PROTECT, db_index=False)
+    team = models.ForeignKey(Team, related_name='players', on_delete=models.PROTECT, db_index=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'{self.player_name} ({self.gamer_tag})'
@@ -255,3 +434,158 @@ class Player(models.Model):
         constraints = [
             UniqueConstraint(fields=['player_name', 'gamer_tag'], name='unique_player')
         ]
+        indexes = [
+            models.Index(fields=['team', 'player_name', 'gamer_tag'], name='player_team_idx'),
+            models.Index(fields=['school', 'player_name', 'gamer_tag'], name='player_school_idx'),
+        ]
+
+
+class Standing(models.Model):
+    """A team's row in its tournament table, maintained by proleague.standings."""
+    standing_id = models.AutoField(primary_key=True)
+    tournament = models.ForeignKey(Tournament, related_name='standings', on_delete=models.CASCADE, db_index=False)
+    team = models.OneToOneField(Team, related_name='standing', on_delete=models.CASCADE)
+    rank = models.PositiveIntegerField()
+    played = models.PositiveIntegerField(default=0)
+    wins = models.PositiveIntegerField(default=0)
+    draws = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    score_for = models.PositiveIntegerField(default=0)
+    score_against = models.PositiveIntegerField(default=0)
+    points = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.rank}. {self.team}'
+
+    @property
+    def score_difference(self):
+        return self.score_for - self.score_against
+
+    class Meta:
+        ordering = ['tournament_id', 'rank']
+        indexes = [
+            models.Index(fields=['tournament', 'rank'], name='standing_tournament_idx'),
+        ]
+
+
+class TournamentSummary(models.Model):
+    """Totals over a tournament's matches, maintained by proleague.standings."""
+    summary_id = models.AutoField(primary_key=True)
+    tournament = models.OneToOneField(Tournament, related_name='summary', on_delete=models.CASCADE)
+    # scheduled matches, played or not
+    matches = models.PositiveIntegerField(default=0)
+    # the matches with a recorded duration, and their durations added up
+    timed_matches = models.PositiveIntegerField(default=0)
+    total_duration = models.DurationField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.tournament} summary'
+
+
+class Schedule(models.Model):
+    ROUND_ROBIN = 'round_robin'
+    SWISS = 'swiss'
+    SINGLE_ELIMINATION = 'single_elimination'
+    DOUBLE_ELIMINATION = 'double_elimination'
+    FORMAT_CHOICES = [
+        (ROUND_ROBIN, 'Round-robin'),
+        (SWISS, 'Swiss'),
+        (SINGLE_ELIMINATION, 'Single elimination'),
+        (DOUBLE_ELIMINATION, 'Double elimination'),
+    ]
+
+    schedule_id = models.AutoField(primary_key=True)
+    tournament = models.OneToOneField(Tournament, related_name='schedule', on_delete=models.CASCADE)
+    format = models.CharField(max_length=20, choices=FORMAT_CHOICES)
+    # Swiss rounds to play; blank for enough rounds to find a single leader
+    rounds = models.PositiveIntegerField(null=True, blank=True)
+    match_length = models.DurationField(default=datetime.timedelta(hours=1))
+    # matches that can run at the same time; blank for no limit
+    parallel = models.PositiveIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.tournament} ({self.get_format_display()})'
+
+
+class Seed(models.Model):
+    seed_id = models.AutoField(primary_key=True)
+    schedule = models.ForeignKey(Schedule, related_name='seeds', on_delete=models.CASCADE, db_index=False)
+    team = models.OneToOneField(Team, related_name='seed', on_delete=models.CASCADE)
+    seed = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f'{self.seed}. {self.team}'
+
+    class Meta:
+        ordering = ['schedule_id', 'seed']
+        constraints = [
+            UniqueConstraint(fields=['schedule', 'seed'], name='unique_seed')
+        ]
+
+
+class TeamStats(models.Model):
+    """A team's record over all its matches, maintained by proleague.stats."""
+    stats_id = models.AutoField(primary_key=True)
+    team = models.OneToOneField(Team, related_name='stats', on_delete=models.CASCADE)
+    # scheduled matches, played or not
+    matches = models.PositiveIntegerField(default=0)
+    played = models.PositiveIntegerField(default=0)
+    wins = models.PositiveIntegerField(default=0)
+    draws = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    score_for = models.PositiveIntegerField(default=0)
+    score_against = models.PositiveIntegerField(default=0)
+    last_match_time = models.DateTimeField(null=True, blank=True)
+    # over the matches with a recorded duration
+    average_duration = models.DurationField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.team} stats'
+
+    @property
+    def win_rate(self):
+        if not self.played:
+            return None
+        return self.wins / self.played
+
+
+class HeadToHead(models.Model):
+    """A team's played record against one opponent, maintained by proleague.stats."""
+    head_to_head_id = models.AutoField(primary_key=True)
+    team = models.ForeignKey(Team, related_name='head_to_head', on_delete=models.CASCADE, db_index=False)
+    opponent = models.ForeignKey(Team, related_name='+', on_delete=models.CASCADE)
+    played = models.PositiveIntegerField(default=0)
+    wins = models.PositiveIntegerField(default=0)
+    draws = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    score_for = models.PositiveIntegerField(default=0)
+    score_against = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.team} vs. {self.opponent}'
+
+    class Meta:
+        ordering = ['team_id', 'opponent_id']
+        constraints = [
+            UniqueConstraint(fields=['team', 'opponent'], name='unique_head_to_head')
+        ]
+
+
+class SearchDocument(models.Model):
+    document_id = models.AutoField(primary_key=True)
+    kind = models.CharField(max_length=45)
+    object_id = models.IntegerField()
+    title = models.CharField(max_length=512, default='')
+    body = models.TextField()
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document')
+        ]
@@ -0,0 +1,240 @@
+import base64
+import binascii
+import collections.abc
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder without its cut to milliseconds.
+
+    A cursor seeks past the exact key of the last row, so a time rounded
+    down would show that row again on the next page.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(data):
+    raw = json.dumps(data, cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return the data behind ``token``, or None for a missing or bad token."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json.loads(raw.decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+class CursorPage(collections.abc.Sequence):
+    """A page without a page number; neighbours are reached through cursors."""
+    number = None
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None, last_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.last_cursor = last_cursor
+
+    def __repr__(self):
+        return '<Cursor page of {} objects>'.format(len(self))
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+
+class CountLabelMixin:
+    """For paginators whose count() counts at most ``count_limit`` + 1 rows."""
+    count_limit = None
+
+    def count_label(self):
+        """Describe the size of the result set without an unbounded COUNT.
+
+        With ``count_limit`` set, at most that many rows are counted and
+        larger results are shown as e.g. "1000+".
+        """
+        if self.count_limit is None:
+            return str(self.count())
+        count = self.count()
+        if count > self.count_limit:
+            return '{}+'.format(self.count_limit)
+        return str(count)
+
+
+class CursorPaginator(CountLabelMixin):
+    """Keyset pagination over ``queryset``'s ordering, tie-broken on pk.
+
+    Each ordering entry becomes a key column; an entry naming a relation
+    (e.g. ``team__tournament``) is keyed on the related primary key
+    rather than on the related model's own ordering. Rows with NULL key
+    values are not supported.
+    """
+    cursor_key = 'cursor_key_{}'
+
+    def __init__(self, queryset, per_page, ordering=None, count_limit=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.count_limit = count_limit
+        ordering = ordering or queryset.query.order_by or queryset.model._meta.ordering
+        self.keys = [self._resolve(field) for field in ordering]
+        if not any(path in ('pk', queryset.model._meta.pk.name) for path, desc in self.keys):
+            self.keys.append(('pk', False))
+
+    def _resolve(self, field):
+        if not isinstance(field, str) or field == '?':
+            raise ImproperlyConfigured(
+                'Cursor pagination needs field-name ordering, not {!r}.'.format(field)
+            )
+        desc = field.startswith('-')
+        parts = field.lstrip('-').split('__')
+        opts = self.queryset.model._meta
+        for index, part in enumerate(parts):
+            if part == 'pk':
+                break
+            try:
+                model_field = opts.get_field(part)
+            except FieldDoesNotExist:
+                raise ImproperlyConfigured(
+                    'Cannot paginate {} by {!r}.'.format(opts.model.__name__, field)
+                )
+            if model_field.is_relation:
+                if index == len(parts) - 1:
+                    parts[index] = model_field.attname
+                else:
+                    opts = model_field.related_model._meta
+        return '__'.join(parts), desc
+
+    def count(self):
+        if self.count_limit is None:
+            return self.queryset.count()
+        return self.queryset[:self.count_limit + 1].count()
+
+    def _ordered(self, reverse):
+        return self.queryset.annotate(**{
+            self.cursor_key.format(index): F(path)
+            for index, (path, desc) in enumerate(self.keys)
+        }).order_by(*[
+            ('-' if desc != reverse else '') + path
+            for path, desc in self.keys
+        ])
+
+    def _after(self, values, reverse):
+        condition = Q()
+        for index, (path, desc) in enumerate(self.keys):
+            step = Q(**{
+                '{}__{}'.format(path, 'lt' if desc != reverse else 'gt'): values[index]
+            })
+            for (previous, _), value in zip(self.keys[:index], values):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def _values(self, obj):
+        # rows of a values() queryset are dicts
+        get = obj.get if isinstance(obj, dict) else obj.__getattribute__
+        return [
+            get(self.cursor_key.format(index))
+            for index in range(len(self.keys))
+        ]
+
+    def page(self, token):
+        cursor = decode_cursor(token) or {}
+        direction = cursor.get('d')
+        values = cursor.get('k')
+        if direction in ('n', 'p') and (
+            not isinstance(values, list) or len(values) != len(self.keys)
+        ):
+            direction = None
+        reverse = direction in ('p', 'l')
+        queryset = self._ordered(reverse)
+        if direction in ('n', 'p'):
+            try:
+                queryset = queryset.filter(self._after(values, reverse))
+            except (TypeError, ValueError, ValidationError):
+                # a tampered cursor; start over from the first page
+                return self.page(None)
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+        if not rows:
+            return CursorPage(rows, self)
+        has_next = has_more if not reverse else direction == 'p'
+        has_previous = has_more if reverse else direction == 'n'
+        return CursorPage(
+            rows,
+            self,
+            next_cursor=encode_cursor(
+                {'d': 'n', 'k': self._values(rows[-1])}
+            ) if has_next else None,
+            previous_cursor=encode_cursor(
+                {'d': 'p', 'k': self._values(rows[0])}
+            ) if has_previous else None,
+            last_cursor=encode_cursor({'d': 'l'}) if has_next else None,
+        )
+
+
+class OffsetCursorPaginator(CountLabelMixin):
+    """Cursor links over any sliceable result without running a COUNT.
+
+    Used where the results have no keyset to seek on, such as ranked
+    full-text matches, which the database scores in full per query anyway.
+    With ``count_limit`` set, ``object_list.count()`` must accept a
+    ``limit`` keyword, as SearchResults does.
+    """
+
+    def __init__(self, object_list, per_page, count_limit=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.count_limit = count_limit
+
+    def count(self):
+        if self.count_limit is None:
+            return self.object_list.count()
+        return self.object_list.count(limit=self.count_limit + 1)
+
+    def page(self, token):
+        cursor = decode_cursor(token) or {}
+        offset = cursor.get('o', 0)
+        if not isinstance(offset, int) or offset < 0:
+            offset = 0
+        rows = list(self.object_list[offset:offset + self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return CursorPage(
+            rows[:self.per_page],
+            self,
+            next_cursor=encode_cursor(
+                {'o': offset + self.per_page}
+            ) if has_next else None,
+            previous_cursor=encode_cursor(
+                {'o': max(offset - self.per_page, 0)}
+            ) if offset > 0 else None,
+        )
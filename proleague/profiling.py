@@ -0,0 +1,301 @@
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+PROFILING = getattr(settings, 'PROLEAGUE_PROFILING', True)
+# the dashboard and percentiles cover this many seconds of requests
+WINDOW = getattr(settings, 'PROLEAGUE_PROFILING_WINDOW', 10 * 60)
+# log a query signature run this many times in one request
+DUPLICATE_THRESHOLD = getattr(settings, 'PROLEAGUE_PROFILING_DUPLICATE_THRESHOLD', 5)
+# lets a Prometheus scraper read the metrics with "Authorization: Bearer <token>"
+METRICS_TOKEN = getattr(settings, 'PROLEAGUE_METRICS_TOKEN', None)
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# name -> (help, buckets) of each histogram kept per view
+METRICS = {
+    'latency_seconds': ('Time to answer a request.', SECONDS_BUCKETS),
+    'sql_queries': ('SQL queries run by a request.', COUNT_BUCKETS),
+    'sql_seconds': ('Time spent in SQL queries by a request.', SECONDS_BUCKETS),
+    'template_seconds': ('Time spent rendering templates by a request.', SECONDS_BUCKETS),
+}
+
+_current = ContextVar('proleague_profile', default=None)
+
+
+class Histogram:
+    """Counts of observations per bucket, plus their total and sum."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # the last count is for observations above every bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+    def quantile(self, q):
+        """Estimate the q-quantile by interpolating within its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        lower, below = 0, 0
+        for bound, total in self.cumulative():
+            if total >= rank:
+                if bound == float('inf'):
+                    return lower
+                inside = total - below
+                return lower + (bound - lower) * ((rank - below) / inside if inside else 0)
+            lower, below = bound, total
+        return lower
+
+
+class RollingHistogram:
+    """A histogram since startup, and one over the last ``window`` seconds.
+
+    The window is kept as ``slots`` histograms of equal spans, so old
+    observations age out a slot at a time.
+    """
+
+    def __init__(self, buckets, window=WINDOW, slots=10):
+        self.buckets = buckets
+        self.span = window / slots
+        self.total = Histogram(buckets)
+        self.slots = deque(maxlen=slots)
+
+    def observe(self, value, now):
+        self.total.observe(value)
+        slot = int(now // self.span)
+        if not self.slots or self.slots[-1][0] != slot:
+            self.slots.append((slot, Histogram(self.buckets)))
+        self.slots[-1][1].observe(value)
+
+    def recent(self, now):
+        oldest = int(now // self.span) - self.slots.maxlen + 1
+        merged = Histogram(self.buckets)
+        for slot, histogram in self.slots:
+            if slot >= oldest:
+                merged.merge(histogram)
+        return merged
+
+
+class ViewStats:
+    def __init__(self):
+        self.histograms = {name: RollingHistogram(buckets) for name, (help, buckets) in METRICS.items()}
+        self.statuses = Counter()
+        # signature -> (requests it repeated in, most repeats in one request)
+        self.duplicates = {}
+
+
+class Registry:
+    """The per-view statistics of this process, shared by its threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, profile, now):
+        with self.lock:
+            stats = self.views.setdefault(profile.view_name, ViewStats())
+            for name, value in profile.values().items():
+                stats.histograms[name].observe(value, now)
+            stats.statuses[profile.status] += 1
+            for sql, repeats in profile.duplicates().items():
+                seen, most = stats.duplicates.get(sql, (0, 0))
+                stats.duplicates[sql] = (seen + 1, max(most, repeats))
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+
+    def snapshot(self, now=None):
+        """Return a row of recent figures per view, slowest p95 latency first."""
+        now = time.time() if now is None else now
+        rows = []
+        with self.lock:
+            for view_name, stats in self.views.items():
+                recent = {name: histogram.recent(now) for name, histogram in stats.histograms.items()}
+                latency = recent['latency_seconds']
+                if not latency.count:
+                    continue
+                rows.append({
+                    'view_name': view_name,
+                    'requests': latency.count,
+                    'latency_p50': latency.quantile(0.5),
+                    'latency_p95': latency.quantile(0.95),
+                    'latency_mean': latency.sum / latency.count,
+                    'sql_queries_mean': recent['sql_queries'].sum / latency.count,
+                    'sql_seconds_mean': recent['sql_seconds'].sum / latency.count,
+                    'template_seconds_mean': recent['template_seconds'].sum / latency.count,
+                    'errors': sum(count for status, count in stats.statuses.items() if status >= 500),
+                    'duplicates': sorted(
+                        ((sql, seen, most) for sql, (seen, most) in stats.duplicates.items()),
+                        key=lambda duplicate: -duplicate[1],
+                    ),
+                })
+        rows.sort(key=lambda row: -row['latency_p95'])
+        return rows
+
+    def prometheus(self):
+        """Render the since-startup histograms in the Prometheus text format."""
+        lines = []
+        with self.lock:
+            views = sorted(self.views.items())
+            for name, (help, buckets) in METRICS.items():
+                metric = 'proleague_request_{}'.format(name)
+                lines.append('# HELP {} {}'.format(metric, help))
+                lines.append('# TYPE {} histogram'.format(metric))
+                for view_name, stats in views:
+                    histogram = stats.histograms[name].total
+                    label = 'view="{}"'.format(_escape(view_name))
+                    for bound, total in histogram.cumulative():
+                        lines.append('{}_bucket{{{},le="{}"}} {}'.format(
+                            metric, label, '+Inf' if bound == float('inf') else bound, total
+                        ))
+                    lines.append('{}_sum{{{}}} {}'.format(metric, label, histogram.sum))
+                    lines.append('{}_count{{{}}} {}'.format(metric, label, histogram.count))
+            lines.append('# HELP proleague_request_duplicate_queries_total '
+                         'Requests that repeated a query signature.')
+            lines.append('# TYPE proleague_request_duplicate_queries_total counter')
+            for view_name, stats in views:
+                seen = sum(seen for seen, most in stats.duplicates.values())
+                lines.append('proleague_request_duplicate_queries_total{{view="{}"}} {}'.format(
+                    _escape(view_name), seen
+                ))
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
+
+# collapses "IN (%s, %s, %s)" so batches of any size share a signature
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+# transaction control repeats with every atomic block; it's not an N+1
+TRANSACTION = re.compile(r'(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE)\b', re.IGNORECASE)
+
+
+class Profile:
+    """What one request spent on SQL and templates."""
+
+    def __init__(self):
+        self.view_name = 'unresolved'
+        self.status = 0
+        self.latency = 0
+        self.sql_count = 0
+        self.sql_time = 0
+        self.template_time = 0
+        self.signatures = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # a connection.execute_wrapper
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.sql_count += 1
+            if not TRANSACTION.match(sql):
+                self.signatures[IN_LIST.sub('IN (...)', sql)] += 1
+
+    def duplicates(self):
+        return {sql: count for sql, count in self.signatures.items() if count >= DUPLICATE_THRESHOLD}
+
+    def values(self):
+        return {
+            'latency_seconds': self.latency,
+            'sql_queries': self.sql_count,
+            'sql_seconds': self.sql_time,
+            'template_seconds': self.template_time,
+        }
+
+
+class ProfiledTemplate(Template):
+    def render(self, context=None, request=None):
+        profile = _current.get()
+        if profile is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            profile.template_time += time.perf_counter() - started
+
+
+class ProfiledDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing each top-level render.
+
+    Templates pulled in by {% extends %} and {% include %} render inside
+    their parent, so they are not counted twice.
+    """
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return ProfiledTemplate(template.template, self)
+
+
+class ProfilingMiddleware:
+    """Time each request and its SQL and templates, per URL name.
+
+    Figures go to the in-memory registry shown by the profile dashboard
+    and the metrics endpoint. A query run DUPLICATE_THRESHOLD times or
+    more in one request, the usual sign of an N+1, is logged.
+    """
+
+    def __init__(self, get_response):
+        if not PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = Profile()
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        profile.latency = time.perf_counter() - started
+        if request.resolver_match is not None:
+            profile.view_name = request.resolver_match.view_name
+        profile.status = response.status_code
+        for sql, count in profile.duplicates().items():
+            logger.warning('%s ran a query %d times: %s', profile.view_name, count, sql)
+        registry.record(profile, time.time())
+        return response
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db import connections
+
+
+ARCHIVE_DATABASE = getattr(settings, 'PROLEAGUE_ARCHIVE_DATABASE', 'archive')
+
+
+def archive_configured():
+    return ARCHIVE_DATABASE in connections.databases
+
+
+class ArchiveRouter:
+    """Keep completed seasons in a database of their own.
+
+    Reads and writes go to the default database unless a query or an
+    instance says otherwise, so rows loaded from the archive keep their
+    related lookups there. The archive only gets the proleague tables;
+    the data migrations, which backfill rows of the live database, are
+    skipped on it since it starts out empty.
+    """
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db != ARCHIVE_DATABASE:
+            return None
+        return app_label == 'proleague' and model_name is not None
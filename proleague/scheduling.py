@@ -0,0 +1,321 @@
+import datetime
+import math
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import cache, search, standings, stats
+from .models import Team, Match, Schedule, Seed
+
+
+class SchedulingError(Exception):
+    pass
+
+
+# stands for a bracket entrant still waiting on an unplayed match
+PENDING = object()
+
+
+def circle_rounds(team_ids):
+    """Pair every team with every other once, one match per team per round.
+
+    Uses the circle method: the first team stays put while the rest
+    rotate; with an odd count one team sits out each round.
+    """
+    teams = list(team_ids)
+    if len(teams) % 2:
+        teams.append(None)
+    rounds = []
+    for round_index in range(len(teams) - 1):
+        pairs = []
+        for index in range(len(teams) // 2):
+            a, b = teams[index], teams[-1 - index]
+            if a is not None and b is not None:
+                # alternate sides for the fixed team
+                pairs.append((b, a) if index == 0 and round_index % 2 else (a, b))
+        rounds.append(pairs)
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return rounds
+
+
+def seed_positions(size):
+    """Return the seeds in bracket order, so seed 1 meets seed 2 last."""
+    order = [1]
+    while len(order) < size:
+        total = len(order) * 2 + 1
+        order = [seed for top in order for seed in (top, total - top)]
+    return order
+
+
+def elimination_label(round_number, rounds):
+    teams = 2 ** (rounds - round_number + 1)
+    return {2: 'Final', 4: 'Semifinals', 8: 'Quarterfinals'}.get(teams, 'Round of {}'.format(teams))
+
+
+class Replay:
+    """Walk a schedule from its seeds through the results so far.
+
+    Each call to ``play`` either reports the outcome of an existing match
+    or, once both entrants are known, records the match still to create.
+    """
+
+    def __init__(self, schedule, matches):
+        self.schedule = schedule
+        self.matches = {
+            (match.bracket, match.round_number, match.bracket_slot): match for match in matches
+        }
+        self.seeds = dict(schedule.seeds.values_list('seed', 'team_id'))
+        self.new = []
+
+    def play(self, bracket, round_number, slot, a, b, label):
+        """Return the (winner, loser) of a pairing; either may be None or PENDING."""
+        if a is None or b is None:
+            return (b if a is None else a), None
+        if a is PENDING or b is PENDING:
+            return PENDING, PENDING
+        match = self.matches.get((bracket, round_number, slot))
+        if match is None:
+            self.new.append((bracket, round_number, slot, a, b, label))
+            return PENDING, PENDING
+        if match.score_a is None or match.score_a == match.score_b:
+            return PENDING, PENDING
+        if match.score_a > match.score_b:
+            return match.team_a_id, match.team_b_id
+        return match.team_b_id, match.team_a_id
+
+    def round(self, bracket, round_number, entrants, label):
+        winners, losers = [], []
+        for slot in range(0, len(entrants), 2):
+            pair = entrants[slot:slot + 2] + [None] * (2 - len(entrants[slot:slot + 2]))
+            winner, loser = self.play(bracket, round_number, slot // 2, pair[0], pair[1], label)
+            winners.append(winner)
+            losers.append(loser)
+        return winners, losers
+
+    def upper_bracket(self, label):
+        size = 2 ** math.ceil(math.log2(len(self.seeds)))
+        rounds = int(math.log2(size))
+        entrants = [self.seeds.get(seed) for seed in seed_positions(size)]
+        losers = {}
+        for round_number in range(1, rounds + 1):
+            entrants, losers[round_number] = self.round(
+                'upper', round_number, entrants, label(round_number, rounds)
+            )
+        return entrants[0], losers, rounds
+
+    def single_elimination(self):
+        self.upper_bracket(elimination_label)
+
+    def double_elimination(self):
+        champion, upper_losers, rounds = self.upper_bracket(
+            lambda round_number, rounds: 'Upper Round {}'.format(round_number)
+        )
+        lower_round = 1
+        lower, _ = self.round('lower', 1, upper_losers[1], 'Lower Round 1')
+        for round_number in range(2, rounds + 1):
+            # losers drop in against the lower bracket in reverse order, to
+            # put off rematches
+            dropped = list(reversed(upper_losers[round_number]))
+            entrants = [team for pair in zip(lower, dropped) for team in pair]
+            lower_round += 1
+            lower, _ = self.round('lower', lower_round, entrants, 'Lower Round {}'.format(lower_round))
+            if len(lower) > 1:
+                lower_round += 1
+                lower, _ = self.round('lower', lower_round, lower, 'Lower Round {}'.format(lower_round))
+        self.round('final', 1, [champion, lower[0]], 'Grand Final')
+
+    def round_robin(self):
+        teams = [team_id for seed, team_id in sorted(self.seeds.items())]
+        for round_index, pairs in enumerate(circle_rounds(teams)):
+            for slot, (a, b) in enumerate(pairs):
+                self.play('round_robin', round_index + 1, slot, a, b, 'Round {}'.format(round_index + 1))
+
+    def swiss(self):
+        seed_of = {team_id: seed for seed, team_id in self.seeds.items()}
+        points = defaultdict(int)
+        played = set()
+        byes = set()
+        for round_number in range(1, swiss_rounds(self.schedule, len(seed_of)) + 1):
+            matches = [
+                match for key, match in self.matches.items()
+                if key[0] == 'swiss' and key[1] == round_number
+            ]
+            if not matches:
+                self.pair_swiss(round_number, seed_of, points, played, byes)
+                return
+            if any(match.score_a is None for match in matches):
+                return
+            playing = set()
+            for match in matches:
+                playing.update((match.team_a_id, match.team_b_id))
+                played.update({(match.team_a_id, match.team_b_id), (match.team_b_id, match.team_a_id)})
+                # two points for a win, one each for a draw
+                if match.score_a >= match.score_b:
+                    points[match.team_a_id] += 1 + (match.score_a > match.score_b)
+                if match.score_b >= match.score_a:
+                    points[match.team_b_id] += 1 + (match.score_b > match.score_a)
+            for team_id in set(seed_of) - playing:
+                byes.add(team_id)
+                points[team_id] += 2
+
+    def pair_swiss(self, round_number, seed_of, points, played, byes):
+        pool = sorted(seed_of, key=lambda team_id: (-points[team_id], seed_of[team_id]))
+        if len(pool) % 2:
+            # the lowest ranked team without a bye sits this round out
+            bye = next((team_id for team_id in reversed(pool) if team_id not in byes), pool[-1])
+            pool.remove(bye)
+        slot = 0
+        while pool:
+            a = pool.pop(0)
+            b = next((team_id for team_id in pool if (a, team_id) not in played), pool[0])
+            pool.remove(b)
+            self.play('swiss', round_number, slot, a, b, 'Swiss Round {}'.format(round_number))
+            slot += 1
+
+
+def swiss_rounds(schedule, team_count):
+    return schedule.rounds or max(1, math.ceil(math.log2(team_count)))
+
+
+def steps(schedule, team_count):
+    """Return how many consecutive time steps the schedule needs."""
+    if schedule.format == Schedule.ROUND_ROBIN:
+        return team_count - 1 if team_count % 2 == 0 else team_count
+    if schedule.format == Schedule.SWISS:
+        return swiss_rounds(schedule, team_count)
+    rounds = math.ceil(math.log2(team_count))
+    if schedule.format == Schedule.SINGLE_ELIMINATION:
+        return rounds
+    return 2 * rounds
+
+
+def step_of(schedule, bracket, round_number, team_count):
+    # upper bracket round r plays alongside lower bracket round r - 1; the
+    # two involve different teams
+    if bracket == 'final':
+        return steps(schedule, team_count) - 1
+    if bracket == 'lower':
+        return round_number
+    return round_number - 1
+
+
+class Timetable:
+    """Spread the steps evenly from the start date to the end date.
+
+    Within a step, matches start together up to ``parallel`` at a time,
+    then one ``match_length`` later, so no team ever plays two matches at
+    once.
+    """
+
+    def __init__(self, schedule, team_count):
+        tournament = schedule.tournament
+        self.schedule = schedule
+        self.start = timezone.make_aware(datetime.datetime.combine(tournament.start_date, datetime.time.min))
+        end = timezone.make_aware(
+            datetime.datetime.combine(tournament.end_date + datetime.timedelta(days=1), datetime.time.min)
+        )
+        self.steps = steps(schedule, team_count)
+        self.step_length = datetime.timedelta(
+            minutes=(end - self.start).total_seconds() // 60 // self.steps
+        )
+        per_step = math.ceil(team_count / 2)
+        waves = math.ceil(per_step / schedule.parallel) if schedule.parallel else 1
+        if waves * schedule.match_length > self.step_length:
+            raise SchedulingError(
+                'The {} steps of this schedule need {} each, but the tournament dates leave {}.'.format(
+                    self.steps, waves * schedule.match_length, self.step_length
+                )
+            )
+        self.team_count = team_count
+        self.used = defaultdict(int)
+
+    def book(self, bracket, round_number):
+        step = step_of(self.schedule, bracket, round_number, self.team_count)
+        index = self.used[step]
+        self.used[step] += 1
+        wave = index // self.schedule.parallel if self.schedule.parallel else 0
+        return self.start + step * self.step_length + wave * self.schedule.match_length
+
+
+def advance(schedule):
+    """Create every match whose teams are now known; return how many."""
+    matches = list(Match.objects.filter(tournament=schedule.tournament_id).exclude(bracket=''))
+    replay = Replay(schedule, matches)
+    getattr(replay, schedule.format)()
+    if not replay.new:
+        return 0
+    timetable = Timetable(schedule, len(replay.seeds))
+    for match in matches:
+        timetable.book(match.bracket, match.round_number)
+    new = [
+        Match(
+            match_type=label,
+            match_time=timetable.book(bracket, round_number),
+            team_a_id=a,
+            team_b_id=b,
+            tournament_id=schedule.tournament_id,
+            bracket=bracket,
+            round_number=round_number,
+            bracket_slot=slot,
+            video_link='',
+        )
+        for bracket, round_number, slot, a, b, label in replay.new
+    ]
+    # matches entered by hand may already hold a (match_type, team_a,
+    # team_b) the schedule needs, which unique_match would refuse
+    keys = {(match.match_type, match.team_a_id, match.team_b_id) for match in new}
+    taken = [
+        match for match in Match.objects.for_display().filter(
+            team_a_id__in={team_a_id for match_type, team_a_id, team_b_id in keys},
+            match_type__in={match_type for match_type, team_a_id, team_b_id in keys},
+        )
+        if (match.match_type, match.team_a_id, match.team_b_id) in keys
+    ]
+    if taken:
+        raise SchedulingError('The schedule would repeat existing matches: {}.'.format(
+            ', '.join(str(match) for match in taken)
+        ))
+    with transaction.atomic():
+        last_pk = Match.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        Match.objects.bulk_create(new)
+        # bulk_create sends no signals, so refresh what they would have
+        search.update_documents(Match, Match.objects.filter(
+            tournament=schedule.tournament_id, pk__gt=last_pk
+        ).values_list('pk', flat=True))
+    standings.update([schedule.tournament_id])
+    stats.update_teams({team_id for match in new for team_id in (match.team_a_id, match.team_b_id)})
+    cache.bump_model_version('match')
+    return len(new)
+
+
+def generate(tournament, format, match_length=datetime.timedelta(hours=1), parallel=None, rounds=None):
+    """Seed the tournament's teams and create the first matches of a schedule.
+
+    Teams are seeded by their current standing, then by name. Elimination
+    and Swiss rounds after the first are created by ``advance`` as results
+    come in.
+    """
+    if Schedule.objects.filter(tournament=tournament).exists():
+        raise SchedulingError('{} already has a schedule.'.format(tournament))
+    team_ids = list(Team.objects.filter(tournament=tournament).order_by(
+        'standing__rank', 'team_name', 'pk'
+    ).values_list('pk', flat=True))
+    if len(team_ids) < 2:
+        raise SchedulingError('A schedule needs at least two teams.')
+    with transaction.atomic():
+        schedule = Schedule.objects.create(
+            tournament=tournament,
+            format=format,
+            match_length=match_length,
+            parallel=parallel,
+            rounds=rounds,
+        )
+        Seed.objects.bulk_create([
+            Seed(schedule=schedule, team_id=team_id, seed=seed)
+            for seed, team_id in enumerate(team_ids, start=1)
+        ])
+        # fail before creating anything if the dates can't fit the schedule
+        Timetable(schedule, len(team_ids))
+        advance(schedule)
+    return schedule
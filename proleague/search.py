@@ -0,0 +1,300 @@
+import re
+from itertools import islice
+
+from django.apps import apps
+from django.db import connection
+
+from .models import SearchDocument
+
+
+FTS_TABLE = 'proleague_searchdocument_fts'
+
+# model_name -> (relations to join, fields making up the document body),
+# in the order results are grouped for the global search
+DOCUMENTS = {
+    'game': (
+        (),
+        ('game_name', 'genre', 'developer'),
+    ),
+    'tournament': (
+        ('year', 'period', 'game'),
+        ('tournament_name', 'year.year', 'period.period_name', 'game.game_name'),
+    ),
+    'team': (
+        (),
+        ('team_name', 'acronym'),
+    ),
+    'match': (
+        ('tournament', 'team_a', 'team_b'),
+        (
+            'match_type',
+            'team_a.team_name', 'team_a.acronym',
+            'team_b.team_name', 'team_b.acronym',
+            'tournament.tournament_name',
+        ),
+    ),
+    'school': (
+        (),
+        ('school_name', 'city', 'state'),
+    ),
+    'player': (
+        (),
+        ('player_name', 'gamer_tag'),
+    ),
+}
+
+
+def _resolve(obj, path):
+    for attr in path.split('.'):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def document_body(obj):
+    fields = DOCUMENTS[obj._meta.model_name][1]
+    return ' '.join(str(_resolve(obj, field)) for field in fields)
+
+
+def _documents(model, queryset):
+    related = DOCUMENTS[model._meta.model_name][0]
+    for obj in queryset.select_related(*related).iterator():
+        yield SearchDocument(
+            kind=model._meta.model_name,
+            object_id=obj.pk,
+            title=str(obj)[:512],
+            body=document_body(obj),
+        )
+
+
+def update_documents(model, pks):
+    pks = list(pks)
+    remove_documents(model, pks)
+    SearchDocument.objects.bulk_create(
+        _documents(model, model.objects.filter(pk__in=pks))
+    )
+
+
+def remove_documents(model, pks):
+    SearchDocument.objects.filter(
+        kind=model._meta.model_name,
+        object_id__in=pks,
+    ).delete()
+
+
+def rebuild(model_names=None, batch_size=1000):
+    for model_name in model_names or DOCUMENTS:
+        model = apps.get_model('proleague', model_name)
+        SearchDocument.objects.filter(kind=model_name).delete()
+        documents = _documents(model, model._base_manager.all())
+        batch = list(islice(documents, batch_size))
+        while batch:
+            SearchDocument.objects.bulk_create(batch)
+            batch = list(islice(documents, batch_size))
+
+
+def fts5_available(using_connection=connection):
+    with using_connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+_fts_tables = {}
+
+
+def _has_fts_table():
+    if connection.vendor != 'sqlite':
+        return False
+    name = connection.settings_dict['NAME']
+    if name not in _fts_tables:
+        _fts_tables[name] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_tables[name]
+
+
+def _terms(keyword):
+    return re.findall(r'\w+', keyword or '')
+
+
+def _fts_terms(terms):
+    return ' AND '.join('"{}"*'.format(term) for term in terms)
+
+
+def _tsquery(terms):
+    return ' & '.join('{}:*'.format(term) for term in terms)
+
+
+def search_all(keyword, kinds=None, limit=5):
+    """Return the top ``limit`` documents of each kind matching ``keyword``.
+
+    All kinds are ranked in a single query; the result maps each kind, in
+    DOCUMENTS order, to a list of ``(object_id, title)`` pairs.
+    """
+    kinds = [kind for kind in DOCUMENTS if kinds is None or kind in kinds]
+    terms = _terms(keyword)
+    grouped = {kind: [] for kind in kinds}
+    if not terms or not kinds:
+        return grouped
+    table = SearchDocument._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql = (
+            "SELECT kind, object_id, title FROM ("
+            "SELECT kind, object_id, title, ROW_NUMBER() OVER ("
+            "PARTITION BY kind ORDER BY ts_rank(to_tsvector('simple', body), "
+            "to_tsquery('simple', %s)) DESC, object_id) AS position "
+            "FROM {table} WHERE kind IN ({kinds}) "
+            "AND to_tsvector('simple', body) @@ to_tsquery('simple', %s)"
+            ") ranked WHERE position <= %s ORDER BY kind, position"
+        ).format(table=table, kinds=', '.join(['%s'] * len(kinds)))
+        params = [_tsquery(terms)] + kinds + [_tsquery(terms), limit]
+    elif _has_fts_table():
+        sql = (
+            "SELECT kind, object_id, title FROM ("
+            "SELECT d.kind, d.object_id, d.title, ROW_NUMBER() OVER ("
+            "PARTITION BY d.kind ORDER BY {fts}.rank) AS position "
+            "FROM {fts} JOIN {table} d ON d.document_id = {fts}.rowid "
+            "WHERE {fts} MATCH %s"
+            ") WHERE position <= %s ORDER BY kind, position"
+        ).format(fts=FTS_TABLE, table=table)
+        params = [
+            'kind:({kinds}) AND body:({terms})'.format(
+                kinds=' OR '.join('"{}"'.format(kind) for kind in kinds),
+                terms=_fts_terms(terms),
+            ),
+            limit,
+        ]
+    else:
+        for kind in kinds:
+            documents = SearchDocument.objects.filter(kind=kind)
+            for term in terms:
+                documents = documents.filter(body__icontains=term)
+            grouped[kind].extend(
+                documents.order_by('object_id').values_list('object_id', 'title')[:limit]
+            )
+        return grouped
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for kind, object_id, title in cursor.fetchall():
+            grouped[kind].append((object_id, title))
+    return grouped
+
+
+class SearchResults:
+    """Ranked full-text matches for ``queryset``'s model.
+
+    Supports ``count()`` and slicing, so it can be handed to a Paginator;
+    only the requested slice of objects is loaded from ``queryset``. A
+    filtered ``queryset`` also narrows the matches.
+    """
+
+    def __init__(self, queryset, keyword):
+        self.queryset = queryset
+        self.kind = queryset.model._meta.model_name
+        self.terms = _terms(keyword)
+        self._count = None
+
+    def _sqlite_match(self):
+        return 'kind:"{kind}" AND body:({terms})'.format(
+            kind=self.kind,
+            terms=_fts_terms(self.terms),
+        )
+
+    def _postgresql_query(self):
+        return _tsquery(self.terms)
+
+    def _fetch(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+    def _restriction(self, column):
+        """Limit ``column`` to the rows of ``queryset``, if it is filtered."""
+        if not self.queryset.query.where:
+            return '', []
+        sql, params = self.queryset.order_by().values('pk').query.sql_with_params()
+        return ' AND {} IN ({})'.format(column, sql), list(params)
+
+    def _ids(self, offset, limit):
+        table = SearchDocument._meta.db_table
+        if connection.vendor == 'postgresql':
+            restriction, params = self._restriction('object_id')
+            return self._fetch(
+                "SELECT object_id FROM {table} "
+                "WHERE kind = %s AND to_tsvector('simple', body) @@ to_tsquery('simple', %s){restriction} "
+                "ORDER BY ts_rank(to_tsvector('simple', body), to_tsquery('simple', %s)) DESC, "
+                "object_id LIMIT %s OFFSET %s".format(table=table, restriction=restriction),
+                [self.kind, self._postgresql_query()] + params + [self._postgresql_query(), limit, offset],
+            )
+        if _has_fts_table():
+            restriction, params = self._restriction('d.object_id')
+            return self._fetch(
+                "SELECT d.object_id FROM {fts} "
+                "JOIN {table} d ON d.document_id = {fts}.rowid "
+                "WHERE {fts} MATCH %s{restriction} ORDER BY {fts}.rank LIMIT %s OFFSET %s".format(
+                    fts=FTS_TABLE, table=table, restriction=restriction
+                ),
+                [self._sqlite_match()] + params + [-1 if limit is None else limit, offset],
+            )
+        documents = self._fallback().order_by('object_id')
+        if limit is not None:
+            documents = documents[offset:offset + limit]
+        else:
+            documents = documents[offset:]
+        return list(documents.values_list('object_id', flat=True))
+
+    def _fallback(self):
+        documents = SearchDocument.objects.filter(kind=self.kind)
+        if self.queryset.query.where:
+            documents = documents.filter(object_id__in=self.queryset.order_by().values('pk'))
+        for term in self.terms:
+            documents = documents.filter(body__icontains=term)
+        return documents
+
+    def count(self, limit=None):
+        """Count the matches, or stop counting at ``limit`` if given."""
+        if limit is None and self._count is not None:
+            return self._count
+        if not self.terms:
+            count = 0
+        elif connection.vendor == 'postgresql':
+            restriction, params = self._restriction('object_id')
+            count = self._fetch(
+                "SELECT COUNT(*) FROM (SELECT 1 FROM {table} "
+                "WHERE kind = %s AND to_tsvector('simple', body) @@ to_tsquery('simple', %s){restriction} "
+                "LIMIT %s) matches".format(table=SearchDocument._meta.db_table, restriction=restriction),
+                [self.kind, self._postgresql_query()] + params + [limit],
+            )[0]
+        elif _has_fts_table():
+            restriction, params = self._restriction('d.object_id')
+            join = ' JOIN {table} d ON d.document_id = {fts}.rowid'.format(
+                table=SearchDocument._meta.db_table, fts=FTS_TABLE
+            ) if restriction else ''
+            count = self._fetch(
+                'SELECT COUNT(*) FROM (SELECT 1 FROM {fts}{join} WHERE {fts} MATCH %s{restriction} LIMIT %s)'.format(
+                    fts=FTS_TABLE, join=join, restriction=restriction
+                ),
+                [self._sqlite_match()] + params + [-1 if limit is None else limit],
+            )[0]
+        elif limit is None:
+            count = self._fallback().count()
+        else:
+            count = self._fallback()[:limit].count()
+        if limit is None:
+            self._count = count
+        return count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        offset = key.start or 0
+        if not self.terms or (key.stop is not None and key.stop <= offset):
+            return []
+        limit = None if key.stop is None else key.stop - offset
+        ids = self._ids(offset, limit)
+        objects = self.queryset.in_bulk(ids)
+        return [objects[pk] for pk in ids if pk in objects]
+
+
+def search(queryset, keyword):
+    return SearchResults(queryset, keyword)
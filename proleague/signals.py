@@ -0,0 +1,181 @@
+from django.contrib.auth.models import Group, Permission, User
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import backends, cache, scheduling, search, standings, stats
+from .models import (
+    Period, Year, Position, Game, Tournament, Team, Match, MatchReport, MatchGame, PlayerGameStat, School, Player,
+    Standing, Schedule,
+)
+
+
+@receiver(post_save, sender=Game)
+@receiver(post_save, sender=Tournament)
+@receiver(post_save, sender=Team)
+@receiver(post_save, sender=Match)
+@receiver(post_save, sender=School)
+@receiver(post_save, sender=Player)
+def index_object(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.update_documents(sender, [instance.pk])
+
+
+@receiver(post_delete, sender=Game)
+@receiver(post_delete, sender=Tournament)
+@receiver(post_delete, sender=Team)
+@receiver(post_delete, sender=Match)
+@receiver(post_delete, sender=School)
+@receiver(post_delete, sender=Player)
+def unindex_object(sender, instance, **kwargs):
+    search.remove_documents(sender, [instance.pk])
+
+
+# documents also carry the names of related objects, so renaming one of
+# those re-indexes its dependents
+
+@receiver(post_save, sender=Year)
+@receiver(post_save, sender=Period)
+@receiver(post_save, sender=Game)
+def index_tournaments(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.update_documents(Tournament, Tournament.objects.filter(
+            **{sender._meta.model_name: instance}
+        ).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Tournament)
+def index_tournament_matches(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.update_documents(Match, instance.matches.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Team)
+def index_team_matches(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.update_documents(Match, Match.objects.filter(
+            Q(team_a=instance) | Q(team_b=instance)
+        ).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Game)
+@receiver(post_save, sender=Tournament)
+@receiver(post_save, sender=Team)
+@receiver(post_save, sender=Match)
+@receiver(post_save, sender=School)
+@receiver(post_save, sender=Player)
+@receiver(post_delete, sender=Game)
+@receiver(post_delete, sender=Tournament)
+@receiver(post_delete, sender=Team)
+@receiver(post_delete, sender=Match)
+@receiver(post_delete, sender=School)
+@receiver(post_delete, sender=Player)
+def invalidate_cache(sender, instance, **kwargs):
+    cache.bump_version(sender._meta.model_name, instance.pk)
+
+
+# a match's report and games are shown on its page, and a player's game
+# stats on theirs
+
+@receiver(post_save, sender=MatchReport)
+@receiver(post_save, sender=MatchGame)
+@receiver(post_delete, sender=MatchReport)
+@receiver(post_delete, sender=MatchGame)
+def invalidate_match(sender, instance, **kwargs):
+    cache.bump_version('match', instance.match_id)
+
+
+@receiver(post_save, sender=PlayerGameStat)
+@receiver(post_delete, sender=PlayerGameStat)
+def invalidate_player_and_match(sender, instance, **kwargs):
+    cache.bump_version('player', instance.player_id)
+    match_id = MatchGame.objects.filter(pk=instance.game_id).values_list('match_id', flat=True).first()
+    if match_id is not None:
+        cache.bump_version('match', match_id)
+
+
+@receiver(post_save, sender=Year)
+@receiver(post_save, sender=Period)
+@receiver(post_save, sender=Position)
+@receiver(post_delete, sender=Year)
+@receiver(post_delete, sender=Period)
+@receiver(post_delete, sender=Position)
+def invalidate_pages(sender, instance, **kwargs):
+    cache.bump_model_version(sender._meta.model_name)
+
+
+@receiver(pre_save, sender=Match)
+def remember_match_teams(sender, instance, raw=False, **kwargs):
+    # a match moved to other teams or another tournament leaves their
+    # tables and stats to recompute too
+    instance._previous = None
+    if not raw and instance.pk is not None:
+        instance._previous = Match.objects.filter(pk=instance.pk).values(
+            'tournament_id', 'team_a_id', 'team_b_id'
+        ).first()
+
+
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+def update_match_summaries(sender, instance, raw=False, **kwargs):
+    if not raw:
+        previous = getattr(instance, '_previous', None) or {}
+        standings.update([instance.tournament_id, previous.get('tournament_id')])
+        stats.update_teams([
+            instance.team_a_id, instance.team_b_id,
+            previous.get('team_a_id'), previous.get('team_b_id'),
+        ])
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+def update_team_standings(sender, instance, raw=False, **kwargs):
+    if not raw:
+        standings.update([instance.tournament_id] + list(
+            Standing.objects.filter(team_id=instance.pk).values_list('tournament_id', flat=True)
+        ))
+
+
+@receiver(post_save, sender=Match)
+def advance_schedule(sender, instance, raw=False, **kwargs):
+    # a result may settle who plays in the next bracket or Swiss round
+    if not raw and instance.bracket and instance.score_a is not None:
+        schedule = Schedule.objects.filter(tournament_id=instance.tournament_id).first()
+        if schedule is not None:
+            try:
+                scheduling.advance(schedule)
+            except scheduling.SchedulingError:
+                # the tournament dates no longer fit, or a match entered by
+                # hand is in the way; the next result retries
+                pass
+
+
+# cached users and permission sets
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    backends.invalidate_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_user_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        backends.invalidate_user(instance.pk)
+    elif pk_set:
+        for user_id in pk_set:
+            backends.invalidate_user(user_id)
+    else:
+        # a group or permission cleared of all its users
+        backends.invalidate_all_users()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def invalidate_group_permissions(sender, **kwargs):
+    if kwargs.get('action', 'post_').startswith('post_'):
+        backends.invalidate_all_users()
@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Team, Match, Standing, Tournament, TournamentSummary
+
+
+POINTS_FOR_WIN = getattr(settings, 'PROLEAGUE_POINTS_FOR_WIN', 3)
+POINTS_FOR_DRAW = getattr(settings, 'PROLEAGUE_POINTS_FOR_DRAW', 1)
+POINTS_FOR_LOSS = getattr(settings, 'PROLEAGUE_POINTS_FOR_LOSS', 0)
+
+# one row per team of the tournament, aggregated over the played matches
+# seen from both sides
+RESULTS_SQL = (
+    "SELECT t.team_id, "
+    "COUNT(r.team_id), "
+    "COALESCE(SUM(CASE WHEN r.scored > r.conceded THEN 1 ELSE 0 END), 0), "
+    "COALESCE(SUM(CASE WHEN r.scored = r.conceded THEN 1 ELSE 0 END), 0), "
+    "COALESCE(SUM(CASE WHEN r.scored < r.conceded THEN 1 ELSE 0 END), 0), "
+    "COALESCE(SUM(r.scored), 0), "
+    "COALESCE(SUM(r.conceded), 0) "
+    "FROM {team} t LEFT JOIN ("
+    "SELECT team_a_id AS team_id, score_a AS scored, score_b AS conceded FROM {match} "
+    "WHERE tournament_id = %s AND score_a IS NOT NULL AND score_b IS NOT NULL "
+    "UNION ALL "
+    "SELECT team_b_id, score_b, score_a FROM {match} "
+    "WHERE tournament_id = %s AND score_a IS NOT NULL AND score_b IS NOT NULL"
+    ") r ON r.team_id = t.team_id "
+    "WHERE t.tournament_id = %s "
+    "GROUP BY t.team_id, t.team_name "
+    "ORDER BY t.team_name, t.team_id"
+)
+
+# the tournament's row of totals, counted through match_tournament_idx
+SUMMARY_SQL = (
+    "INSERT INTO {summary} (tournament_id, matches, timed_matches, total_duration) "
+    "SELECT t.tournament_id, COUNT(m.match_id), COUNT(m.duration), SUM(m.duration) "
+    "FROM {tournament} t LEFT JOIN {match} m ON m.tournament_id = t.tournament_id "
+    "WHERE t.tournament_id = %s "
+    "GROUP BY t.tournament_id "
+    "ON CONFLICT (tournament_id) DO UPDATE SET matches = excluded.matches, "
+    "timed_matches = excluded.timed_matches, total_duration = excluded.total_duration"
+)
+
+
+def compute(tournament_id):
+    """Return unsaved, ranked Standing rows for every team of a tournament.
+
+    Teams are ranked on points, then score difference, then score for;
+    teams level on all three share a rank.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            RESULTS_SQL.format(team=Team._meta.db_table, match=Match._meta.db_table),
+            [tournament_id] * 3,
+        )
+        rows = cursor.fetchall()
+    standings = [
+        Standing(
+            tournament_id=tournament_id,
+            team_id=team_id,
+            played=played,
+            wins=wins,
+            draws=draws,
+            losses=losses,
+            score_for=score_for,
+            score_against=score_against,
+            points=wins * POINTS_FOR_WIN + draws * POINTS_FOR_DRAW + losses * POINTS_FOR_LOSS,
+        )
+        for team_id, played, wins, draws, losses, score_for, score_against in rows
+    ]
+
+    def tiebreakers(standing):
+        return standing.points, standing.score_difference, standing.score_for
+
+    # stable, so level teams stay in team name order
+    standings.sort(key=tiebreakers, reverse=True)
+    for position, standing in enumerate(standings, start=1):
+        previous = standings[position - 2] if position > 1 else None
+        if previous is not None and tiebreakers(previous) == tiebreakers(standing):
+            standing.rank = previous.rank
+        else:
+            standing.rank = position
+    return standings
+
+
+def summarize(tournament_id):
+    """Store the TournamentSummary of a tournament, if it still exists."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            SUMMARY_SQL.format(
+                summary=TournamentSummary._meta.db_table,
+                match=Match._meta.db_table,
+                tournament=Tournament._meta.db_table,
+            ),
+            [tournament_id],
+        )
+
+
+def update(tournament_ids):
+    """Recompute and store the table and summary of each tournament in ``tournament_ids``."""
+    for tournament_id in set(tournament_ids) - {None}:
+        standings = compute(tournament_id)
+        with transaction.atomic():
+            # a team that just moved here may still hold its old row
+            Standing.objects.filter(
+                Q(tournament_id=tournament_id) | Q(team_id__in=[s.team_id for s in standings])
+            ).delete()
+            Standing.objects.bulk_create(standings)
+            summarize(tournament_id)
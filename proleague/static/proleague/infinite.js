@@ -0,0 +1,64 @@
+// Keep appending rows to lists with a data-more-url as they scroll into
+// view. Each batch comes from the list's ?format=json fragment, which
+// carries the URL of the batch after it; the page links stay as they are
+// for browsers without IntersectionObserver or fetch.
+(function () {
+    'use strict';
+
+    function fragmentUrl(url) {
+        var fragment = new URL(url, window.location.href);
+        fragment.searchParams.set('format', 'json');
+        return fragment;
+    }
+
+    function follow(list) {
+        var sentinel = document.createElement('div');
+        var loading = false;
+        var observer = new IntersectionObserver(function (entries) {
+            if (loading || !entries.some(function (entry) { return entry.isIntersecting; })) {
+                return;
+            }
+            loading = true;
+            fetch(fragmentUrl(list.dataset.moreUrl), {
+                credentials: 'same-origin',
+                headers: {'Accept': 'application/json'}
+            }).then(function (response) {
+                if (!response.ok) {
+                    throw new Error(response.statusText);
+                }
+                return response.json();
+            }).then(function (fragment) {
+                list.insertAdjacentHTML('beforeend', fragment.html);
+                loading = false;
+                if (fragment.more_url) {
+                    list.dataset.moreUrl = fragment.more_url;
+                } else {
+                    observer.disconnect();
+                    sentinel.remove();
+                }
+            }).catch(function () {
+                // leave the page links to it
+                observer.disconnect();
+                sentinel.remove();
+                document.querySelectorAll('.pagination').forEach(function (links) {
+                    links.hidden = false;
+                });
+            });
+        });
+        list.after(sentinel);
+        observer.observe(sentinel);
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        if (!('IntersectionObserver' in window) || !('fetch' in window)) {
+            return;
+        }
+        var lists = document.querySelectorAll('ul[data-more-url]:not([data-more-url=""])');
+        lists.forEach(follow);
+        if (lists.length) {
+            document.querySelectorAll('.pagination').forEach(function (links) {
+                links.hidden = true;
+            });
+        }
+    });
+})();
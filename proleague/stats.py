@@ -0,0 +1,99 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Team, Match, TeamStats, HeadToHead
+
+
+# every match seen from both sides; {where} narrows each side to some teams
+SIDES_SQL = (
+    "SELECT team_a_id AS team_id, team_b_id AS opponent_id, score_a AS scored, "
+    "score_b AS conceded, match_time, duration FROM {match} WHERE 1 = 1 {where_a} "
+    "UNION ALL "
+    "SELECT team_b_id, team_a_id, score_b, score_a, match_time, duration FROM {match} "
+    "WHERE 1 = 1 {where_b}"
+)
+
+PLAYED = "r.scored IS NOT NULL AND r.conceded IS NOT NULL"
+
+RECORD_SQL = (
+    "COALESCE(SUM(CASE WHEN {played} THEN 1 ELSE 0 END), 0), "
+    "COALESCE(SUM(CASE WHEN {played} AND r.scored > r.conceded THEN 1 ELSE 0 END), 0), "
+    "COALESCE(SUM(CASE WHEN {played} AND r.scored = r.conceded THEN 1 ELSE 0 END), 0), "
+    "COALESCE(SUM(CASE WHEN {played} AND r.scored < r.conceded THEN 1 ELSE 0 END), 0), "
+    "COALESCE(SUM(CASE WHEN {played} THEN r.scored ELSE 0 END), 0), "
+    "COALESCE(SUM(CASE WHEN {played} THEN r.conceded ELSE 0 END), 0)"
+).format(played=PLAYED)
+
+TEAM_STATS_SQL = (
+    "INSERT INTO {stats} (team_id, matches, played, wins, draws, losses, "
+    "score_for, score_against, last_match_time, average_duration, updated_at) "
+    "SELECT t.team_id, COUNT(r.team_id), {record}, MAX(r.match_time), AVG(r.duration), %s "
+    "FROM {team} t LEFT JOIN ({sides}) r ON r.team_id = t.team_id "
+    "WHERE 1 = 1 {where} "
+    "GROUP BY t.team_id"
+)
+
+HEAD_TO_HEAD_SQL = (
+    "INSERT INTO {head_to_head} (team_id, opponent_id, played, wins, draws, losses, "
+    "score_for, score_against, updated_at) "
+    "SELECT r.team_id, r.opponent_id, {record}, %s "
+    "FROM ({sides}) r WHERE {played} "
+    "GROUP BY r.team_id, r.opponent_id"
+)
+
+
+def _in(column, team_ids):
+    if team_ids is None:
+        return '', []
+    return 'AND {} IN ({})'.format(column, ', '.join(['%s'] * len(team_ids))), list(team_ids)
+
+
+def _refresh(team_ids):
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    where_a, params_a = _in('team_a_id', team_ids)
+    where_b, params_b = _in('team_b_id', team_ids)
+    where, params = _in('t.team_id', team_ids)
+    sides = SIDES_SQL.format(match=Match._meta.db_table, where_a=where_a, where_b=where_b)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            TEAM_STATS_SQL.format(
+                stats=TeamStats._meta.db_table,
+                team=Team._meta.db_table,
+                record=RECORD_SQL,
+                sides=sides,
+                where=where,
+            ),
+            [now] + params_a + params_b + params,
+        )
+        cursor.execute(
+            HEAD_TO_HEAD_SQL.format(
+                head_to_head=HeadToHead._meta.db_table,
+                record=RECORD_SQL,
+                sides=sides,
+                played=PLAYED,
+            ),
+            [now] + params_a + params_b,
+        )
+
+
+def update_teams(team_ids, batch_size=500):
+    """Recompute the stats and head-to-head rows of the given teams.
+
+    Called for the teams of each saved or deleted match, so only the
+    affected teams' matches are read.
+    """
+    team_ids = sorted(set(team_ids) - {None})
+    for start in range(0, len(team_ids), batch_size):
+        batch = team_ids[start:start + batch_size]
+        with transaction.atomic():
+            TeamStats.objects.filter(team_id__in=batch).delete()
+            HeadToHead.objects.filter(team_id__in=batch).delete()
+            _refresh(batch)
+
+
+def rebuild():
+    """Recompute every stats and head-to-head row with two INSERT ... SELECTs."""
+    with transaction.atomic():
+        TeamStats.objects.all().delete()
+        HeadToHead.objects.all().delete()
+        _refresh(None)
@@ -0,0 +1,263 @@
+import datetime
+import random
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import cache, search, standings, stats
+from .models import (
+    Period, Year, Position, Game, Tournament, Team, Match, MatchReport, MatchGame, PlayerGameStat, School, Player,
+)
+
+
+# (game_name, genre, website, developer, developer_website, maps)
+GAMES = [
+    ('League of Legends', 'MOBA', 'https://www.leagueoflegends.com', 'Riot Games',
+     'https://www.riotgames.com', ["Summoner's Rift"]),
+    ('Overwatch', 'FPS', 'https://overwatch.blizzard.com', 'Blizzard Entertainment',
+     'https://www.blizzard.com', ['Hollywood', 'Route 66', 'Lijiang Tower', 'Ilios']),
+    ('Rocket League', 'Sports', 'https://www.rocketleague.com', 'Psyonix',
+     'https://www.psyonix.com', ['DFH Stadium', 'Mannfield', 'Champions Field']),
+]
+PERIODS = [(1, 'Spring'), (2, 'Fall')]
+POSITIONS = [(1, '1st Place'), (2, '2nd Place'), (3, '3rd - 4th Place'), (4, '5th - 8th Place'), (5, '9th - 16th Place')]
+SYLLABLES = ['ka', 'ri', 'to', 'ne', 'lo', 'sa', 'mi', 'ra', 'ven', 'dor', 'el', 'an', 'zu', 'qi', 'ba', 'the']
+MASCOTS = ['Owls', 'Comets', 'Wolves', 'Titans', 'Falcons', 'Rangers', 'Pilots', 'Foxes', 'Knights', 'Hornets']
+STATES = [('Urbana', 'IL'), ('Madison', 'WI'), ('Ann Arbor', 'MI'), ('Columbus', 'OH'), ('Austin', 'TX')]
+
+TEAMS_PER_TOURNAMENT = 8
+PLAYERS_PER_TEAM = 5
+SCHOOLS_PER_SEASON = 10
+
+
+def _insert(model, objects, batch_size=1000):
+    """bulk_create ``objects`` and set their pks, which SQLite doesn't return."""
+    last_pk = model.objects.aggregate(last=Max('pk'))['last'] or 0
+    model.objects.bulk_create(objects, batch_size=batch_size)
+    if objects and objects[0].pk is None:
+        # rows get increasing ids in insertion order, and the transaction
+        # keeps other writers out
+        pks = model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)
+        for obj, pk in zip(objects, pks):
+            obj.pk = pk
+    return objects
+
+
+class LeagueGenerator:
+    """Fabricate seasons of league data with bulk inserts.
+
+    A season is one year of a spring and a fall tournament per game, each
+    of ``teams`` teams playing ``matches`` best of three matches, with
+    reports, games and per-player lines. The matches go through the round
+    robin of the teams, again with sides swapped once it runs out; without
+    ``matches`` it is played once. Names are built from ``seed`` and the
+    existing row counts, so runs can be repeated and stacked on one
+    database.
+    """
+
+    def __init__(self, seed=0, teams=TEAMS_PER_TOURNAMENT, matches=None):
+        self.random = random.Random(seed)
+        self.teams = teams
+        self.matches_per_tournament = matches
+
+    def name(self, parts=2):
+        return ''.join(self.random.choice(SYLLABLES) for _ in range(parts)).capitalize()
+
+    def lookups(self):
+        periods = []
+        for sequence, name in PERIODS:
+            period = Period.objects.filter(period_name=name).first()
+            if period is None:
+                taken = Period.objects.aggregate(last=Max('period_sequence'))['last'] or 0
+                period = Period.objects.create(period_name=name, period_sequence=max(sequence, taken + 1))
+            periods.append(period)
+        if not Position.objects.exists():
+            Position.objects.bulk_create([
+                Position(position_sequence=sequence, position_name=name) for sequence, name in POSITIONS
+            ])
+        self.positions = list(Position.objects.all())
+        games = [
+            (Game.objects.get_or_create(game_name=name, genre=genre, defaults={
+                'website': website, 'developer': developer, 'developer_website': developer_website,
+            })[0], maps)
+            for name, genre, website, developer, developer_website, maps in GAMES
+        ]
+        return periods, games
+
+    def schools(self, count):
+        offset = School.objects.count()
+        schools = []
+        for n in range(offset, offset + count):
+            city, state = STATES[n % len(STATES)]
+            schools.append(School(school_name='{} University {}'.format(self.name(), n), city=city, state=state))
+        return _insert(School, schools)
+
+    def season(self, year, periods, games, schools):
+        year, created = Year.objects.get_or_create(year=year)
+        tournaments = []
+        for period in periods:
+            month = 2 if period.period_sequence == 1 else 9
+            for game, maps in games:
+                tournaments.append(Tournament(
+                    tournament_name='{} {} {} League'.format(year.year, period.period_name, game.game_name),
+                    start_date=datetime.date(year.year, month, 1),
+                    end_date=datetime.date(year.year, month + 2, 28),
+                    year=year,
+                    period=period,
+                    game=game,
+                ))
+        tournaments = [
+            tournament for tournament in tournaments
+            if not Tournament.objects.filter(
+                year=year, period=tournament.period, tournament_name=tournament.tournament_name
+            ).exists()
+        ]
+        _insert(Tournament, tournaments)
+        maps = {game.pk: game_maps for game, game_maps in games}
+        team_offset = Team.objects.aggregate(last=Max('pk'))['last'] or 0
+        teams = []
+        for tournament in tournaments:
+            names = set()
+            while len(names) < self.teams:
+                names.add('{} {}'.format(self.name(), self.random.choice(MASCOTS)))
+            for name in sorted(names):
+                team_offset += 1
+                teams.append(Team(team_name=name, acronym='GEN{}'.format(team_offset), tournament=tournament))
+        _insert(Team, teams)
+        players = _insert(Player, [
+            Player(
+                player_name='{} {}'.format(self.name(), self.name(3)),
+                gamer_tag='{}{}'.format(self.name(), team.pk * PLAYERS_PER_TEAM + n),
+                email='player{}.{}@example.org'.format(team.pk, n),
+                phone_number='555-{:04}'.format(self.random.randrange(10000)),
+                school=self.random.choice(schools),
+                team=team,
+            )
+            for team in teams
+            for n in range(PLAYERS_PER_TEAM)
+        ])
+        roster = {}
+        for player in players:
+            roster.setdefault(player.team_id, []).append(player)
+        self.matches(tournaments, teams, roster, maps)
+        return tournaments
+
+    def pairs(self, entrants):
+        robin = [(a, b) for i, a in enumerate(entrants) for b in entrants[i + 1:]]
+        if self.matches_per_tournament is None:
+            return robin
+        return [
+            robin[n % len(robin)][::1 if n // len(robin) % 2 == 0 else -1]
+            for n in range(self.matches_per_tournament)
+        ]
+
+    def matches(self, tournaments, teams, roster, maps):
+        by_tournament = {}
+        for team in teams:
+            by_tournament.setdefault(team.tournament_id, []).append(team)
+        today = timezone.localdate()
+        matches, results = [], []
+        for tournament in tournaments:
+            entrants = by_tournament[tournament.pk]
+            pairs = self.pairs(entrants)
+            span = (tournament.end_date - tournament.start_date).days
+            for n, (a, b) in enumerate(pairs):
+                day = tournament.start_date + datetime.timedelta(days=span * n // len(pairs))
+                played = day < today
+                games = []
+                if played:
+                    wins = {a.pk: 0, b.pk: 0}
+                    while max(wins.values()) < 2:
+                        winner = self.random.choice((a, b))
+                        wins[winner.pk] += 1
+                        games.append((self.random.choice(maps[tournament.game_id]), winner.pk == a.pk))
+                matches.append(Match(
+                    match_type='Round {}'.format(n + 1),
+                    match_time=timezone.make_aware(datetime.datetime.combine(day, datetime.time(18 + n % 4))),
+                    duration=datetime.timedelta(minutes=self.random.randint(20, 50) * len(games)) if played else None,
+                    team_a=a,
+                    team_b=b,
+                    tournament=tournament,
+                    score_a=sum(a_won for map_name, a_won in games) if played else None,
+                    score_b=sum(not a_won for map_name, a_won in games) if played else None,
+                    video_link='https://video.example.org/{}/{}'.format(tournament.pk, n),
+                ))
+                results.append(games)
+        _insert(Match, matches)
+        self.place(tournaments, by_tournament, matches, today)
+        reports, match_games = [], []
+        for match, games in zip(matches, results):
+            if not games:
+                continue
+            lines = []
+            for number, (map_name, a_won) in enumerate(games, start=1):
+                score_a, score_b = (self.random.randint(5, 13), self.random.randint(0, 4))[::1 if a_won else -1]
+                lines.append('Game {}: [{}] {} {}:{} {}; {} Won'.format(
+                    number, map_name, match.team_a.acronym, score_a, score_b, match.team_b.acronym,
+                    match.team_a.acronym if a_won else match.team_b.acronym,
+                ))
+                match_games.append(MatchGame(
+                    match=match, game_number=number, map_name=map_name, score_a=score_a, score_b=score_b
+                ))
+            reports.append(MatchReport(match=match, detail='\n'.join(lines)))
+        _insert(MatchReport, reports)
+        _insert(MatchGame, match_games)
+        _insert(PlayerGameStat, [
+            PlayerGameStat(
+                game=game,
+                player=player,
+                kills=self.random.randint(0, 20),
+                deaths=self.random.randint(0, 15),
+                assists=self.random.randint(0, 25),
+            )
+            for game in match_games
+            for team_id in (game.match.team_a_id, game.match.team_b_id)
+            for player in roster[team_id]
+        ], batch_size=2000)
+
+    def place(self, tournaments, by_tournament, matches, today):
+        # finished tournaments hand out positions by round robin wins
+        wins = {}
+        for match in matches:
+            if match.score_a is not None:
+                winner = match.team_a_id if match.score_a > match.score_b else match.team_b_id
+                wins[winner] = wins.get(winner, 0) + 1
+        placed = []
+        for tournament in tournaments:
+            if tournament.end_date >= today:
+                continue
+            ranked = sorted(by_tournament[tournament.pk], key=lambda team: -wins.get(team.pk, 0))
+            for rank, team in enumerate(ranked, start=1):
+                # positions are bracket finishes: 1st, 2nd, 3rd - 4th, 5th - 8th...
+                index = (rank - 1).bit_length()
+                if index < len(self.positions):
+                    team.position = self.positions[index]
+                    placed.append(team)
+        Team.objects.bulk_update(placed, ['position'], batch_size=500)
+
+
+def generate_league(scale, seed=0, first_year=None, teams=TEAMS_PER_TOURNAMENT, matches=None):
+    """Add ``scale`` seasons of league data and refresh everything derived from it.
+
+    ``teams`` and ``matches`` are per tournament, as for LeagueGenerator.
+    Returns the number of rows created per model name.
+    """
+    generator = LeagueGenerator(seed, teams=teams, matches=matches)
+    models = [Year, Tournament, Team, Player, School, Match, MatchReport, MatchGame, PlayerGameStat]
+    before = {model: model.objects.count() for model in models}
+    with transaction.atomic():
+        periods, games = generator.lookups()
+        last_year = Year.objects.aggregate(last=Max('year'))['last']
+        first_year = first_year or (last_year + 1 if last_year else timezone.localdate().year - scale + 1)
+        tournament_ids = []
+        for year in range(first_year, first_year + scale):
+            schools = generator.schools(SCHOOLS_PER_SEASON)
+            tournament_ids.extend(t.pk for t in generator.season(year, periods, games, schools))
+    # bulk_create sends no signals
+    search.rebuild()
+    stats.rebuild()
+    standings.update(tournament_ids)
+    for model in models + [Period, Position, Game]:
+        cache.bump_model_version(model._meta.model_name)
+    return {model._meta.model_name: model.objects.count() - before[model] for model in models}
@@ -0,0 +1,66 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from proleague import cache as row_cache
+
+register = template.Library()
+
+
+class CachedRowsNode(template.Node):
+    def __init__(self, fragment_name, sequence, loopvar, nodelist_loop, nodelist_empty):
+        self.fragment_name = fragment_name
+        self.sequence = sequence
+        self.loopvar = loopvar
+        self.nodelist_loop = nodelist_loop
+        self.nodelist_empty = nodelist_empty
+
+    def render(self, context):
+        objects = list(self.sequence.resolve(context, ignore_failures=True) or [])
+        if not objects:
+            return self.nodelist_empty.render(context)
+        keys = row_cache.row_keys(self.fragment_name, objects)
+        cached = row_cache.get_rows(keys)
+        rendered = {}
+        output = []
+        with context.push():
+            for obj, key in zip(objects, keys):
+                if key in cached:
+                    output.append(cached[key])
+                    continue
+                context[self.loopvar] = obj
+                rendered[key] = self.nodelist_loop.render(context)
+                output.append(rendered[key])
+        row_cache.set_rows(rendered, hits=len(objects) - len(rendered))
+        return mark_safe(''.join(output))
+
+
+@register.tag
+def cached_rows(parser, token):
+    """
+    Render each object of a list like ``{% for %}``, caching every row.
+
+    Usage::
+
+        {% cached_rows 'match_list' match_list as match %}
+            <li>{{ match }}</li>
+        {% empty %}
+            <li>No matches.</li>
+        {% endcached_rows %}
+
+    A row is re-rendered once the object, or a related object it displays
+    (see ``proleague.cache.ROW_DEPENDENCIES``), is saved or deleted.
+    """
+    bits = token.split_contents()
+    if len(bits) != 5 or bits[3] != 'as':
+        raise template.TemplateSyntaxError(
+            "'{}' tag requires the form: {{% {} 'name' list as item %}}".format(bits[0], bits[0])
+        )
+    fragment_name = parser.compile_filter(bits[1]).resolve({})
+    sequence = parser.compile_filter(bits[2])
+    nodelist_loop = parser.parse(('empty', 'endcached_rows'))
+    if parser.next_token().contents == 'empty':
+        nodelist_empty = parser.parse(('endcached_rows',))
+        parser.delete_first_token()
+    else:
+        nodelist_empty = template.NodeList()
+    return CachedRowsNode(fragment_name, sequence, bits[4], nodelist_loop, nodelist_empty)
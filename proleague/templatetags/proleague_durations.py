@@ -0,0 +1,10 @@
+from django import template
+
+from proleague.durations import format_duration
+
+register = template.Library()
+
+
+@register.filter
+def duration(value):
+    return format_duration(value)
@@ -1,3 +1,1250 @@
-from django.test import TestCase
+import datetime
+import json
+import os
+import tempfile
+import time
+import warnings
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F, Q
+from django.http import HttpResponse, QueryDict
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.deprecation import RemovedInDjango40Warning
+
+from . import benchmarks, deletion, profiling
+from .cache import row_cache_stats
+from .checks import check_version_cache
+from .durations import format_duration, parse_duration
+from .facets import MATCH_FACETS
+from .forms import MatchForm, TeamForm
+from .importers import import_rows
+from .models import (
+    Period, Year, Game, Tournament, Team, Match, MatchReport, MatchGame, PlayerGameStat, Player, School, Standing,
+    TeamStats, HeadToHead, Schedule, TournamentSummary,
+)
+from .pagination import CursorPaginator, encode_cursor
+from .scheduling import SchedulingError, generate
+from .search import search
+from .synthetic import generate_league
+
+
+class LeagueTestCase(TestCase):
+    permissions = ['view_match', 'view_team']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='secret-pass')
+        cls.user.user_permissions.set(
+            Permission.objects.filter(
+                content_type__app_label='proleague',
+                codename__in=cls.permissions,
+            )
+        )
+        year = Year.objects.create(year=2022)
+        period = Period.objects.create(period_sequence=1, period_name='Spring')
+        game = Game.objects.create(game_name='League of Legends', genre='MOBA')
+        cls.tournament = Tournament.objects.create(
+            tournament_name='Spring Split',
+            start_date=datetime.date(2022, 3, 1),
+            end_date=datetime.date(2022, 5, 1),
+            year=year,
+            period=period,
+            game=game,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def create_teams(self, count):
+        return [
+            Team.objects.create(
+                team_name='Team {}'.format(n),
+                acronym='T{}'.format(n),
+                tournament=self.tournament,
+            )
+            for n in range(count)
+        ]
+
+    def create_matches(self, teams, count):
+        match_time = timezone.make_aware(datetime.datetime(2022, 3, 1, 12))
+        return [
+            Match.objects.create(
+                match_type='Round {}'.format(n),
+                match_time=match_time + datetime.timedelta(hours=n),
+                duration=datetime.timedelta(minutes=35, seconds=12),
+                team_a=teams[n % len(teams)],
+                team_b=teams[(n + 1) % len(teams)],
+                video_link='',
+            )
+            for n in range(count)
+        ]
+
+    def warm_auth_cache(self):
+        # the first request loads the user and their permissions into the cache
+        self.client.get(reverse('about_urlpattern'))
+
+    def count_queries(self, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, data)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+
+class MatchQueryCountTests(LeagueTestCase):
+
+    def test_match_list_query_count_independent_of_page_size(self):
+        teams = self.create_teams(4)
+        self.create_matches(teams, 2)
+        url = reverse('proleague_match_list_urlpattern')
+        self.warm_auth_cache()
+        small = self.count_queries(url)
+        self.create_matches(teams[1:] + teams[:1], 23)
+        self.assertEqual(self.count_queries(url), small)
+
+    def test_match_search_query_count_independent_of_page_size(self):
+        teams = self.create_teams(4)
+        self.create_matches(teams, 2)
+        url = reverse('proleague_match_search_urlpattern')
+        # the first search looks up the full-text table once per process
+        self.count_queries(url, {'match_search': 'Round'})
+        small = self.count_queries(url, {'match_search': 'Round'})
+        self.create_matches(teams[1:] + teams[:1], 23)
+        self.assertEqual(self.count_queries(url, {'match_search': 'Round'}), small)
+
+    def test_team_detail_query_count_independent_of_match_count(self):
+        teams = self.create_teams(2)
+        self.create_matches(teams, 1)
+        url = teams[0].get_absolute_url()
+        self.warm_auth_cache()
+        small = self.count_queries(url)
+        self.create_matches(list(reversed(teams)), 6)
+        self.assertEqual(self.count_queries(url), small)
+
+
+class SearchTests(LeagueTestCase):
+
+    def test_search_ranks_and_follows_renames(self):
+        teams = self.create_teams(3)
+        self.create_matches(teams, 3)
+        self.assertEqual(search(Team.objects.all(), 't1').count(), 1)
+        self.assertEqual(search(Match.objects.all(), 'spring').count(), 3)
+        self.assertEqual(search(Match.objects.all(), 'spr rou').count(), 3)
+        self.assertEqual(search(Match.objects.all(), 'winter').count(), 0)
+        self.tournament.tournament_name = 'Winter Cup'
+        self.tournament.save()
+        self.assertEqual(search(Match.objects.all(), 'winter').count(), 3)
+        teams[0].team_name = 'Liquid'
+        teams[0].save()
+        results = search(Match.objects.for_display(), 'liquid')
+        self.assertEqual(
+            sorted(match.pk for match in results[:10]),
+            sorted(Match.objects.filter(
+                Q(team_a=teams[0]) | Q(team_b=teams[0])
+            ).values_list('pk', flat=True)),
+        )
+
+    def test_search_drops_deleted_players(self):
+        teams = self.create_teams(1)
+        school = School.objects.create(school_name='UIUC', city='Urbana', state='IL')
+        player = Player.objects.create(
+            player_name='River', email='', gamer_tag='rliu',
+            phone_number='', school=school, team=teams[0],
+        )
+        self.assertEqual(list(search(Player.objects.all(), 'rliu')[:5]), [player])
+        player.delete()
+        self.assertEqual(list(search(Player.objects.all(), 'rliu')[:5]), [])
+
+    def test_blank_keyword_finds_nothing(self):
+        self.create_teams(2)
+        self.assertEqual(search(Team.objects.all(), None).count(), 0)
+        self.assertEqual(search(Team.objects.all(), ' "* ').count(), 0)
+
+
+class GlobalSearchTests(LeagueTestCase):
+
+    def test_json_groups_results_by_permitted_kind(self):
+        teams = self.create_teams(2)
+        self.create_matches(teams, 2)
+        response = self.client.get(
+            reverse('proleague_search_urlpattern'),
+            {'q': 'team', 'format': 'json', 'limit': 1},
+        )
+        groups = {group['kind']: group['results'] for group in response.json()['groups']}
+        # schools are guarded by view_team, like SchoolList
+        self.assertEqual(list(groups), ['team', 'match', 'school'])
+        self.assertEqual(len(groups['team']), 1)
+        self.assertEqual(len(groups['match']), 1)
+        self.assertEqual(groups['match'][0]['title'], str(Match.objects.get(pk=groups['match'][0]['id'])))
+
+    def test_html_search_page(self):
+        self.create_teams(1)
+        response = self.client.get(reverse('proleague_search_urlpattern'), {'q': 't0'})
+        self.assertContains(response, 'Team 0 (T0)')
+
+
+class CursorPaginationTests(LeagueTestCase):
+
+    def test_cursor_pages_cover_every_match_once(self):
+        teams = self.create_teams(3)
+        matches = self.create_matches(teams, 12)
+        paginator = CursorPaginator(Match.objects.for_display(), 5)
+        seen = []
+        page = paginator.page(None)
+        self.assertFalse(page.has_previous())
+        while True:
+            seen.extend(page)
+            if not page.has_next():
+                break
+            next_page = paginator.page(page.next_cursor)
+            self.assertEqual(list(paginator.page(next_page.previous_cursor)), list(page))
+            page = next_page
+        self.assertEqual(seen, list(Match.objects.order_by('tournament_id', 'match_time', 'pk')))
+        self.assertEqual(len(seen), len(matches))
+        self.assertEqual(list(paginator.page(paginator.page(None).last_cursor)), seen[-5:])
+
+    def test_cursors_keep_microseconds(self):
+        matches = self.create_matches(self.create_teams(2), 3)
+        start = timezone.now().replace(microsecond=1000)
+        for n, match in enumerate(matches):
+            # all three within one millisecond
+            Match.objects.filter(pk=match.pk).update(match_time=start + datetime.timedelta(microseconds=n * 100))
+        paginator = CursorPaginator(Match.objects.order_by('match_time'), 1)
+        seen, page = [], paginator.page(None)
+        for n in range(len(matches)):
+            seen.extend(page)
+            if not page.has_next():
+                break
+            page = paginator.page(page.next_cursor)
+        self.assertEqual([match.pk for match in seen], [match.pk for match in matches])
+
+    def test_match_list_links_use_cursors(self):
+        teams = self.create_teams(3)
+        self.create_matches(teams, 30)
+        url = reverse('proleague_match_list_urlpattern')
+        response = self.client.get(url)
+        self.assertIsNone(response.context['first_page_url'])
+        self.assertContains(response, '30 results')
+        response = self.client.get(url + response.context['next_page_url'])
+        self.assertEqual(len(response.context['match_list']), 5)
+        self.assertIsNone(response.context['next_page_url'])
+        self.assertEqual(self.client.get(url, {'cursor': 'garbage'}).status_code, 200)
+        self.assertEqual(self.client.get(url, {'cursor': encode_cursor({'d': 'n', 'k': ['x', 'y', 'z']})}).status_code, 200)
+
+
+class QueryPlanTests(TestCase):
+
+    def test_view_queries_use_indexes(self):
+        call_command(
+            'check_query_plans',
+            skip=[
+                # Tournament.Meta.ordering sorts on year__year and
+                # period__period_sequence, columns of the joined Year and
+                # Period rows; an index on the tournament table can only
+                # hold their ids, so SQLite sorts the page
+                'tournament_list',
+                # the same ordering after narrowing to the game's
+                # tournaments through tournament_game_idx
+                'game_detail.tournaments',
+            ],
+            stdout=StringIO(),
+        )
+
+
+class MatchTournamentTests(LeagueTestCase):
+
+    def test_tournament_follows_team_a(self):
+        teams = self.create_teams(2)
+        match = self.create_matches(teams, 1)[0]
+        self.assertEqual(match.tournament, self.tournament)
+        other = Tournament.objects.create(
+            tournament_name='Summer Split',
+            start_date=datetime.date(2022, 6, 1),
+            end_date=datetime.date(2022, 8, 1),
+            year=self.tournament.year,
+            period=self.tournament.period,
+            game=self.tournament.game,
+        )
+        teams[0].tournament = other
+        teams[0].save()
+        match.refresh_from_db()
+        self.assertEqual(match.tournament, other)
+
+    def test_form_rejects_teams_from_different_tournaments(self):
+        team = self.create_teams(1)[0]
+        other = Tournament.objects.create(
+            tournament_name='Summer Split',
+            start_date=datetime.date(2022, 6, 1),
+            end_date=datetime.date(2022, 8, 1),
+            year=self.tournament.year,
+            period=self.tournament.period,
+            game=self.tournament.game,
+        )
+        stranger = Team.objects.create(team_name='Stranger', acronym='STR', tournament=other)
+        form = MatchForm(data={
+            'match_type': 'Final',
+            'match_time': '2022-03-01 12:00',
+            'duration': '35:12',
+            'team_a': team.pk,
+            'team_b': stranger.pk,
+            'match_detail': 'x',
+            'video_link': 'x',
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn('team_b', form.errors)
+        self.assertNotIn('tournament', form.fields)
+
+
+class RowCacheTests(LeagueTestCase):
+
+    def test_rows_are_cached_until_a_displayed_object_changes(self):
+        teams = self.create_teams(2)
+        self.create_matches(teams, 3)
+        # search results are not page-cached, so every request renders rows
+        url = reverse('proleague_match_search_urlpattern')
+        self.client.get(url, {'match_search': 'round'})
+        self.assertEqual(row_cache_stats(), {'hits': 0, 'misses': 3})
+        self.client.get(url, {'match_search': 'round'})
+        self.assertEqual(row_cache_stats(), {'hits': 3, 'misses': 3})
+        teams[0].acronym = 'LIQ'
+        teams[0].save()
+        response = self.client.get(url, {'match_search': 'round'})
+        self.assertContains(response, 'LIQ', count=3)
+        self.assertEqual(row_cache_stats(), {'hits': 3, 'misses': 6})
+
+
+class PageCacheTests(LeagueTestCase):
+
+    def test_pages_are_shared_by_permission_set_and_purged_on_change(self):
+        teams = self.create_teams(2)
+        url = reverse('proleague_team_list_urlpattern')
+        self.assertContains(self.client.get(url), 'Hello, tester')
+        twin = User.objects.create_user('twin', password='secret-pass')
+        twin.user_permissions.set(self.user.user_permissions.all())
+        self.client.force_login(twin)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, 'Hello, twin')
+        self.assertNotContains(response, 'tester')
+        self.assertFalse([q for q in queries if 'proleague_team' in q['sql']])
+        teams[0].team_name = 'Renamed'
+        teams[0].save()
+        self.assertContains(self.client.get(url), 'Renamed')
+
+    def test_cached_pages_still_check_permissions(self):
+        team = self.create_teams(1)[0]
+        self.client.get(team.get_absolute_url())
+        self.client.force_login(User.objects.create_user('other'))
+        self.assertEqual(self.client.get(team.get_absolute_url()).status_code, 403)
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(team.get_absolute_url()), 'Hello, tester')
+
+
+class ConditionalGetTests(LeagueTestCase):
+
+    def test_unchanged_detail_page_is_not_modified(self):
+        team = self.create_teams(2)[0]
+        url = team.get_absolute_url()
+        response = self.client.get(url)
+        self.assertTrue(response.has_header('Last-Modified'))
+        etag = response['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(len([q for q in queries if 'proleague_' in q['sql']]), 1)
+
+    def test_changed_relation_changes_the_etag(self):
+        teams = self.create_teams(2)
+        url = teams[0].get_absolute_url()
+        etag = self.client.get(url)['ETag']
+        self.create_matches(teams, 1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_validators_do_not_read_the_list(self):
+        self.create_teams(3)
+        url = reverse('proleague_team_list_urlpattern')
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertFalse([q for q in queries if 'proleague_' in q['sql']])
+
+    def test_list_etag_follows_deletions(self):
+        teams = self.create_teams(3)
+        url = reverse('proleague_team_list_urlpattern')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        teams[1].delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ImportLeagueTests(LeagueTestCase):
+
+    def import_file(self, kind, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w') as stream:
+            stream.write(content)
+        self.addCleanup(os.remove, path)
+        out, err = StringIO(), StringIO()
+        call_command('import_league', kind, path, batch_size=2, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_rows_are_imported_in_batches_with_errors_by_line(self):
+        School.objects.create(school_name='UIUC', city='Urbana', state='IL')
+        out, err = self.import_file('team', '.csv', (
+            'team_name,acronym,year,period,tournament\n'
+            'Red,RED,2022,Spring,Spring Split\n'
+            'Blue,BLU,2022,Spring,Spring Split\n'
+            'Green,GRN,2021,Spring,Spring Split\n'
+            'Again,RED,2022,Spring,Spring Split\n'
+        ))
+        self.assertIn('2 created, 2 rejected', out)
+        self.assertIn('line 4: tournament: No match for 2021 / Spring / Spring Split.', err)
+        self.assertIn('line 5: Team RED already exists.', err)
+        out, err = self.import_file('player', '.jsonl', (
+            '{"player_name": "Ann", "gamer_tag": "ann", "email": "a@x.org", '
+            '"phone_number": "1", "school": "UIUC", "team": "RED"}\n'
+            'not json\n'
+            '{"player_name": "Bob", "gamer_tag": "bob", "email": "b@x.org", '
+            '"phone_number": "2", "school": "UIUC", "team": "BLU"}\n'
+        ))
+        self.assertIn('2 created, 1 rejected', out)
+        self.assertIn('line 2: Each row must be', err)
+        self.assertEqual(
+            list(Player.objects.values_list('team__acronym', flat=True)), ['RED', 'BLU']
+        )
+        self.assertEqual(len(search(Player.objects.all(), 'bob')[:10]), 1)
+
+    def test_imported_matches_carry_their_tournament(self):
+        teams = self.create_teams(2)
+        out, err = self.import_file('match', '.csv', (
+            'match_type,match_time,duration,team_a,team_b,match_detail,video_link\n'
+            'Final,2022-04-01 18:00,30:00,T0,T1,Close game,http://example.org\n'
+        ))
+        self.assertEqual(err, '')
+        match = Match.objects.get()
+        self.assertEqual(match.tournament, self.tournament)
+        self.assertEqual(match.team_a, teams[0])
+        self.assertTrue(timezone.is_aware(match.match_time))
+
+
+class ExportTests(LeagueTestCase):
+
+    def test_export_streams_filtered_rows(self):
+        teams = self.create_teams(2)
+        self.create_matches(teams, 3)
+        url = reverse('proleague_export_urlpattern', args=['match'])
+        response = self.client.get(url, {'format': 'csv', 'year': 2022})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].endswith(',T0,T1,2022,Spring,Spring Split,League of Legends,,'))
+        response = self.client.get(url, {'format': 'jsonl', 'year': 2021})
+        self.assertEqual(b''.join(response.streaming_content), b'')
+        self.assertEqual(self.client.get(url, {'tournament': 'x'}).status_code, 400)
+        url = reverse('proleague_export_urlpattern', args=['player'])
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_columnar_export_groups_rows_by_chunk(self):
+        self.create_teams(5)
+        out = StringIO()
+        call_command('export_league', 'team', format='columnar', chunk_size=2, stdout=out)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(lines[0]['columns'][:3], ['id', 'team_name', 'acronym'])
+        self.assertEqual([len(line['acronym']) for line in lines[1:]], [2, 2, 1])
+
+
+class ApiTests(LeagueTestCase):
+    permissions = ['view_match', 'view_team', 'view_tournament']
+
+    def test_includes_take_one_query_each(self):
+        teams = self.create_teams(4)
+        url = reverse('proleague_api_list_urlpattern', args=['match'])
+        params = {'include': 'team_a,team_b,tournament', 'fields': 'match_type', 'page_size': 2}
+        self.create_matches(teams, 2)
+        self.warm_auth_cache()
+        few = self.count_queries(url, params)
+        self.create_matches(teams[2:], 4)
+        params['page_size'] = 6
+        self.assertEqual(self.count_queries(url, params), few)
+        body = self.client.get(url, params).json()
+        self.assertEqual(len(body['data']), 6)
+        self.assertEqual(set(body['data'][0]), {'id', 'match_type', 'team_a', 'team_b', 'tournament'})
+        self.assertEqual(len(body['included']['team']), 4)
+        self.assertEqual(body['included']['tournament'][0]['year'], 2022)
+
+    def test_sparse_fields_narrow_the_projection(self):
+        self.create_teams(3)
+        url = reverse('proleague_api_list_urlpattern', args=['team'])
+        with CaptureQueriesContext(connection) as queries:
+            body = self.client.get(url, {'fields': 'acronym', 'page_size': 2}).json()
+        self.assertEqual([set(item) for item in body['data']], [{'id', 'acronym'}] * 2)
+        sql = [q['sql'] for q in queries if 'proleague_team' in q['sql']][0]
+        self.assertNotIn('team_name', sql)
+        body = self.client.get(body['links']['next']).json()
+        self.assertEqual(len(body['data']), 1)
+        self.assertIsNone(body['links']['next'])
+
+    def test_page_links_keep_repeated_parameters(self):
+        self.create_teams(3)
+        url = reverse('proleague_api_list_urlpattern', args=['team'])
+        body = self.client.get(url + '?page_size=2&tag=a&tag=b').json()
+        self.assertEqual(QueryDict(body['links']['next'].split('?')[1]).getlist('tag'), ['a', 'b'])
+
+    def test_match_detail_is_only_sent_when_asked_for(self):
+        teams = self.create_teams(2)
+        match, = self.create_matches(teams, 1)
+        MatchReport.objects.create(match=match, detail='Game 1: close')
+        url = reverse('proleague_api_list_urlpattern', args=['match'])
+        with CaptureQueriesContext(connection) as queries:
+            body = self.client.get(url).json()
+        self.assertNotIn('match_detail', body['data'][0])
+        self.assertFalse([q for q in queries if 'matchreport' in q['sql']])
+        body = self.client.get(url, {'fields': 'match_detail'}).json()
+        self.assertEqual(body['data'][0], {'id': match.pk, 'match_detail': 'Game 1: close'})
+
+    def test_errors_and_compression(self):
+        self.create_teams(30)
+        url = reverse('proleague_api_list_urlpattern', args=['team'])
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RemovedInDjango40Warning)
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(self.client.get(url, {'fields': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'include': 'players'}).status_code, 403)
+        player_url = reverse('proleague_api_list_urlpattern', args=['player'])
+        self.assertEqual(self.client.get(player_url).status_code, 403)
+        self.client.logout()
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+
+class StandingsTests(LeagueTestCase):
+    permissions = ['view_tournament']
+
+    def table(self):
+        return list(Standing.objects.filter(tournament=self.tournament).values_list(
+            'rank', 'team__acronym', 'played', 'wins', 'draws', 'losses', 'points'
+        ))
+
+    def test_standings_follow_match_results(self):
+        teams = self.create_teams(3)
+        matches = self.create_matches(teams, 3)
+        self.assertEqual([row[0] for row in self.table()], [1, 1, 1])
+        for match, (score_a, score_b) in zip(matches, [(2, 0), (1, 1), (0, 3)]):
+            match.score_a, match.score_b = score_a, score_b
+            match.save()
+        # T0 beat T1 2:0 and T2 0:3; T1 and T2 drew 1:1
+        self.assertEqual(self.table(), [
+            (1, 'T0', 2, 2, 0, 0, 6),
+            (2, 'T1', 2, 0, 1, 1, 1),
+            (3, 'T2', 2, 0, 1, 1, 1),
+        ])
+        matches[0].delete()
+        self.assertEqual(self.table(), [
+            (1, 'T0', 1, 1, 0, 0, 3),
+            (2, 'T1', 1, 0, 1, 0, 1),
+            (3, 'T2', 2, 0, 1, 1, 1),
+        ])
+        response = self.client.get(self.tournament.get_absolute_url())
+        self.assertContains(response, '<td>3:0</td>', html=True)
+
+    def test_both_scores_are_required(self):
+        teams = self.create_teams(2)
+        form = MatchForm(data={
+            'match_type': 'Final',
+            'match_time': '2022-04-01 18:00',
+            'duration': '30:00',
+            'team_a': teams[0].pk,
+            'team_b': teams[1].pk,
+            'score_a': 2,
+            'match_detail': 'x',
+            'video_link': 'x',
+        })
+        self.assertFalse(form.is_valid())
+
+
+class StatsTests(LeagueTestCase):
+    permissions = ['view_team']
+
+    def test_stats_follow_matches_and_match_rebuild(self):
+        teams = self.create_teams(3)
+        matches = self.create_matches(teams, 3)
+        for match, (score_a, score_b) in zip(matches, [(2, 0), (1, 1), (0, 3)]):
+            match.score_a, match.score_b = score_a, score_b
+            match.save()
+        matches[1].team_b = teams[0]
+        matches[1].save()
+
+        def snapshot():
+            return (
+                list(TeamStats.objects.order_by('team_id').values_list(
+                    'team__acronym', 'matches', 'played', 'wins', 'draws', 'losses'
+                )),
+                list(HeadToHead.objects.values_list(
+                    'team__acronym', 'opponent__acronym', 'played', 'wins', 'score_for'
+                )),
+            )
+
+        incremental = snapshot()
+        # T2 no longer plays T1, so T1 and T2 only face T0
+        self.assertEqual(incremental[0], [
+            ('T0', 3, 3, 2, 1, 0), ('T1', 2, 2, 0, 1, 1), ('T2', 1, 1, 0, 0, 1),
+        ])
+        self.assertEqual(incremental[1][:2], [('T0', 'T1', 2, 1, 3), ('T0', 'T2', 1, 1, 3)])
+        call_command('rebuild_stats', stdout=StringIO())
+        self.assertEqual(snapshot(), incremental)
+        response = self.client.get(teams[0].get_absolute_url())
+        self.assertContains(response, '67%')
+
+
+class SchedulingTests(LeagueTestCase):
+    permissions = ['view_match', 'view_team', 'view_tournament', 'add_match']
+
+    def play_out(self):
+        # team_a wins every match until the schedule stops growing
+        while True:
+            unplayed = list(Match.objects.filter(score_a__isnull=True).order_by('pk'))
+            if not unplayed:
+                return
+            for match in unplayed:
+                match.score_a, match.score_b = 2, 1
+                match.save()
+
+    def test_round_robin_pairs_every_team_once_without_overlap(self):
+        teams = self.create_teams(6)
+        generate(self.tournament, Schedule.ROUND_ROBIN, parallel=2)
+        matches = list(Match.objects.all())
+        self.assertEqual(len(matches), 15)
+        pairs = {frozenset((match.team_a_id, match.team_b_id)) for match in matches}
+        self.assertEqual(len(pairs), 15)
+        slots = [(match.match_time, team_id) for match in matches for team_id in (match.team_a_id, match.team_b_id)]
+        self.assertEqual(len(set(slots)), len(slots))
+        self.assertEqual(Match.objects.filter(round_number=1).count(), 3)
+        self.assertEqual(len({m.match_time for m in matches if m.round_number == 1}), 2)
+        self.assertTrue(all(
+            self.tournament.start_date <= timezone.localtime(match.match_time).date() <= self.tournament.end_date
+            for match in matches
+        ))
+        self.assertEqual(Standing.objects.get(team=teams[0]).played, 0)
+
+    def test_single_elimination_advances_with_byes(self):
+        self.create_teams(5)
+        generate(self.tournament, Schedule.SINGLE_ELIMINATION)
+        # seeds 4 and 5 play in; seeds 2 and 3 get byes into their semifinal
+        self.assertEqual(list(Match.objects.values_list('match_type', 'team_a__acronym', 'team_b__acronym')), [
+            ('Quarterfinals', 'T3', 'T4'),
+            ('Semifinals', 'T1', 'T2'),
+        ])
+        self.play_out()
+        self.assertEqual(
+            list(Match.objects.order_by('pk').values_list('match_type', flat=True)),
+            ['Quarterfinals', 'Semifinals', 'Semifinals', 'Final'],
+        )
+        final = Match.objects.get(match_type='Final')
+        self.assertEqual((final.team_a.acronym, final.team_b.acronym), ('T0', 'T1'))
+
+    def test_double_elimination_runs_to_a_grand_final(self):
+        self.create_teams(4)
+        generate(self.tournament, Schedule.DOUBLE_ELIMINATION)
+        self.play_out()
+        self.assertEqual(list(Match.objects.order_by('pk').values_list('match_type', flat=True)), [
+            'Upper Round 1', 'Upper Round 1', 'Upper Round 2', 'Lower Round 1',
+            'Lower Round 2', 'Grand Final',
+        ])
+        times = list(Match.objects.order_by('pk').values_list('match_time', flat=True))
+        self.assertLess(times[3], times[4])
+        self.assertLess(times[4], times[5])
+
+    def test_swiss_pairs_teams_on_equal_points(self):
+        self.create_teams(4)
+        generate(self.tournament, Schedule.SWISS)
+        self.play_out()
+        second = Match.objects.filter(round_number=2).order_by('bracket_slot')
+        # T0 and T2 won their first matches
+        self.assertEqual([(m.team_a.acronym, m.team_b.acronym) for m in second], [('T0', 'T2'), ('T1', 'T3')])
+
+    def test_bracket_of_512_teams_is_fast_and_dates_are_checked(self):
+        Team.objects.bulk_create([
+            Team(team_name='Team {}'.format(n), acronym='T{}'.format(n), tournament=self.tournament)
+            for n in range(512)
+        ])
+        started = time.perf_counter()
+        generate(self.tournament, Schedule.DOUBLE_ELIMINATION, parallel=16)
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertEqual(Match.objects.count(), 256)
+        self.tournament.end_date = self.tournament.start_date
+        self.tournament.save()
+        Schedule.objects.all().delete()
+        with self.assertRaises(SchedulingError):
+            generate(self.tournament, Schedule.SINGLE_ELIMINATION, parallel=1)
+
+    def test_schedule_view_generates_once(self):
+        self.create_teams(4)
+        url = reverse('proleague_tournament_schedule_urlpattern', args=[self.tournament.pk])
+        data = {'format': Schedule.ROUND_ROBIN, 'match_length': '01:00:00'}
+        self.assertRedirects(self.client.post(url, data), self.tournament.get_absolute_url())
+        self.assertEqual(Match.objects.count(), 6)
+        response = self.client.post(url, data)
+        self.assertContains(response, 'already has a schedule')
+
+    def test_schedule_view_reports_matches_entered_by_hand(self):
+        teams = self.create_teams(4)
+        # the first round robin round pairs T0 with T3
+        Match.objects.create(
+            match_type='Round 1', match_time=timezone.now(), team_a=teams[0], team_b=teams[3], video_link='',
+        )
+        url = reverse('proleague_tournament_schedule_urlpattern', args=[self.tournament.pk])
+        response = self.client.post(url, {'format': Schedule.ROUND_ROBIN, 'match_length': '01:00:00'})
+        self.assertContains(
+            response, 'The schedule would repeat existing matches: Spring Split - [Round 1] T0 VS. T3.'
+        )
+        self.assertEqual(Match.objects.count(), 1)
+        self.assertFalse(Schedule.objects.exists())
+
+
+class DurationTests(LeagueTestCase):
+
+    def test_parser_reads_the_usual_spellings(self):
+        minutes = datetime.timedelta(minutes=1)
+        for value, expected in [
+            ('35:12', 35 * minutes + datetime.timedelta(seconds=12)),
+            ('123:58', 123 * minutes + datetime.timedelta(seconds=58)),
+            ('1:02:03', 62 * minutes + datetime.timedelta(seconds=3)),
+            ('1h 2m', 62 * minutes),
+            ('45 min', 45 * minutes),
+            ('90', 90 * minutes),
+            ('P0DT00H35M00S', 35 * minutes),
+            ('', None),
+            ('-5:00', None),
+            ('soon', None),
+            ('3 fortnights', None),
+        ]:
+            self.assertEqual(parse_duration(value), expected, value)
+        self.assertEqual(format_duration(35 * minutes), '35:00')
+        self.assertEqual(format_duration(62 * minutes), '1:02:00')
+
+    def test_match_list_filters_and_averages_durations(self):
+        teams = self.create_teams(2)
+        matches = self.create_matches(teams, 40)
+        for n, match in enumerate(matches):
+            match.duration = datetime.timedelta(minutes=10 + n)
+            match.save()
+        url = reverse('proleague_match_list_urlpattern')
+        response = self.client.get(url, {'min_duration': '20:00', 'max_duration': '1h'})
+        self.assertEqual(response.context['average_duration'], datetime.timedelta(minutes=34, seconds=30))
+        self.assertEqual(len(response.context['match_list']), 25)
+        self.assertIn('min_duration=20%3A00', response.context['next_page_url'])
+        self.assertContains(response, 'Average duration: 34:30')
+        # unfiltered, the average comes from the tournament summaries
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'game': self.tournament.game_id})
+        self.assertEqual(response.context['average_duration'], datetime.timedelta(minutes=29, seconds=30))
+        self.assertFalse([q for q in queries if 'AVG(' in q['sql']])
+        self.assertIsNone(self.client.get(url, {'game': self.tournament.game_id + 1}).context['average_duration'])
+        self.assertEqual(TeamStats.objects.get(team=teams[0]).average_duration, datetime.timedelta(
+            minutes=29, seconds=30
+        ))
+        response = self.client.get(reverse('proleague_match_search_urlpattern'), {
+            'match_search': 'Round', 'max_duration': '12m',
+        })
+        self.assertEqual(len(response.context['match_list']), 3)
+
+    def test_forms_and_imports_accept_loose_durations(self):
+        # the imported rows name T0 and T1
+        self.create_teams(2)
+        report = import_rows('match', [(2, {
+            'match_type': 'Final', 'match_time': '2022-04-01 18:00', 'duration': '1h 2m',
+            'team_a': 'T0', 'team_b': 'T1', 'match_detail': 'Close', 'video_link': 'http://example.org',
+        }), (3, {
+            'match_type': 'Replay', 'match_time': '2022-04-01 20:00', 'duration': 'long',
+            'team_a': 'T0', 'team_b': 'T1', 'match_detail': 'Close', 'video_link': 'http://example.org',
+        })])
+        self.assertEqual(report.created, 1, report.errors)
+        self.assertEqual(Match.objects.get().duration, datetime.timedelta(minutes=62))
+        form = MatchForm(instance=Match.objects.get())
+        self.assertIn('value="1:02:00"', str(form['duration']))
+        self.assertFalse(MatchForm({'duration': 'long'}).is_valid())
+
+
+class MatchReportTests(LeagueTestCase):
+    permissions = ['view_match', 'view_team', 'view_player', 'change_match']
+
+    def test_lists_never_read_reports_and_detail_shows_games(self):
+        teams = self.create_teams(2)
+        match = self.create_matches(teams, 1)[0]
+        school = School.objects.create(school_name='UIUC', city='Urbana', state='IL')
+        player = Player.objects.create(
+            player_name='Ann', gamer_tag='ann', email='a@x.org', phone_number='1', school=school, team=teams[0]
+        )
+        MatchReport.objects.create(match=match, detail='A long write-up')
+        game = MatchGame.objects.create(match=match, game_number=1, map_name='Hollywood', score_a=6, score_b=4)
+        line = PlayerGameStat.objects.create(game=game, player=player, kills=7, deaths=2, assists=3, extra={'heals': 0})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('proleague_match_list_urlpattern'))
+        self.assertFalse([q for q in queries if 'matchreport' in q['sql'] or 'match_detail' in q['sql']])
+        response = self.client.get(match.get_absolute_url())
+        self.assertContains(response, 'A long write-up')
+        self.assertContains(response, 'Hollywood')
+        self.assertContains(response, '7 / 2 / 3')
+        self.assertEqual(game.winner_id, teams[0].pk)
+        response = self.client.get(player.get_absolute_url())
+        self.assertContains(response, '1 played')
+        self.assertEqual(
+            PlayerGameStat.objects.filter(player=player, extra__heals=0).count(), 1
+        )
+        # a change to a game's stats shows on the cached match page
+        line.kills = 9
+        line.save()
+        self.assertContains(self.client.get(match.get_absolute_url()), '9 / 2 / 3')
+
+    def test_form_edits_the_report(self):
+        teams = self.create_teams(2)
+        match = self.create_matches(teams, 1)[0]
+        data = {
+            'match_type': match.match_type,
+            'match_time': '2022-03-01 12:00',
+            'duration': '35:12',
+            'team_a': teams[0].pk,
+            'team_b': teams[1].pk,
+            'match_detail': 'Game 1: close',
+            'video_link': 'x',
+        }
+        self.assertTrue(MatchForm(data, instance=match).is_valid())
+        MatchForm(data, instance=match).save()
+        self.assertEqual(MatchReport.objects.get(match=match).detail, 'Game 1: close')
+        self.assertEqual(MatchForm(instance=match).initial['match_detail'], 'Game 1: close')
+        MatchForm(dict(data, match_detail=''), instance=match).save()
+        self.assertFalse(MatchReport.objects.exists())
+
+
+class ProfilingTests(LeagueTestCase):
+
+    def setUp(self):
+        super().setUp()
+        profiling.registry.reset()
+
+    def test_requests_are_timed_per_url_name(self):
+        self.create_matches(self.create_teams(2), 3)
+        for _ in range(2):
+            self.client.get(reverse('proleague_match_list_urlpattern'))
+        row, = [
+            row for row in profiling.registry.snapshot()
+            if row['view_name'] == 'proleague_match_list_urlpattern'
+        ]
+        self.assertEqual(row['requests'], 2)
+        self.assertGreater(row['sql_queries_mean'], 0)
+        self.assertGreater(row['template_seconds_mean'], 0)
+        self.assertLessEqual(row['latency_p50'], row['latency_p95'])
+
+    def test_repeated_queries_are_logged(self):
+        teams = self.create_teams(6)
+
+        def view(request):
+            for team in teams:
+                Team.objects.get(pk=team.pk)
+            return HttpResponse()
+
+        with self.assertLogs('proleague.profiling', 'WARNING') as logs:
+            profiling.ProfilingMiddleware(view)(RequestFactory().get('/'))
+        self.assertIn('ran a query 6 times', logs.output[0])
+        row, = profiling.registry.snapshot()
+        self.assertEqual(row['duplicates'][0][1:], (1, 6))
+
+    def test_dashboard_is_for_staff_and_metrics_take_a_token(self):
+        self.client.get(reverse('proleague_match_list_urlpattern'))
+        dashboard = reverse('proleague_profile_urlpattern')
+        metrics = reverse('proleague_metrics_urlpattern')
+        self.assertEqual(self.client.get(dashboard).status_code, 403)
+        self.assertEqual(self.client.get(metrics).status_code, 403)
+        with mock.patch.object(profiling, 'METRICS_TOKEN', 'secret'):
+            self.client.logout()
+            response = self.client.get(metrics, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertContains(
+            response, 'proleague_request_sql_queries_bucket{view="proleague_match_list_urlpattern",le="+Inf"} 1'
+        )
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(dashboard), 'proleague_match_list_urlpattern')
+
+
+class BenchmarkTests(TestCase):
+
+    def test_generated_league_is_consistent_and_stacks(self):
+        created = generate_league(1, first_year=2020)
+        self.assertEqual(
+            [created[name] for name in ('tournament', 'team', 'player', 'match')], [6, 48, 240, 168]
+        )
+        match = Match.objects.filter(score_a__isnull=False).first()
+        self.assertEqual(match.games.count(), match.score_a + match.score_b)
+        self.assertEqual(match.report.detail.count('Game '), match.games.count())
+        self.assertEqual(Standing.objects.filter(tournament=match.tournament).count(), 8)
+        self.assertIn(match.team_a, search(Team.objects.all(), match.team_a.acronym))
+        created = generate_league(1, seed=1)
+        self.assertEqual(created['year'], 1)
+        self.assertEqual(Year.objects.order_by('-year').first().year, 2021)
+
+    def test_generated_league_takes_teams_and_matches_per_tournament(self):
+        created = generate_league(1, first_year=2020, teams=4, matches=9)
+        self.assertEqual([created[name] for name in ('tournament', 'team', 'match')], [6, 24, 54])
+        tournament = Tournament.objects.first()
+        pairs = list(tournament.matches.order_by('match_type').values_list('team_a', 'team_b'))
+        # the six pairs of the round robin, then three return matches
+        self.assertEqual(len(set(pairs)), 9)
+        self.assertEqual(len({frozenset(pair) for pair in pairs}), 6)
+
+    def test_regressions_are_reported_against_the_baseline(self):
+        generate_league(1)
+        user = User.objects.create_superuser('bench', 'bench@example.org', 'secret-pass')
+        results = {'1': benchmarks.run(user, repeat=2, only=['match_list', 'team_create', 'team_update'])}
+        self.assertEqual(sorted(results['1']), ['match_list', 'team_create', 'team_update'])
+        self.assertEqual(benchmarks.compare(results, results), {'queries': [], 'latency': []})
+        baseline = {'1': {label: dict(result) for label, result in results['1'].items()}}
+        baseline['1']['match_list']['queries'] -= 1
+        baseline['1']['team_update']['p50_ms'] = 0.001
+        regressions = benchmarks.compare(results, baseline, tolerance=0, min_ms=0)
+        self.assertEqual(len(regressions['queries']), 1)
+        self.assertIn('match_list', regressions['queries'][0])
+        self.assertEqual(len(regressions['latency']), 1)
+        self.assertIn('team_update', regressions['latency'][0])
+        # the default tolerance absorbs the noise of a busy machine
+        baseline['1']['team_update']['p50_ms'] = results['1']['team_update']['p50_ms'] / 1.6
+        self.assertEqual(benchmarks.compare(results, baseline)['latency'], [])
+
+
+class PermissionCacheTests(LeagueTestCase):
+
+    def permission(self, codename):
+        return Permission.objects.get(content_type__app_label='proleague', codename=codename)
+
+    def test_version_tokens_must_be_shared_between_workers(self):
+        self.assertEqual(check_version_cache(None), [])
+        local = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        with override_settings(CACHES={'default': local, 'versions': local}):
+            self.assertEqual([warning.id for warning in check_version_cache(None)], ['proleague.W001'])
+
+    def test_warm_requests_skip_auth_queries(self):
+        url = reverse('proleague_match_list_urlpattern')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        tables = ('auth_user', 'auth_permission', 'auth_group', 'django_session')
+        self.assertFalse([query for query in captured if any(table in query['sql'] for table in tables)])
+
+    def test_permission_changes_take_effect_at_once(self):
+        url = reverse('proleague_game_list_urlpattern')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        group = Group.objects.create(name='viewers')
+        self.user.groups.add(group)
+        group.permissions.add(self.permission('view_game'))
+        self.assertEqual(self.client.get(url).status_code, 200)
+        group.permissions.clear()
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.user.user_permissions.add(self.permission('view_game'))
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.permission('view_game').user_set.remove(self.user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        group.permissions.add(self.permission('view_game'))
+        self.assertEqual(self.client.get(url).status_code, 200)
+        group.user_set.clear()
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_sessions_of_the_plain_model_backend_still_work(self):
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertContains(self.client.get(reverse('proleague_match_list_urlpattern')), 'Hello, tester')
+
+
+class TeamMatchesTests(LeagueTestCase):
+
+    def test_matches_on_both_sides_in_time_order(self):
+        teams = self.create_teams(3)
+        # teams[0] plays the first match as team_a and the last as team_b
+        matches = self.create_matches(teams, 3)
+        with self.assertNumQueries(1):
+            found = list(teams[0].matches())
+        self.assertEqual(found, sorted(
+            [match for match in matches if teams[0].pk in (match.team_a_id, match.team_b_id)],
+            key=lambda match: match.match_time,
+        ))
+        self.assertEqual(
+            [match.opponent for match in found],
+            [match.team_b if match.team_a_id == teams[0].pk else match.team_a for match in found],
+        )
+
+    def test_moved_team_keeps_matches_on_both_sides(self):
+        teams = self.create_teams(3)
+        matches = self.create_matches(teams, 3)
+        other = Tournament.objects.create(
+            tournament_name='Summer Split',
+            start_date=datetime.date(2022, 6, 1),
+            end_date=datetime.date(2022, 8, 1),
+            year=self.tournament.year,
+            period=self.tournament.period,
+            game=self.tournament.game,
+        )
+        form = TeamForm(
+            {'team_name': teams[0].team_name, 'acronym': teams[0].acronym, 'tournament': other.pk},
+            instance=teams[0],
+        )
+        self.assertEqual(form.errors, {
+            'tournament': ['A team with matches cannot move to another tournament.'],
+        })
+        # a move that skips validation still lists the team_b side
+        teams[0].tournament = other
+        teams[0].save()
+        self.assertEqual(
+            {match.pk for match in teams[0].matches()}, {matches[0].pk, matches[2].pk}
+        )
+        self.assertEqual(teams[0].matches().count(), 2)
+
+    def test_detail_pages_matches_and_delete_is_refused(self):
+        teams = self.create_teams(2)
+        self.create_matches(teams, 30)
+        url = teams[0].get_absolute_url()
+        first = self.client.get(url)
+        self.assertEqual(len(first.context['match_list']), 25)
+        self.assertEqual(first.context['next_page_url'], None)
+        self.assertEqual(first.context['last_page_url'], '?page=2')
+        self.assertEqual(len(self.client.get(url, {'page': 2}).context['match_list']), 5)
+        User.objects.filter(pk=self.user.pk).update(is_superuser=True)
+        self.client.force_login(self.user)
+        response = self.client.get(teams[0].get_delete_url())
+        self.assertContains(response, '15 matches (team a)')
+        self.assertContains(response, 'and 5 more')
+
+
+class DeletionTests(LeagueTestCase):
+    permissions = ['view_team', 'delete_team', 'delete_game', 'delete_tournament']
+
+    def test_preflight_checks_every_protected_relation_at_once(self):
+        teams = self.create_teams(3)
+        self.create_matches(teams, 3)
+        game = Game.objects.create(game_name='Dota 2', genre='MOBA')
+        with self.assertNumQueries(1):
+            self.assertEqual(deletion.preflight(game), [])
+        with self.assertNumQueries(5):
+            blockers = deletion.preflight(teams[0], sample_size=1)
+        self.assertEqual([(b.name, b.count, b.remaining) for b in blockers], [
+            ('matches (team a)', 1, 0), ('matches (team b)', 1, 0),
+        ])
+        blockers = deletion.preflight(self.tournament, sample_size=2)
+        self.assertEqual([(b.name, b.count, len(b.sample)) for b in blockers], [('teams', 3, 2), ('matches', 3, 2)])
+
+    def test_views_refuse_blocked_deletes(self):
+        team, = self.create_teams(1)
+        url = reverse('proleague_tournament_delete_urlpattern', args=[self.tournament.pk])
+        self.assertContains(self.client.get(url), '1 teams')
+        self.assertContains(self.client.post(url), 'You may not delete tournament')
+        self.assertTrue(Tournament.objects.filter(pk=self.tournament.pk).exists())
+        response = self.client.post(team.get_delete_url())
+        self.assertRedirects(response, reverse('proleague_team_list_urlpattern'), fetch_redirect_response=False)
+        self.assertFalse(Team.objects.filter(pk=team.pk).exists())
+
+    def test_archive_removes_a_season_and_loaddata_restores_it(self):
+        teams = self.create_teams(2)
+        match, = self.create_matches(teams, 1)
+        MatchReport.objects.create(match=match, detail='Game 1: T0 won')
+        school = School.objects.create(school_name='UIUC', city='Urbana', state='IL')
+        Player.objects.create(player_name='Ann', gamer_tag='ann', school=school, team=teams[0])
+        tournaments = Tournament.objects.filter(year__year=2022)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'season.jsonl')
+            with open(path, 'w') as stream:
+                archived = deletion.archive(tournaments, stream)
+            self.assertEqual(archived['proleague.Team'], 2)
+            self.assertEqual(archived['proleague.Match'], 1)
+            self.assertFalse(Team.objects.exists() or Match.objects.exists() or MatchReport.objects.exists())
+            self.assertFalse(search(Team.objects.all(), 'T0').count())
+            call_command('loaddata', path, verbosity=0)
+        self.assertEqual(Match.objects.get().report.detail, 'Game 1: T0 won')
+        self.assertEqual(Player.objects.get().team.acronym, 'T0')
+
+
+class ArchiveTests(LeagueTestCase):
+    databases = {'default', 'archive'}
+    permissions = ['view_tournament', 'view_team', 'view_match', 'view_player', 'change_team']
+
+    def move_season(self):
+        teams = self.create_teams(2)
+        match, = self.create_matches(teams, 1)
+        MatchReport.objects.create(match=match, detail='Game 1: T0 won')
+        school = School.objects.create(school_name='UIUC', city='Urbana', state='IL')
+        player = Player.objects.create(player_name='Ann', gamer_tag='ann', school=school, team=teams[0])
+        moved = deletion.move(Tournament.objects.filter(year__year=2022), 'archive')
+        return teams[0], match, player, moved
+
+    def test_move_copies_the_season_and_what_it_points_at(self):
+        team, match, player, moved = self.move_season()
+        self.assertEqual(moved['proleague.Team'], 2)
+        self.assertEqual(moved['proleague.MatchReport'], 1)
+        self.assertFalse(Tournament.objects.exists() or Team.objects.exists() or Match.objects.exists())
+        self.assertFalse(search(Team.objects.all(), 'T0').count())
+        # lookups stay live and are copied along for the foreign keys
+        self.assertTrue(School.objects.filter(pk=player.school_id).exists())
+        archived = Player.objects.using('archive').get(pk=player.pk)
+        self.assertEqual(archived.school.school_name, 'UIUC')
+        self.assertEqual(archived.team.tournament.game.game_name, 'League of Legends')
+        self.assertEqual(Match.objects.using('archive').get().report.detail, 'Game 1: T0 won')
+        # moving another season refreshes the copied lookups
+        Game.objects.update(genre='Multiplayer online battle arena')
+        Tournament.objects.create(
+            tournament_name='Summer Split', start_date=datetime.date(2022, 6, 1), end_date=datetime.date(2022, 8, 1),
+            year=Year.objects.get(), period=Period.objects.get(), game=Game.objects.get(),
+        )
+        deletion.move(Tournament.objects.all(), 'archive')
+        self.assertEqual(Game.objects.using('archive').get().genre, 'Multiplayer online battle arena')
+
+    def test_archived_detail_pages_are_read_only(self):
+        team, match, player, moved = self.move_season()
+        for obj in (self.tournament, team, match, player):
+            response = self.client.get(obj.get_absolute_url())
+            self.assertContains(response, 'belongs to an archived season')
+            self.assertNotContains(response, obj.get_update_url())
+        self.assertContains(self.client.get(team.get_absolute_url()), match.get_absolute_url())
+        self.assertEqual(self.client.get(team.get_update_url()).status_code, 404)
+        self.assertEqual(self.client.get(reverse('proleague_team_detail_urlpattern', args=[0])).status_code, 404)
+
+    def test_tournament_list_keeps_archived_seasons_apart(self):
+        self.move_season()
+        url = reverse('proleague_tournament_list_urlpattern')
+        self.assertNotContains(self.client.get(url), 'Spring Split')
+        response = self.client.get(url, {'archived': ''})
+        self.assertContains(response, 'Spring Split')
+        self.assertContains(response, 'Archived Tournaments')
+
+
+class FragmentTests(LeagueTestCase):
+    permissions = ['view_tournament', 'view_team', 'view_player']
+
+    def test_list_pages_load_their_rows_in_batches(self):
+        Tournament.objects.bulk_create([
+            Tournament(
+                tournament_name='Split {:02}'.format(n),
+                start_date=datetime.date(2022, 6, 1) + datetime.timedelta(days=n),
+                end_date=datetime.date(2022, 8, 1),
+                year=self.tournament.year, period=self.tournament.period, game=self.tournament.game,
+            )
+            for n in range(30)
+        ])
+        url = reverse('proleague_tournament_list_urlpattern')
+        response = self.client.get(url)
+        self.assertEqual(len(response.context['tournament_list']), 25)
+        self.assertContains(response, 'data-more-url="?page=2"')
+        response = self.client.get(url, {'page': 2, 'format': 'json'})
+        fragment = response.json()
+        self.assertEqual(fragment['html'].count('<li>'), 6)
+        self.assertIn('Split 29', fragment['html'])
+        self.assertIsNone(fragment['more_url'])
+
+    def test_detail_pages_page_their_related_rows(self):
+        team, = self.create_teams(1)
+        school = School.objects.create(school_name='UIUC', city='Urbana', state='IL')
+        Player.objects.bulk_create([
+            Player(player_name='Player {:02}'.format(n), gamer_tag='p{}'.format(n), school=school, team=team)
+            for n in range(30)
+        ])
+        response = self.client.get(school.get_absolute_url())
+        self.assertEqual(len(response.context['player_list']), 25)
+        self.assertContains(response, 'Page 1')
+        fragment = self.client.get(school.get_absolute_url(), {'page': 2, 'format': 'json'}).json()
+        self.assertEqual(fragment['html'].count('<li>'), 5)
+        self.assertNotIn('Player 00', fragment['html'])
+
+
+class FacetTests(LeagueTestCase):
+    permissions = ['view_match', 'view_team', 'view_player']
+
+    def setUp(self):
+        super().setUp()
+        self.game = Game.objects.create(game_name='Valorant', genre='FPS')
+        self.other = Tournament.objects.create(
+            tournament_name='Valorant Cup', start_date=datetime.date(2022, 6, 1), end_date=datetime.date(2022, 7, 1),
+            year=self.tournament.year, period=self.tournament.period, game=self.game,
+        )
+        self.create_matches(self.create_teams(3), 3)
+        self.create_matches([
+            Team.objects.create(team_name='Cup {}'.format(n), acronym='C{}'.format(n), tournament=self.other)
+            for n in range(2)
+        ], 1)
+
+    def facet(self, response, name):
+        facet, = [facet for facet in response.context['facet_list'] if facet['name'] == name]
+        return {value['title']: (value['count'], value['selected']) for value in facet['values']}
+
+    def test_match_list_narrows_by_facets_and_counts_the_alternatives(self):
+        url = reverse('proleague_match_list_urlpattern')
+        response = self.client.get(url, {'game': self.game.pk})
+        self.assertEqual([match.tournament for match in response.context['match_list']], [self.other])
+        # a facet counts as if its own selection were not made
+        self.assertEqual(self.facet(response, 'game'), {'League of Legends': (3, False), 'Valorant': (1, True)})
+        self.assertEqual(self.facet(response, 'tournament'), {'Valorant Cup': (1, False)})
+        self.assertEqual(self.facet(response, 'year'), {2022: (1, False)})
+        self.assertContains(response, 'Clear filters')
+        response = self.client.get(url, {'game': [self.game.pk, 'junk'], 'year': self.tournament.year_id + 1})
+        self.assertEqual(list(response.context['match_list']), [])
+
+    def test_counts_are_cached_until_a_match_changes(self):
+        selection = MATCH_FACETS.selection(QueryDict('game={}'.format(self.game.pk)))
+        self.assertEqual(MATCH_FACETS.counts(Match.objects.all(), selection)['game'][0]['count'], 3)
+        with self.assertNumQueries(0):
+            MATCH_FACETS.counts(Match.objects.all(), selection)
+        Match.objects.filter(tournament=self.tournament).first().delete()
+        self.assertEqual(MATCH_FACETS.counts(Match.objects.all(), selection)['game'][0]['count'], 2)
+
+    def test_match_counts_come_from_tournament_summaries(self):
+        self.assertEqual(TournamentSummary.objects.get(tournament=self.tournament).matches, 3)
+        summary = TournamentSummary.objects.annotate(count=F('matches'))
+        for query in ('', 'game={}'.format(self.game.pk), 'year={}&tournament={}'.format(
+            self.tournament.year_id, self.tournament.pk
+        )):
+            selection = MATCH_FACETS.selection(QueryDict(query))
+            self.assertEqual(
+                MATCH_FACETS.counts(Match.objects.all(), selection, summary),
+                MATCH_FACETS.counts(Match.objects.all(), selection),
+            )
+        Match.objects.filter(tournament=self.tournament).first().delete()
+        self.assertEqual(TournamentSummary.objects.get(tournament=self.tournament).matches, 2)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('proleague_match_list_urlpattern'))
+        self.assertEqual(self.facet(response, 'game'), {'League of Legends': (2, False), 'Valorant': (1, False)})
+        self.assertFalse([q for q in queries if 'GROUP BY' in q['sql']])
+        # durations aren't summarized
+        response = self.client.get(reverse('proleague_match_list_urlpattern'), {'min_duration': '1:00:00'})
+        self.assertEqual(self.facet(response, 'game'), {})
+
+    def test_player_list_narrows_by_school_state(self):
+        team = Team.objects.filter(tournament=self.other).first()
+        illinois = School.objects.create(school_name='UIUC', city='Urbana', state='IL')
+        ohio = School.objects.create(school_name='OSU', city='Columbus', state='OH')
+        Player.objects.create(player_name='Ann', gamer_tag='ann', school=illinois, team=team)
+        Player.objects.create(player_name='Bob', gamer_tag='bob', school=ohio, team=team)
+        response = self.client.get(reverse('proleague_player_list_urlpattern'), {'state': 'OH'})
+        self.assertEqual([player.player_name for player in response.context['player_list']], ['Bob'])
+        self.assertEqual(self.facet(response, 'state'), {'IL': (1, False), 'OH': (1, True)})
+        self.assertEqual(self.facet(response, 'game'), {'Valorant': (1, False)})
+
+    def test_renaming_a_facet_value_changes_the_list_etags(self):
+        school = School.objects.create(school_name='UIUC', city='Urbana', state='IL')
+        Player.objects.create(
+            player_name='Ann', gamer_tag='ann', school=school, team=Team.objects.filter(tournament=self.other).first()
+        )
+        for name in ('proleague_match_list_urlpattern', 'proleague_player_list_urlpattern'):
+            url = reverse(name)
+            etag = self.client.get(url)['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            self.game.game_name = 'Valorant {}'.format(name)
+            self.game.save()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, self.game.game_name)
@@ -1,12 +1,15 @@
 from django.urls import path
 
+from .api import ApiList, ApiDetail
 from .views import (
     TournamentList, TournamentCreate, TournamentDelete, TournamentDetail, TournamentUpdate,
+    TournamentSchedule,
     GameList, GameCreate, GameDelete, GameDetail, GameUpdate,
     PlayerList, PlayerCreate, PlayerDelete, PlayerDetail, PlayerUpdate, PlayerSearch,
     MatchList, MatchCreate, MatchDelete, MatchDetail, MatchUpdate, MatchSearch,
     TeamList, TeamCreate, TeamDelete, TeamDetail, TeamUpdate, TeamSearch,
-    SchoolList, SchoolCreate, SchoolDelete, SchoolDetail, SchoolUpdate
+    SchoolList, SchoolCreate, SchoolDelete, SchoolDetail, SchoolUpdate,
+    GlobalSearch, Export, ProfileDashboard, Metrics
 )
 
 
@@ -41,6 +44,12 @@ urlpatterns = [
         name='proleague_tournament_delete_urlpattern'
     ),
 
+    path(
+        'tournament/<int:pk>/schedule/',
+        TournamentSchedule.as_view(),
+        name='proleague_tournament_schedule_urlpattern'
+    ),
+
     path(
         'game/',
         GameList.as_view(),
@@ -208,4 +217,40 @@ urlpatterns = [
         SchoolDelete.as_view(),
         name='proleague_school_delete_urlpattern'
     ),
+
+    path(
+        'search/',
+        GlobalSearch.as_view(),
+        name='proleague_search_urlpattern'
+    ),
+
+    path(
+        'export/<str:kind>/',
+        Export.as_view(),
+        name='proleague_export_urlpattern'
+    ),
+
+    path(
+        'api/v1/<str:kind>/',
+        ApiList.as_view(),
+        name='proleague_api_list_urlpattern'
+    ),
+
+    path(
+        'api/v1/<str:kind>/<int:pk>/',
+        ApiDetail.as_view(),
+        name='proleague_api_detail_urlpattern'
+    ),
+
+    path(
+        'profile/',
+        ProfileDashboard.as_view(),
+        name='proleague_profile_urlpattern'
+    ),
+
+    path(
+        'metrics/',
+        Metrics.as_view(),
+        name='proleague_metrics_urlpattern'
+    ),
 ]
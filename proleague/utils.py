@@ -1,19 +1,76 @@
+import hashlib
+
+from django.core.paginator import PageNotAnInteger, EmptyPage, Paginator
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.html import escape
+from django.utils.http import http_date, urlencode
+from django.views import View
+from django.views.generic.detail import SingleObjectMixin
+
+from . import cache as page_cache
+from .deletion import preflight
+from .pagination import CursorPage, CursorPaginator, OffsetCursorPaginator
+from .routers import ARCHIVE_DATABASE, archive_configured
+from .search import search
+
+
 class PageLinksMixin:
     page_kwarg = 'page'
+    cursor_kwarg = 'cursor'
+    # 'page' numbers pages with OFFSET; 'cursor' seeks on the ordering keys
+    pagination_mode = 'page'
+    # only used in cursor mode; count at most this many rows, None for exact
+    count_limit = None
+
+    def _query(self, key, value):
+        # keep the list's other parameters, such as filters, across pages
+        query = self.request.GET.copy()
+        query.pop(self.page_kwarg, None)
+        query.pop(self.cursor_kwarg, None)
+        # links lead to pages; FragmentMixin's script asks for the rows itself
+        query.pop('format', None)
+        if value:
+            query[key] = value
+        return '?' + query.urlencode()
 
     def _page_urls(self, page_number):
-        return "?{pkw}={n}".format(
-            pkw=self.page_kwarg,
-            n=page_number
+        return self._query(self.page_kwarg, page_number)
+
+    def _cursor_urls(self, cursor):
+        return self._query(self.cursor_kwarg, cursor)
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.pagination_mode != 'cursor':
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(
+            queryset,
+            page_size,
+            count_limit=self.count_limit
+        )
+        page = paginator.page(
+            self.request.GET.get(self.cursor_kwarg)
         )
+        return (paginator, page, page.object_list, page.has_other_pages())
 
     def first_page(self, page):
+        if isinstance(page, CursorPage):
+            if page.has_previous():
+                return self._cursor_urls(None)
+            return None
         # don't show on first page
         if page.number > 1:
             return self._page_urls(1)
         return None
 
     def previous_page(self, page):
+        if isinstance(page, CursorPage):
+            if page.has_previous():
+                return self._cursor_urls(page.previous_cursor)
+            return None
         if page.has_previous() and page.number > 2:
             return self._page_urls(
                 page.previous_page_number()
@@ -21,6 +78,10 @@ class PageLinksMixin:
         return None
 
     def next_page(self, page):
+        if isinstance(page, CursorPage):
+            if page.has_next():
+                return self._cursor_urls(page.next_cursor)
+            return None
         last_page = page.paginator.num_pages
         if page.has_next() and page.number < last_page - 1:
             return self._page_urls(
@@ -29,25 +90,410 @@ class PageLinksMixin:
         return None
 
     def last_page(self, page):
+        if isinstance(page, CursorPage):
+            if page.last_cursor:
+                return self._cursor_urls(page.last_cursor)
+            return None
         last_page = page.paginator.num_pages
         if page.number < last_page:
             return self._page_urls(last_page)
         return None
 
+    def more_page(self, page):
+        # the page right after this one, even when it is also the last, for
+        # loading the rows in batches
+        if isinstance(page, CursorPage):
+            if page.has_next():
+                return self._cursor_urls(page.next_cursor)
+            return None
+        if page.has_next():
+            return self._page_urls(page.next_page_number())
+        return None
+
+    def get_page_links(self, page):
+        return {
+            'first_page_url':
+                self.first_page(page),
+            'previous_page_url':
+                self.previous_page(page),
+            'next_page_url':
+                self.next_page(page),
+            'last_page_url':
+                self.last_page(page),
+            'more_url':
+                self.more_page(page),
+        }
+
+    def paginate_related(self, queryset):
+        """Page ``queryset`` for a detail view, returning the context a list view would get."""
+        paginator = Paginator(queryset, self.paginate_by)
+        page = paginator.get_page(self.request.GET.get(self.page_kwarg))
+        return dict(
+            self.get_page_links(page),
+            paginator=paginator,
+            page_obj=page,
+            is_paginated=page.has_other_pages(),
+            object_list=page.object_list,
+        )
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(
             **kwargs
         )
         page = context.get('page_obj')
         if page is not None:
+            context.update(self.get_page_links(page))
+        return context
+
+
+class FragmentMixin:
+    """Answer ``?format=json`` with just the rows of the current page.
+
+    The rows are rendered with ``fragment_template_name``, which the full
+    page includes for its own rows, and come with the ``more_url`` of the
+    page after them, so that infinite.js can keep loading batches of rows
+    while the initial page stays one page long.
+    """
+    fragment_template_name = None
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.request.GET.get('format') != 'json':
+            return super().render_to_response(context, **response_kwargs)
+        return JsonResponse({
+            'html': render_to_string(self.fragment_template_name, context, self.request),
+            'more_url': context.get('more_url'),
+        })
+
+
+class FacetMixin:
+    """Narrow a list by the values of ``facets``, a proleague.facets.FacetSet.
+
+    get_queryset() passes its queryset through facet_queryset(); the
+    context gets ``facet_list`` with every facet's values, their counts
+    and links that toggle them. get_facet_summary() may return counts
+    kept in a summary table, see FacetSet.counts().
+    """
+    facets = None
+
+    def get_facet_summary(self):
+        return None
+
+    def facet_queryset(self, queryset):
+        self.facet_selection = self.facets.selection(self.request.GET)
+        self.unfaceted_queryset = queryset
+        return self.facets.filter(queryset, self.facet_selection)
+
+    def _facet_query(self):
+        query = self.request.GET.copy()
+        for key in (getattr(self, 'page_kwarg', 'page'), getattr(self, 'cursor_kwarg', 'cursor'), 'format'):
+            query.pop(key, None)
+        return query
+
+    def _toggle_urls(self, query, name, values):
+        # the other parameters are encoded once for all of a facet's values
+        selected = query.getlist(name)
+        others = query.copy()
+        others.pop(name, None)
+        encoded = others.urlencode()
+        for item in values:
+            value = str(item['value'])
+            toggled = [selected_value for selected_value in selected if selected_value != value]
+            if len(toggled) == len(selected):
+                toggled.append(value)
+            toggle = urlencode([(name, selected_value) for selected_value in toggled])
+            yield '?' + '&'.join(part for part in (encoded, toggle) if part)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        counts = self.facets.counts(self.unfaceted_queryset, self.facet_selection, self.get_facet_summary())
+        query = self._facet_query()
+        context['facet_list'] = [
+            {
+                'name': facet.name,
+                'label': facet.label,
+                'values': [
+                    dict(item, selected=item['value'] in self.facet_selection[facet.name], url=url)
+                    for item, url in zip(counts[facet.name], self._toggle_urls(query, facet.name, counts[facet.name]))
+                ],
+            }
+            for source, facet in self.facets
+        ]
+        if any(self.facet_selection.values()):
+            for source, facet in self.facets:
+                query.pop(facet.name, None)
+            context['facet_clear_url'] = '?' + query.urlencode()
+        return context
+
+
+class ConditionalGetMixin:
+    """Answer unchanged list and detail pages with 304 Not Modified.
+
+    Detail validators come from one query over ``updated_at`` of the
+    object and of every relation in ``validator_relations``, along with
+    row counts so deletions show up. List validators are the version
+    tokens of ``cache_models``, which every save or delete of those models
+    replaces, so a list is validated without touching its rows.
+    """
+    validator_relations = ()
+    cache_models = ()
+
+    def _detail_validators(self, using=None):
+        model = self.get_queryset().model
+        annotations = {}
+        for index, path in enumerate(self.validator_relations):
+            related = model._base_manager.filter(pk=OuterRef('pk')).values('pk')
+            annotations['modified_{}'.format(index)] = Subquery(
+                related.annotate(value=Max(path + '__updated_at')).values('value')
+            )
+            annotations['count_{}'.format(index)] = Subquery(
+                related.annotate(value=Count(path, distinct=True)).values('value')
+            )
+        return model._base_manager.using(using).filter(
+            pk=self.kwargs.get(self.pk_url_kwarg)
+        ).annotate(**annotations).values('updated_at', *annotations).first()
+
+    def _list_validators(self):
+        return page_cache.get_versions(
+            {(model_name, page_cache.ANY) for model_name in self.cache_models}
+        )
+
+    def _etag(self, values):
+        return '"{}"'.format(hashlib.md5('|'.join([
+            self.request.get_full_path(),
+            str(self.request.user.pk),
+            ','.join(sorted(self.request.user.get_all_permissions())),
+            repr(sorted(values.items())),
+        ]).encode()).hexdigest())
+
+    def get_validators(self):
+        if not isinstance(self, SingleObjectMixin):
+            # version tokens carry no time, so lists only get an ETag
+            return self._etag(self._list_validators()), None
+        values = self._detail_validators()
+        if values is None:
+            return None, None
+        modified = [
+            value for key, value in values.items()
+            if value is not None and (key == 'updated_at' or key.startswith('modified_'))
+        ]
+        last_modified = int(max(modified).timestamp()) if modified else None
+        return self._etag(values), last_modified
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if etag is not None:
+            response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # pages differ per user, so shared caches may store but not reuse them
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class ArchiveFallbackMixin:
+    """Find detail objects of archived seasons in the archive database.
+
+    Objects missing from the live tables are looked up in the archive,
+    where they keep their relations, and rendered with ``archived`` set so
+    the templates can leave out edit links. The update and delete views
+    don't fall back, which keeps archived objects read-only.
+    """
+
+    def get_object(self, queryset=None):
+        if queryset is None:
+            queryset = self.get_queryset()
+        try:
+            return super().get_object(queryset)
+        except Http404:
+            if not archive_configured():
+                raise
+            return super().get_object(queryset.using(ARCHIVE_DATABASE))
+
+    def _detail_validators(self, using=None):
+        values = super()._detail_validators(using)
+        if values is None and using is None and archive_configured():
+            values = super()._detail_validators(ARCHIVE_DATABASE)
+        return values
+
+    def render_to_response(self, context, **response_kwargs):
+        context['archived'] = self.object._state.db == ARCHIVE_DATABASE
+        return super().render_to_response(context, **response_kwargs)
+
+
+class CachedPageMixin:
+    """Serve a read-only page from the cache for users with equal permissions.
+
+    The page is keyed on its URL and the user's permission set rather than
+    the user, and is re-rendered once any object of ``cache_models``
+    changes. The greeting in base.html is the only per-user content; it is
+    cached as a placeholder and filled in on every response.
+    """
+    cache_models = ()
+    cache_timeout = page_cache.PAGE_CACHE_TIMEOUT
+    username_placeholder = 'proleague-username-placeholder'
+
+    def render_to_response(self, context, **response_kwargs):
+        context['greeting_name'] = self.username_placeholder
+        return super().render_to_response(context, **response_kwargs)
+
+    def _personalize(self, content):
+        return content.replace(
+            self.username_placeholder.encode(),
+            escape(self.request.user.get_username()).encode()
+        )
+
+    def get(self, request, *args, **kwargs):
+        key = page_cache.page_key(
+            request.get_full_path(),
+            request.user.get_all_permissions(),
+            self.cache_models
+        )
+        cached = page_cache.get_page(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(self._personalize(content), content_type=content_type)
+        response = super().get(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        if response.status_code == 200:
+            page_cache.set_page(
+                key, (response.content, response['Content-Type']), self.cache_timeout
+            )
+        response.content = self._personalize(response.content)
+        return response
+
+
+class SearchView(View):
+    page_kwarg = 'page'
+    cursor_kwarg = 'cursor'
+    paginate_by = 25
+    # see PageLinksMixin
+    pagination_mode = 'page'
+    count_limit = None
+    model = None
+    search_kwarg = None
+    template_name = None
+
+    def get_queryset(self):
+        return self.model.objects.all()
+
+    def _url(self, keyword, key, value):
+        query = self.request.GET.copy()
+        query.pop(self.page_kwarg, None)
+        query.pop(self.cursor_kwarg, None)
+        query[self.search_kwarg] = keyword or ''
+        query[key] = value
+        return '?' + query.urlencode()
+
+    def _page_url(self, keyword, page_number):
+        return self._url(keyword, self.page_kwarg, page_number)
+
+    def _cursor_url(self, keyword, cursor):
+        return self._url(keyword, self.cursor_kwarg, cursor)
+
+    def get_context_data(self, **context):
+        return context
+
+    def get_cursor_context(self, keyword, results):
+        paginator = OffsetCursorPaginator(
+            results,
+            self.paginate_by,
+            count_limit=self.count_limit
+        )
+        page = paginator.page(
+            self.request.GET.get(self.cursor_kwarg)
+        )
+        return {
+            'is_paginated': page.has_other_pages(),
+            'next_page_url': self._cursor_url(
+                keyword, page.next_cursor
+            ) if page.has_next() else None,
+            'paginator': paginator,
+            'page_obj': page,
+            'previous_page_url': self._cursor_url(
+                keyword, page.previous_cursor
+            ) if page.has_previous() else None,
+        }
+
+    def get(self, request):
+        keyword = request.GET.get(self.search_kwarg)
+        results = search(self.get_queryset(), keyword)
+        list_name = '{}_list'.format(self.model._meta.model_name)
+        if self.pagination_mode == 'cursor':
+            context = self.get_cursor_context(keyword, results)
             context.update({
-                'first_page_url':
-                    self.first_page(page),
-                'previous_page_url':
-                    self.previous_page(page),
-                'next_page_url':
-                    self.next_page(page),
-                'last_page_url':
-                    self.last_page(page),
+                list_name: context['page_obj'],
+                'kwd': keyword
             })
-        return context
+            return render(
+                request, self.template_name, self.get_context_data(**context)
+            )
+        paginator = Paginator(
+            results,
+            self.paginate_by
+        )
+        page_number = request.GET.get(
+            self.page_kwarg
+        )
+        try:
+            page = paginator.page(page_number)
+        except PageNotAnInteger:
+            page = paginator.page(1)
+        except EmptyPage:
+            page = paginator.page(paginator.num_pages)
+        if page.has_previous():
+            prev_url = self._page_url(keyword, page.previous_page_number())
+        else:
+            prev_url = None
+        if page.has_next():
+            next_url = self._page_url(keyword, page.next_page_number())
+        else:
+            next_url = None
+        context = {
+            'is_paginated': page.has_other_pages(),
+            'next_page_url': next_url,
+            'paginator': paginator,
+            'page_obj': page,
+            'previous_page_url': prev_url,
+            list_name: page,
+            'kwd': keyword
+        }
+        return render(
+            request, self.template_name, self.get_context_data(**context)
+        )
+
+
+class DeletePreflightMixin:
+    """Refuse to delete an object while protected rows still point at it.
+
+    Both the confirmation page and the delete itself check first, and the
+    refusal lists a sample of each kind of row in the way.
+    """
+    refuse_template_name = 'proleague/refuse_delete.html'
+
+    def refuse(self, blockers):
+        return render(self.request, self.refuse_template_name, {
+            'object': self.object,
+            'verbose_name': self.object._meta.verbose_name,
+            'blockers': blockers,
+            'list_url': self.get_success_url(),
+        })
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        blockers = preflight(self.object)
+        if blockers:
+            return self.refuse(blockers)
+        return super().get(request, *args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        blockers = preflight(self.object)
+        if blockers:
+            return self.refuse(blockers)
+        return super().post(request, *args, **kwargs)
@@ -1,37 +1,81 @@
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.forms import UserCreationForm
-from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.models import Group
-from django.core.paginator import PageNotAnInteger, EmptyPage, Paginator
-from django.db.models import Q
-from django.http import HttpResponseRedirect
+from django.db.models import Avg, Count, F, Prefetch, Sum
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, HttpResponseRedirect, JsonResponse, StreamingHttpResponse,
+)
 from django.shortcuts import render, get_object_or_404, redirect
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils.crypto import constant_time_compare
 from django.views import View
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, FormView
-from itertools import chain
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, FormView, TemplateView
+
+from . import profiling
+from .cache import row_cache_stats
+from .exports import EXPORTS, FILTERS, FORMATS, export
+from .facets import MATCH_FACETS, PLAYER_FACETS
+from .scheduling import SchedulingError, generate
+from .search import search_all
+from .routers import ARCHIVE_DATABASE, archive_configured
+from .utils import (
+    ArchiveFallbackMixin, CachedPageMixin, ConditionalGetMixin, DeletePreflightMixin, FacetMixin, FragmentMixin,
+    PageLinksMixin, SearchView,
+)
+from .forms import ScheduleForm, TournamentForm, MatchFilterForm, MatchForm, PlayerForm, TeamForm, GameForm, SchoolForm
+from .models import (
+    Tournament, Match, MatchReport, PlayerGameStat, Player, Team, Game, School, TeamStats, TournamentSummary,
+)
+
+
+class TournamentList(
+    LoginRequiredMixin, PermissionRequiredMixin, ConditionalGetMixin, CachedPageMixin, PageLinksMixin, FragmentMixin,
+    ListView,
+):
+    paginate_by = 25
+    model = Tournament
+    fragment_template_name = 'proleague/tournament_rows.html'
+    permission_required = 'proleague.view_tournament'
+    cache_models = ('tournament', 'year', 'period')
 
-from .utils import PageLinksMixin
-from .forms import TournamentForm, MatchForm, PlayerForm, TeamForm, GameForm, SchoolForm
-from .models import Tournament, Match, Player, Team, Game, School
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.archived:
+            queryset = queryset.using(ARCHIVE_DATABASE)
+        return queryset
 
+    @property
+    def archived(self):
+        return 'archived' in self.request.GET and archive_configured()
 
-class TournamentList(LoginRequiredMixin, PermissionRequiredMixin, ListView):
-    model = Tournament
-    permission_required = 'proleague.view_tournament'
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['archived'] = self.archived
+        if archive_configured():
+            context['archive_url'] = reverse('proleague_tournament_list_urlpattern') + (
+                '' if self.archived else '?archived'
+            )
+        return context
 
 
-class TournamentDetail(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
+class TournamentDetail(
+    LoginRequiredMixin, PermissionRequiredMixin, ArchiveFallbackMixin, ConditionalGetMixin, CachedPageMixin, DetailView
+):
     model = Tournament
     permission_required = 'proleague.view_tournament'
+    cache_models = ('tournament', 'game', 'team', 'position', 'match')
+    validator_relations = ('game', 'teams', 'teams__position', 'standings')
 
     def get_context_data(self, **kwargs):
         context = super(DetailView, self).get_context_data(**kwargs)
-        tournament = self.get_object()
-        team_list = tournament.teams.all()
+        tournament = self.object
+        team_list = tournament.teams.select_related('position')
         game = tournament.game
+        standing_list = tournament.standings.select_related('team')
         context['team_list'] = team_list
         context['game'] = game
+        context['standing_list'] = standing_list
         return context
 
 
@@ -48,48 +92,101 @@ class TournamentUpdate(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
     permission_required = 'proleague.change_tournament'
 
 
-class TournamentDelete(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
+class TournamentDelete(LoginRequiredMixin, PermissionRequiredMixin, DeletePreflightMixin, DeleteView):
     model = Tournament
     success_url = reverse_lazy('proleague_tournament_list_urlpattern')
     permission_required = 'proleague.delete_tournament'
 
-    def get(self, request, pk):
-        tournament = get_object_or_404(Tournament, pk=pk)
-        teams = tournament.teams.all()
-        if teams.count() > 0:
-            return render(
-                request,
-                'proleague/tournament_refuse_delete.html',
-                {
-                    'tournament': tournament,
-                    'teams': teams,
-                }
-            )
-        else:
-            return render(
-                request,
-                'proleague/tournament_confirm_delete.html',
-                {'tournament': tournament}
-            )
 
+class TournamentSchedule(LoginRequiredMixin, PermissionRequiredMixin, FormView):
+    form_class = ScheduleForm
+    template_name = 'proleague/tournament_schedule_form.html'
+    permission_required = 'proleague.add_match'
+
+    def dispatch(self, request, *args, **kwargs):
+        self.tournament = get_object_or_404(Tournament, pk=kwargs['pk'])
+        return super().dispatch(request, *args, **kwargs)
 
-class MatchList(LoginRequiredMixin, PermissionRequiredMixin, PageLinksMixin, ListView):
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['tournament'] = self.tournament
+        return context
+
+    def form_valid(self, form):
+        try:
+            generate(self.tournament, **form.cleaned_data)
+        except SchedulingError as error:
+            form.add_error(None, str(error))
+            return self.form_invalid(form)
+        return redirect(self.tournament)
+
+
+class MatchList(
+    LoginRequiredMixin, PermissionRequiredMixin, ConditionalGetMixin, CachedPageMixin, PageLinksMixin, FacetMixin,
+    ListView,
+):
     paginate_by = 25
+    pagination_mode = 'cursor'
+    count_limit = 1000
     model = Match
     permission_required = 'proleague.view_match'
+    facets = MATCH_FACETS
+    cache_models = ('match', 'team', 'tournament', 'year', 'period', 'game')
+
+    def get_queryset(self):
+        self.filter_form = MatchFilterForm(self.request.GET)
+        return self.facet_queryset(self.filter_form.filter(Match.objects.for_display()))
+
+    def get_facet_summary(self):
+        # the durations aren't summarized, so a list filtered on them is counted
+        if self.filter_form.is_filtering():
+            return None
+        return TournamentSummary.objects.annotate(count=F('matches'))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['filter_form'] = self.filter_form
+        context['average_duration'] = self.average_duration()
+        return context
+
+    def average_duration(self):
+        if self.filter_form.is_filtering():
+            # read through match_duration_idx, within the duration range
+            return self.object_list.aggregate(Avg('duration'))['duration__avg']
+        totals = self.facets.filter(TournamentSummary.objects.all(), self.facet_selection).aggregate(
+            timed_matches=Sum('timed_matches'), total_duration=Sum('total_duration'),
+        )
+        if not totals['timed_matches']:
+            return None
+        return totals['total_duration'] / totals['timed_matches']
 
 
-class MatchDetail(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
+class MatchDetail(
+    LoginRequiredMixin, PermissionRequiredMixin, ArchiveFallbackMixin, ConditionalGetMixin, CachedPageMixin, DetailView
+):
     model = Match
     permission_required = 'proleague.view_match'
+    cache_models = ('match', 'team', 'tournament', 'player')
+    validator_relations = (
+        'tournament', 'team_a', 'team_b', 'report', 'games', 'games__player_stats', 'games__player_stats__player',
+    )
+
+    def get_queryset(self):
+        return Match.objects.for_display()
 
     def get_context_data(self, **kwargs):
         context = super(DetailView, self).get_context_data(**kwargs)
-        match = self.get_object()
+        match = self.object
         team_a = match.team_a
         team_b = match.team_b
+        report = MatchReport.objects.using(match._state.db).filter(match=match).first()
+        games = match.games.prefetch_related(
+            Prefetch('player_stats', queryset=PlayerGameStat.objects.using(match._state.db).select_related('player'))
+        )
         context['team_a'] = team_a
         context['team_b'] = team_b
+        context['report'] = report
+        context['games'] = games
         return context
 
 
@@ -111,77 +208,54 @@ class MatchDelete(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
     success_url = reverse_lazy('proleague_match_list_urlpattern')
     permission_required = 'proleague.delete_match'
 
+    def get_queryset(self):
+        return Match.objects.for_display()
 
-class MatchSearch(LoginRequiredMixin, PermissionRequiredMixin, View):
-    page_kwarg = 'page'
-    paginate_by = 25
+
+class MatchSearch(LoginRequiredMixin, PermissionRequiredMixin, SearchView):
+    pagination_mode = 'cursor'
+    count_limit = 1000
+    model = Match
+    search_kwarg = 'match_search'
     template_name = 'proleague/match_search_result.html'
     permission_required = 'proleague.view_match'
 
-    def get(self, request):
-        keyword = request.GET.get('match_search')
-        match_list = Match.objects.filter(
-            Q(match_type__icontains=keyword) |
-            Q(team_a__team_name__icontains=keyword) |
-            Q(team_b__team_name__icontains=keyword) |
-            Q(team_a__tournament__tournament_name__icontains=keyword)
-        )
-        paginator = Paginator(
-            match_list,
-            self.paginate_by
-        )
-        page_number = request.GET.get(
-            self.page_kwarg
-        )
-        try:
-            page = paginator.page(page_number)
-        except PageNotAnInteger:
-            page = paginator.page(1)
-        except EmptyPage:
-            page = paginator.page(paginator.num_pages)
-        if page.has_previous():
-            prev_url = "?match_search={kwd}&{pkw}={n}".format(
-                kwd=keyword,
-                pkw=self.page_kwarg,
-                n=page.previous_page_number()
-            )
-        else:
-            prev_url = None
-        if page.has_next():
-            next_url = "?match_search={kwd}&{pkw}={n}".format(
-                kwd=keyword,
-                pkw=self.page_kwarg,
-                n=page.next_page_number()
-            )
-        else:
-            next_url = None
-        context = {
-            'is_paginated': page.has_other_pages(),
-            'next_page_url': next_url,
-            'paginator': paginator,
-            'previous_page_url': prev_url,
-            'match_list': page,
-            'kwd': keyword
-        }
-        return render(
-            request, self.template_name, context
-        )
+    def get_queryset(self):
+        self.filter_form = MatchFilterForm(self.request.GET)
+        return self.filter_form.filter(Match.objects.for_display())
+
+    def get_context_data(self, **context):
+        context['filter_form'] = self.filter_form
+        return context
 
 
-class GameList(LoginRequiredMixin, PermissionRequiredMixin, ListView):
+class GameList(
+    LoginRequiredMixin, PermissionRequiredMixin, ConditionalGetMixin, CachedPageMixin, PageLinksMixin, FragmentMixin,
+    ListView,
+):
+    paginate_by = 25
     model = Game
+    fragment_template_name = 'proleague/game_rows.html'
     permission_required = 'proleague.view_game'
+    cache_models = ('game',)
 
 
-class GameDetail(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
+class GameDetail(
+    LoginRequiredMixin, PermissionRequiredMixin, ConditionalGetMixin, CachedPageMixin, PageLinksMixin, FragmentMixin,
+    DetailView,
+):
     model = Game
     permission_required = 'proleague.view_game'
+    paginate_by = 25
+    fragment_template_name = 'proleague/tournament_rows.html'
+    cache_models = ('game', 'tournament', 'year', 'period')
+    validator_relations = ('tournaments', 'tournaments__year', 'tournaments__period')
 
     def get_context_data(self, **kwargs):
         context = super(DetailView, self).get_context_data(**kwargs)
-        game = self.get_object()
-        tournament_list = game.tournaments.all()
-        context['tournament_list'] = tournament_list
+        game = self.object
+        related = self.paginate_related(game.tournaments.select_related('year', 'period'))
+        context.update(related, tournament_list=related['object_list'])
         return context
 
 
@@ -198,51 +272,45 @@ class GameUpdate(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
     permission_required = 'proleague.change_game'
 
 
-class GameDelete(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
+class GameDelete(LoginRequiredMixin, PermissionRequiredMixin, DeletePreflightMixin, DeleteView):
     model = Game
     success_url = reverse_lazy('proleague_game_list_urlpattern')
     permission_required = 'proleague.delete_game'
 
-    def get(self, request, pk):
-        game = get_object_or_404(Game, pk=pk)
-        tournaments = game.tournaments.all()
-        if tournaments.count() > 0:
-            return render(
-                request,
-                'proleague/game_refuse_delete.html',
-                {
-                    'game': game,
-                    'tournaments': tournaments,
-                }
-            )
-        else:
-            return render(
-                request,
-                'proleague/game_confirm_delete.html',
-                {'game': game}
-            )
-
 
-class TeamList(LoginRequiredMixin, PermissionRequiredMixin, PageLinksMixin, ListView):
+class TeamList(LoginRequiredMixin, PermissionRequiredMixin, ConditionalGetMixin, CachedPageMixin, PageLinksMixin, ListView):
     paginate_by = 25
     model = Team
     permission_required = 'proleague.view_team'
+    cache_models = ('team',)
 
 
-class TeamDetail(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
+class TeamDetail(
+    LoginRequiredMixin, PermissionRequiredMixin, ArchiveFallbackMixin, ConditionalGetMixin, CachedPageMixin,
+    PageLinksMixin, DetailView,
+):
     model = Team
     permission_required = 'proleague.view_team'
+    paginate_by = 25
+    cache_models = ('team', 'tournament', 'position', 'player', 'match')
+    validator_relations = (
+        'tournament', 'position', 'players',
+        'match_a', 'match_a__team_b', 'match_b', 'match_b__team_a',
+        'stats', 'head_to_head',
+    )
 
     def get_context_data(self, **kwargs):
         context = super(DetailView, self).get_context_data(**kwargs)
-        team = self.get_object()
-        match_a = team.match_a.all()
-        match_b = team.match_b.all()
-        match_list = list(chain(match_a, match_b))
+        team = self.object
+        related = self.paginate_related(team.matches())
         player_list = team.players.all()
         tournament = team.tournament
         position = team.position
-        context['match_list'] = match_list
+        stats = TeamStats.objects.using(team._state.db).filter(team=team).first()
+        head_to_head_list = team.head_to_head.select_related('opponent')
+        context.update(related, match_list=related['object_list'])
+        context['stats'] = stats
+        context['head_to_head_list'] = head_to_head_list
         context['player_list'] = player_list
         context['tournament'] = tournament
         context['position'] = position
@@ -262,111 +330,46 @@ class TeamUpdate(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
     permission_required = 'proleague.change_team'
 
 
-class TeamDelete(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
+class TeamDelete(LoginRequiredMixin, PermissionRequiredMixin, DeletePreflightMixin, DeleteView):
     model = Team
     success_url = reverse_lazy('proleague_team_list_urlpattern')
     permission_required = 'proleague.delete_team'
 
-    def get(self, request, pk):
-        team = get_object_or_404(Team, pk=pk)
-        match_a = team.match_a.all()
-        match_b = team.match_b.all()
-        matches = list(chain(match_a, match_b))
-        players = team.players.all()
-        if len(matches) > 0:
-            return render(
-                request,
-                'proleague/team_refuse_delete_matches.html',
-                {
-                    'team': team,
-                    'matches': matches,
-                }
-            )
-        elif players.count() > 0:
-            return render(
-                request,
-                'proleague/team_refuse_delete_players.html',
-                {
-                    'team': team,
-                    'players': players,
-                }
-            )
-        else:
-            return render(
-                request,
-                'proleague/team_confirm_delete.html',
-                {'team': team}
-            )
-
 
-class TeamSearch(LoginRequiredMixin, PermissionRequiredMixin, View):
-    page_kwarg = 'page'
-    paginate_by = 25
+class TeamSearch(LoginRequiredMixin, PermissionRequiredMixin, SearchView):
+    model = Team
+    search_kwarg = 'team_search'
     template_name = 'proleague/team_search_result.html'
     permission_required = 'proleague.view_team'
 
-    def get(self, request):
-        keyword = request.GET.get('team_search')
-        team_list = Team.objects.filter(
-            Q(team_name__icontains=keyword) |
-            Q(acronym__icontains=keyword)
-        ).distinct()
-        paginator = Paginator(
-            team_list,
-            self.paginate_by
-        )
-        page_number = request.GET.get(
-            self.page_kwarg
-        )
-        try:
-            page = paginator.page(page_number)
-        except PageNotAnInteger:
-            page = paginator.page(1)
-        except EmptyPage:
-            page = paginator.page(paginator.num_pages)
-        if page.has_previous():
-            prev_url = "?team_search={kwd}&{pkw}={n}".format(
-                kwd=keyword,
-                pkw=self.page_kwarg,
-                n=page.previous_page_number()
-            )
-        else:
-            prev_url = None
-        if page.has_next():
-            next_url = "?team_search={kwd}&{pkw}={n}".format(
-                kwd=keyword,
-                pkw=self.page_kwarg,
-                n=page.next_page_number()
-            )
-        else:
-            next_url = None
-        context = {
-            'is_paginated': page.has_other_pages(),
-            'next_page_url': next_url,
-            'paginator': paginator,
-            'previous_page_url': prev_url,
-            'team_list': page,
-            'kwd': keyword
-        }
-        return render(
-            request, self.template_name, context
-        )
-
 
-class SchoolList(LoginRequiredMixin, PermissionRequiredMixin, ListView):
+class SchoolList(
+    LoginRequiredMixin, PermissionRequiredMixin, ConditionalGetMixin, CachedPageMixin, PageLinksMixin, FragmentMixin,
+    ListView,
+):
+    paginate_by = 25
     model = School
+    fragment_template_name = 'proleague/school_rows.html'
     permission_required = 'proleague.view_team'
+    cache_models = ('school',)
 
 
-class SchoolDetail(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
+class SchoolDetail(
+    LoginRequiredMixin, PermissionRequiredMixin, ConditionalGetMixin, CachedPageMixin, PageLinksMixin, FragmentMixin,
+    DetailView,
+):
     model = School
     permission_required = 'proleague.view_team'
+    paginate_by = 25
+    fragment_template_name = 'proleague/player_rows.html'
+    cache_models = ('school', 'player')
+    validator_relations = ('players',)
 
     def get_context_data(self, **kwargs):
         context = super(DetailView, self).get_context_data(**kwargs)
-        school = self.get_object()
-        player_list = school.players.all()
-        context['player_list'] = player_list
+        school = self.object
+        related = self.paginate_related(school.players.all())
+        context.update(related, player_list=related['object_list'])
         return context
 
 
@@ -383,48 +386,47 @@ class SchoolUpdate(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
     permission_required = 'proleague.change_school'
 
 
-class SchoolDelete(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
+class SchoolDelete(LoginRequiredMixin, PermissionRequiredMixin, DeletePreflightMixin, DeleteView):
     model = School
     success_url = reverse_lazy('proleague_school_list_urlpattern')
     permission_required = 'proleague.delete_school'
 
-    def get(self, request, pk):
-        school = get_object_or_404(School, pk=pk)
-        players = school.players.all()
-        if players.count() > 0:
-            return render(
-                request,
-                'proleague/school_refuse_delete.html',
-                {
-                    'school': school,
-                    'players': players,
-                }
-            )
-        else:
-            return render(
-                request,
-                'proleague/school_confirm_delete.html',
-                {'school': school}
-            )
-
 
-class PlayerList(LoginRequiredMixin, PermissionRequiredMixin, PageLinksMixin, ListView):
+class PlayerList(
+    LoginRequiredMixin, PermissionRequiredMixin, ConditionalGetMixin, CachedPageMixin, PageLinksMixin, FacetMixin,
+    ListView,
+):
     paginate_by = 25
     model = Player
     permission_required = 'proleague.view_player'
+    facets = PLAYER_FACETS
+    cache_models = ('player', 'team', 'tournament', 'year', 'period', 'game', 'school')
+
+    def get_queryset(self):
+        return self.facet_queryset(super().get_queryset())
 
 
-class PlayerDetail(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
+class PlayerDetail(
+    LoginRequiredMixin, PermissionRequiredMixin, ArchiveFallbackMixin, ConditionalGetMixin, CachedPageMixin, DetailView
+):
     model = Player
     permission_required = 'proleague.view_player'
+    cache_models = ('player', 'school', 'team', 'match')
+    validator_relations = ('school', 'team', 'team__stats', 'game_stats')
 
     def get_context_data(self, **kwargs):
         context = super(DetailView, self).get_context_data(**kwargs)
-        player = self.get_object()
+        player = self.object
         school = player.school
         team = player.team
+        stats = TeamStats.objects.using(player._state.db).filter(team=team).first()
+        game_totals = PlayerGameStat.objects.using(player._state.db).filter(player=player).aggregate(
+            games=Count('pk'), kills=Sum('kills'), deaths=Sum('deaths'), assists=Sum('assists')
+        )
         context['school'] = school
         context['team'] = team
+        context['stats'] = stats
+        context['game_totals'] = game_totals
         return context
 
 
@@ -447,60 +449,96 @@ class PlayerDelete(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
     permission_required = 'proleague.delete_player'
 
 
-class PlayerSearch(LoginRequiredMixin, PermissionRequiredMixin, View):
-    page_kwarg = 'page'
-    paginate_by = 25
+class PlayerSearch(LoginRequiredMixin, PermissionRequiredMixin, SearchView):
+    model = Player
+    search_kwarg = 'player_search'
     template_name = 'proleague/player_search_result.html'
     permission_required = 'proleague.view_player'
 
-    def get(self, request):
-        keyword = request.GET.get('player_search')
-        player_list = Player.objects.filter(
-            Q(player_name__icontains=keyword) |
-            Q(gamer_tag__icontains=keyword)
-        ).distinct()
-        paginator = Paginator(
-            player_list,
-            self.paginate_by
-        )
-        page_number = request.GET.get(
-            self.page_kwarg
-        )
+
+class GlobalSearch(LoginRequiredMixin, View):
+    search_kwarg = 'q'
+    limit = 5
+    max_limit = 25
+    template_name = 'proleague/search_result.html'
+    sections = [
+        ('game', 'Games', GameDetail),
+        ('tournament', 'Tournaments', TournamentDetail),
+        ('team', 'Teams', TeamDetail),
+        ('match', 'Matches', MatchDetail),
+        ('school', 'Schools', SchoolDetail),
+        ('player', 'Players', PlayerDetail),
+    ]
+
+    def get_limit(self):
         try:
-            page = paginator.page(page_number)
-        except PageNotAnInteger:
-            page = paginator.page(1)
-        except EmptyPage:
-            page = paginator.page(paginator.num_pages)
-        if page.has_previous():
-            prev_url = "?player_search={kwd}&{pkw}={n}".format(
-                kwd=keyword,
-                pkw=self.page_kwarg,
-                n=page.previous_page_number()
-            )
-        else:
-            prev_url = None
-        if page.has_next():
-            next_url = "?player_search={kwd}&{pkw}={n}".format(
-                kwd=keyword,
-                pkw=self.page_kwarg,
-                n=page.next_page_number()
-            )
-        else:
-            next_url = None
-        context = {
-            'is_paginated': page.has_other_pages(),
-            'next_page_url': next_url,
-            'paginator': paginator,
-            'previous_page_url': prev_url,
-            'player_list': page,
-            'kwd': keyword
+            limit = int(self.request.GET.get('limit', self.limit))
+        except ValueError:
+            limit = self.limit
+        return max(1, min(limit, self.max_limit))
+
+    def get(self, request):
+        keyword = request.GET.get(self.search_kwarg, '')
+        labels = {
+            kind: label
+            for kind, label, view in self.sections
+            if request.user.has_perm(view.permission_required)
         }
+        grouped = search_all(keyword, labels, self.get_limit())
+        result_groups = [
+            {
+                'kind': kind,
+                'label': labels[kind],
+                'results': [
+                    {
+                        'id': pk,
+                        'title': title,
+                        'url': reverse(
+                            'proleague_{}_detail_urlpattern'.format(kind),
+                            kwargs={'pk': pk}
+                        ),
+                    }
+                    for pk, title in results
+                ],
+            }
+            for kind, results in grouped.items()
+        ]
+        if request.GET.get('format') == 'json':
+            return JsonResponse({'query': keyword, 'groups': result_groups})
         return render(
-            request, self.template_name, context
+            request,
+            self.template_name,
+            {'result_groups': result_groups, 'kwd': keyword}
         )
 
 
+class Export(LoginRequiredMixin, PermissionRequiredMixin, View):
+    chunk_size = 2000
+
+    def get_permission_required(self):
+        if self.kwargs['kind'] not in EXPORTS:
+            raise Http404
+        return ['proleague.view_{}'.format(self.kwargs['kind'])]
+
+    def get(self, request, kind):
+        file_format = request.GET.get('format', 'csv')
+        if file_format not in FORMATS:
+            raise Http404
+        content_type, extension = FORMATS[file_format]
+        try:
+            content = export(
+                kind,
+                file_format,
+                {name: request.GET.get(name) for name in FILTERS},
+                chunk_size=self.chunk_size,
+            )
+        except ValueError:
+            return HttpResponseBadRequest('Invalid export filter.')
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = 'attachment; filename="{}.{}"'.format(kind, extension)
+        return response
+
+
 class SignUp(FormView):
     template_name = 'proleague/signup.html'
     form_class = UserCreationForm
@@ -537,3 +575,30 @@ class SignUp(FormView):
 #             'form': form
 #         }
 #     )
+
+
+class ProfileDashboard(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+    template_name = 'proleague/profile_dashboard.html'
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['views'] = profiling.registry.snapshot()
+        context['window_minutes'] = profiling.WINDOW // 60
+        context['duplicate_threshold'] = profiling.DUPLICATE_THRESHOLD
+        context['row_cache'] = row_cache_stats()
+        return context
+
+
+class Metrics(View):
+
+    def get(self, request):
+        authorization = request.headers.get('Authorization', '')
+        scraper = profiling.METRICS_TOKEN and constant_time_compare(
+            authorization, 'Bearer {}'.format(profiling.METRICS_TOKEN)
+        )
+        if not (scraper or request.user.is_staff):
+            return HttpResponse('Forbidden', status=403, content_type='text/plain')
+        return HttpResponse(profiling.registry.prometheus(), content_type='text/plain; version=0.0.4')